@@ -0,0 +1,28 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: 3f9a1c2d7b40
+Revises: 2e6db05d86f8
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2d7b40'
+down_revision: Union[str, None] = '2e6db05d86f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_products_created_at_id', 'products', ['created_at', 'id'], unique=False)
+    op.create_index('ix_product_media_created_at_id', 'product_media', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_media_created_at_id', table_name='product_media')
+    op.drop_index('ix_products_created_at_id', table_name='products')
@@ -0,0 +1,60 @@
+"""add_user_sessions_table
+
+Revision ID: 5a0d7c3e91f4
+Revises: e3c58a9f0b12
+Create Date: 2026-10-17 15:21:08.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a0d7c3e91f4'
+down_revision: Union[str, None] = 'e3c58a9f0b12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_sessions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('token_hash', sa.String(length=64), nullable=False),
+    sa.Column('user_agent', sa.String(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_sessions_id'), 'user_sessions', ['id'], unique=False)
+    op.create_index(op.f('ix_user_sessions_user_id'), 'user_sessions', ['user_id'], unique=False)
+    op.create_index(op.f('ix_user_sessions_token_hash'), 'user_sessions', ['token_hash'], unique=True)
+    op.create_index(op.f('ix_user_sessions_expires_at'), 'user_sessions', ['expires_at'], unique=False)
+
+    # Carry over live sessions, hashing the plaintext tokens stored on users
+    op.execute("""
+        INSERT INTO user_sessions (user_id, token_hash, expires_at, created_at, last_used_at)
+        SELECT id, encode(sha256(convert_to(refresh_token, 'UTF8')), 'hex'), refresh_token_expires_at, now(), now()
+        FROM users
+        WHERE refresh_token IS NOT NULL AND refresh_token_expires_at > now()
+    """)
+
+    op.drop_index('ix_users_refresh_token', table_name='users')
+    op.drop_column('users', 'refresh_token_expires_at')
+    op.drop_column('users', 'refresh_token')
+
+
+def downgrade() -> None:
+    # Tokens are only stored hashed, so existing sessions cannot be restored
+    op.add_column('users', sa.Column('refresh_token', sa.String(), nullable=True))
+    op.add_column('users', sa.Column('refresh_token_expires_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_users_refresh_token', 'users', ['refresh_token'], unique=False)
+    op.drop_index(op.f('ix_user_sessions_expires_at'), table_name='user_sessions')
+    op.drop_index(op.f('ix_user_sessions_token_hash'), table_name='user_sessions')
+    op.drop_index(op.f('ix_user_sessions_user_id'), table_name='user_sessions')
+    op.drop_index(op.f('ix_user_sessions_id'), table_name='user_sessions')
+    op.drop_table('user_sessions')
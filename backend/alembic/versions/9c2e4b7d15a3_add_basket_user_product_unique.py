@@ -0,0 +1,32 @@
+"""add_basket_user_product_unique
+
+Revision ID: 9c2e4b7d15a3
+Revises: 5a0d7c3e91f4
+Create Date: 2026-10-17 18:02:44.913520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2e4b7d15a3'
+down_revision: Union[str, None] = '5a0d7c3e91f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the most recent row of any duplicated (user, product) pair
+    op.execute("""
+        DELETE FROM baskets a
+        USING baskets b
+        WHERE a.user_id = b.user_id AND a.product_id = b.product_id AND a.id < b.id
+    """)
+    op.create_unique_constraint('uq_baskets_user_id_product_id', 'baskets', ['user_id', 'product_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_baskets_user_id_product_id', 'baskets', type_='unique')
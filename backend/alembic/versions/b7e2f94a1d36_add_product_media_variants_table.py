@@ -0,0 +1,44 @@
+"""add_product_media_variants_table
+
+Revision ID: b7e2f94a1d36
+Revises: 8d41b6e0c925
+Create Date: 2026-10-17 11:26:09.840551
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2f94a1d36'
+down_revision: Union[str, None] = '8d41b6e0c925'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('product_media_variants',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('media_id', sa.Integer(), nullable=False),
+    sa.Column('variant', sa.String(), nullable=False),
+    sa.Column('format', sa.String(), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=False),
+    sa.Column('height', sa.Integer(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('s3_url', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['media_id'], ['product_media.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('media_id', 'variant', name='uq_product_media_variants_media_id_variant')
+    )
+    op.create_index(op.f('ix_product_media_variants_id'), 'product_media_variants', ['id'], unique=False)
+    op.create_index(op.f('ix_product_media_variants_media_id'), 'product_media_variants', ['media_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_product_media_variants_media_id'), table_name='product_media_variants')
+    op.drop_index(op.f('ix_product_media_variants_id'), table_name='product_media_variants')
+    op.drop_table('product_media_variants')
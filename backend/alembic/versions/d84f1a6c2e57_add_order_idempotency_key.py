@@ -0,0 +1,33 @@
+"""add_order_idempotency_key
+
+Revision ID: d84f1a6c2e57
+Revises: 9c2e4b7d15a3
+Create Date: 2026-10-17 19:37:15.208846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd84f1a6c2e57'
+down_revision: Union[str, None] = '9c2e4b7d15a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('idempotency_key', sa.String(length=255), nullable=True))
+    op.create_unique_constraint('uq_orders_user_id_idempotency_key', 'orders', ['user_id', 'idempotency_key'])
+    op.alter_column('orders', 'product_id', existing_type=sa.Integer(), nullable=True)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    # Fails if checkout orders without a product_id exist
+    op.alter_column('orders', 'product_id', existing_type=sa.Integer(), nullable=False)
+    op.drop_constraint('uq_orders_user_id_idempotency_key', 'orders', type_='unique')
+    op.drop_column('orders', 'idempotency_key')
@@ -0,0 +1,30 @@
+"""add_content_hash_to_product_media
+
+Revision ID: e3c58a9f0b12
+Revises: b7e2f94a1d36
+Create Date: 2026-10-17 13:02:55.116930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3c58a9f0b12'
+down_revision: Union[str, None] = 'b7e2f94a1d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('product_media', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_product_media_content_hash'), 'product_media', ['content_hash'], unique=False)
+    op.create_unique_constraint('uq_product_media_product_id_content_hash', 'product_media', ['product_id', 'content_hash'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_product_media_product_id_content_hash', 'product_media', type_='unique')
+    op.drop_index(op.f('ix_product_media_content_hash'), table_name='product_media')
+    op.drop_column('product_media', 'content_hash')
@@ -8,31 +8,23 @@ Following the same pattern as products endpoints:
 - State parameter for CSRF protection
 """
 
-import time
-from datetime import datetime
-from fastapi import APIRouter, HTTPException, Depends, Query, status, Body
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status, Body
 
 from app.schemas.oauth import GoogleAuthResponse, TokenResponse, RefreshTokenRequest
 
 from app.services.oauth_service import OAuthService
 from app.services.user_service import UserService
+from app.services.session_service import SessionService
 
-from app.core.security import create_access_token, create_refresh_token, verify_refresh_token
-from app.core.dependencies import get_user_service
-from app.database import get_db
+from app.core.security import create_access_token
+from app.core.dependencies import get_user_service, get_session_service
 
 from app.config import settings
-from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import timedelta
-from app.repositories.user_repository import UserRepository
+from app.core.state_store import oauth_state_store
 
 
 router = APIRouter()
 
-# In-memory state storage (in production, use Redis or database)
-# Key: state_token, Value: timestamp or user session info
-_oauth_states = {}
-
 @router.get("/google/login", response_model=GoogleAuthResponse)
 async def google_login():
     """
@@ -44,8 +36,8 @@ async def google_login():
     oauth_service = OAuthService()
     state = oauth_service.generate_state()
     
-    # Store state with timestamp (expires after 10 minutes)
-    _oauth_states[state] = time.time()
+    # Store state; it expires after OAUTH_STATE_TTL_SECONDS
+    await oauth_state_store.add(state)
     
     authorization_url, _ = oauth_service.create_authorization_url(state)
     
@@ -57,10 +49,11 @@ async def google_login():
 
 @router.get("/google/callback", response_model=TokenResponse)
 async def google_callback(
+    request: Request,
     code: str = Query(..., description="Authorization code from Google"),
     state: str = Query(..., description="State parameter for CSRF protection"),
     user_service: UserService = Depends(get_user_service),
-    db: AsyncSession = Depends(get_db)
+    session_service: SessionService = Depends(get_session_service)
 ):
     """
     Handle Google OAuth callback
@@ -68,24 +61,13 @@ async def google_callback(
     Validates state parameter, exchanges code for user info,
     creates/updates user, and returns JWT token.
     """
-    # Validate state parameter (CSRF protection)
-    if state not in _oauth_states:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid state parameter"
-        )
-    
-    # Check if state is expired (10 minutes)
-    if time.time() - _oauth_states[state] > 600:
-        del _oauth_states[state]
+    # Validate and consume state parameter (CSRF protection); states are single-use
+    if not await oauth_state_store.consume(state):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="State parameter expired"
+            detail="Invalid or expired state parameter"
         )
     
-    # Remove used state
-    del _oauth_states[state]
-    
     try:
         # Fetch user info from Google
         oauth_service = OAuthService()
@@ -105,18 +87,11 @@ async def google_callback(
         )
         
         # Generate JWT access token
-        access_token = create_access_token(user)
+        access_token = create_access_token(user.id)
         
-        # Generate refresh token
-        refresh_token = create_refresh_token()
-        refresh_token_expires_at = datetime.utcnow() + timedelta(
-            days=settings.refresh_token_expire_days or 30
-        )
-        
-        # Save refresh token to database
-        repository = UserRepository(db)
-        await repository.update_user_refresh_token(
-            user.id, refresh_token, refresh_token_expires_at
+        # Open a session for this device; only the refresh token's hash is stored
+        refresh_token = await session_service.start_session(
+            user.id, user_agent=request.headers.get("user-agent")
         )
         
         return TokenResponse(
@@ -137,39 +112,26 @@ async def google_callback(
 @router.post("/auth/refresh", response_model=TokenResponse)
 async def refresh_access_token(
     request: RefreshTokenRequest,
-    db: AsyncSession = Depends(get_db)
+    session_service: SessionService = Depends(get_session_service)
 ):
     """
     Refresh access token using refresh token
     
-    Validates the refresh token and returns a new access token.
-    Optionally rotates the refresh token for better security.
+    Rotates the refresh token in a single UPDATE ... RETURNING: the old token
+    stops working and a new one is returned with the new access token.
     """
     try:
-        # Verify refresh token
-        user = await verify_refresh_token(request.refresh_token, db)
+        rotated = await session_service.rotate(request.refresh_token)
         
-        if not user:
+        if not rotated:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or expired refresh token"
             )
+        user_id, new_refresh_token = rotated
         
         # Generate new access token
-        access_token = create_access_token(user)
-        
-        # Optionally rotate refresh token (generate new one)
-        new_refresh_token = create_refresh_token()
-        refresh_token_expires_at = datetime.utcnow() + timedelta(
-            days=settings.refresh_token_expire_days or 30
-        )
-        
-        # Update refresh token in database
-        from app.repositories.user_repository import UserRepository
-        repository = UserRepository(db)
-        await repository.update_user_refresh_token(
-            user.id, new_refresh_token, refresh_token_expires_at
-        )
+        access_token = create_access_token(user_id)
         
         return TokenResponse(
             access_token=access_token,
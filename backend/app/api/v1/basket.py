@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.schemas.basket import BasketItemAdd, BasketItemUpdate, BasketResponse
+from app.schemas.user import UserResponse
+from app.services.basket_service import BasketService
+from app.core.dependencies import get_basket_service, get_current_user
+
+router = APIRouter()
+
+def _product_not_found(product_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Product with id {product_id} not found"
+    )
+
+@router.get("/", response_model=BasketResponse)
+async def get_basket(
+    current_user: UserResponse = Depends(get_current_user),
+    service: BasketService = Depends(get_basket_service)
+):
+    """Get the current user's basket"""
+    return await service.get_basket(current_user.id)
+
+@router.post("/items", response_model=BasketResponse)
+async def add_basket_item(
+    item: BasketItemAdd,
+    current_user: UserResponse = Depends(get_current_user),
+    service: BasketService = Depends(get_basket_service)
+):
+    """Add a quantity of a product to the basket (increments if already there)"""
+    basket = await service.add_item(current_user.id, item.product_id, item.quantity)
+    if basket is None:
+        raise _product_not_found(item.product_id)
+    return basket
+
+@router.put("/items/{product_id}", response_model=BasketResponse)
+async def set_basket_item(
+    product_id: int,
+    item: BasketItemUpdate,
+    current_user: UserResponse = Depends(get_current_user),
+    service: BasketService = Depends(get_basket_service)
+):
+    """Set a product's quantity in the basket; 0 removes it"""
+    basket = await service.set_quantity(current_user.id, product_id, item.quantity)
+    if basket is None:
+        raise _product_not_found(product_id)
+    return basket
+
+@router.delete("/items/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_basket_item(
+    product_id: int,
+    current_user: UserResponse = Depends(get_current_user),
+    service: BasketService = Depends(get_basket_service)
+):
+    """Remove a product from the basket"""
+    removed = await service.remove_item(current_user.id, product_id)
+    if not removed:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product with id {product_id} is not in the basket"
+        )
+    return None
+
+@router.delete("/", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_basket(
+    current_user: UserResponse = Depends(get_current_user),
+    service: BasketService = Depends(get_basket_service)
+):
+    """Remove everything from the basket"""
+    await service.clear(current_user.id)
+    return None
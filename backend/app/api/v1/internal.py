@@ -0,0 +1,27 @@
+"""
+Internal operational endpoints
+
+Used for capacity planning and debugging; not part of the public API surface.
+Every route requires a superuser's bearer token.
+"""
+
+from fastapi import APIRouter, Depends
+from app.core.cache import product_cache, user_cache
+from app.core.dependencies import get_current_superuser
+from app.database import pool_stats
+
+router = APIRouter(dependencies=[Depends(get_current_superuser)])
+
+@router.get("/cache")
+async def cache_stats():
+    """Hit/miss counters for the product and principal caches"""
+    return {
+        name: {"enabled": True, **cache.stats()} if cache else {"enabled": False}
+        for name, cache in (("products", product_cache), ("users", user_cache))
+    }
+
+
+@router.get("/db-pool")
+async def db_pool_stats():
+    """Connection pool occupancy and how long checkouts waited for a connection"""
+    return pool_stats()
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from typing import Optional
+from app.schemas.order import OrderResponse
+from app.schemas.user import UserResponse
+from app.services.order_service import OrderService
+from app.core.dependencies import get_order_service, get_current_user
+
+router = APIRouter()
+
+@router.post("/checkout", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def checkout(
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Client-generated key; retries with the same key return the same order"),
+    current_user: UserResponse = Depends(get_current_user),
+    service: OrderService = Depends(get_order_service)
+):
+    """
+    Place an order for everything in the current user's basket
+
+    Send a unique Idempotency-Key per checkout attempt and reuse it on retries:
+    a repeated key returns the original order (with Idempotent-Replayed: true)
+    instead of creating another.
+    """
+    order, replayed = await service.checkout(current_user.id, idempotency_key=idempotency_key)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return order
+
+@router.get("/{order_id}", response_model=OrderResponse)
+async def get_order(
+    order_id: int,
+    current_user: UserResponse = Depends(get_current_user),
+    service: OrderService = Depends(get_order_service)
+):
+    """Get one of the current user's orders"""
+    order = await service.get_order(order_id, current_user.id)
+    if not order:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Order with id {order_id} not found"
+        )
+    return order
@@ -1,66 +1,248 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Query, Request, Response, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
-from app.schemas.product_media import ProductMediaResponse
-from app.services.product_service import ProductService
-from app.core.dependencies import get_product_service, get_current_user
-from app.models.user import User
+from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, ProductPage, ProductBatch, ProductImportReport
+from app.schemas.product_media import (
+    ProductMediaResponse,
+    ProductMediaPage,
+    MediaUploadRequest,
+    MediaUploadResponse,
+    MediaConfirmRequest,
+)
+from app.schemas.stock import StockReservationCreate, StockReservationResponse
+from app.services.product_service import ProductService, parse_fields, parse_ids, fields_key
+from app.services.stock_service import StockService
+from app.core.dependencies import get_product_service, get_product_read_service, get_stock_service, get_current_user
+from app.schemas.user import UserResponse
+from app.core.cache import product_cache
+from app.database import SessionLocal, read_router
+from app.config import settings
+from app.utils.serialization import EncodedResponse, JSONBytesResponse
+from app.utils.helpers import (
+    make_etag,
+    http_date,
+    has_conditional_headers,
+    is_not_modified,
+    iter_lines,
+    iter_csv_records,
+    iter_ndjson_records,
+)
 
 router = APIRouter()
 
-@router.get("/", response_model=List[ProductResponse])
+MAX_PAGE_SIZE = settings.max_page_size or 100
+
+# Let clients and CDNs store catalog responses but revalidate them on every use
+CACHE_CONTROL = "no-cache"
+
+FIELDS_DESCRIPTION = "Comma-separated ProductResponse fields to return, e.g. id,name,price (id is always included)"
+INCLUDE_DESCRIPTION = "Comma-separated relationships to embed: created_by, updated_by, media"
+
+def _not_modified(etag: str, last_modified=None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+async def _generate_media_variants(media_ids: List[int]) -> None:
+    """Background task; opens its own session since the request's one is closed by then"""
+    async with SessionLocal() as db:
+        await ProductService(db, cache=product_cache).generate_media_variants(media_ids)
+
+def _encoded_response(encoded: EncodedResponse) -> JSONBytesResponse:
+    """Send a pre-encoded body as-is, skipping response_model re-validation, with its validators"""
+    headers = {"ETag": encoded.etag, "Cache-Control": CACHE_CONTROL}
+    if encoded.last_modified is not None:
+        headers["Last-Modified"] = http_date(encoded.last_modified)
+    return JSONBytesResponse(encoded.body, headers=headers)
+
+@router.get("/", response_model=ProductPage)
 async def list_products(
-    skip: int = 0,
-    limit: int = 100,
-    service: ProductService = Depends(get_product_service)
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    skip: int = Query(0, ge=0, description="Legacy offset, ignored when cursor is given"),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    service: ProductService = Depends(get_product_read_service)
 ):
-    """Get all products with pagination"""
-    products = await service.get_products(skip=skip, limit=limit)
-    return products
+    """
+    Get products with cursor pagination, newest first
+
+    Pass the returned next_cursor back as `cursor` to fetch the following page;
+    it is null on the last page. Supports conditional GETs via ETag. With
+    `fields` / `include` only those parts are queried and returned, e.g.
+    `?fields=id,name,price&include=media` for a grid view.
+    """
+    selected = parse_fields(fields, include)
+    if has_conditional_headers(request):
+        # Resolve the validator from (id, version) only, without loading the page
+        versions, has_more = await service.get_products_versions(skip=skip, limit=limit, cursor=cursor, fields=selected)
+        etag = make_etag(versions, has_more, *fields_key(selected))
+        if is_not_modified(request, etag):
+            return _not_modified(etag, max((v[1] for v in versions), default=None))
 
-@router.get("/media", response_model=List[ProductMediaResponse])
+    page = await service.get_products(skip=skip, limit=limit, cursor=cursor, fields=selected)
+    return _encoded_response(page)
+
+@router.get("/media", response_model=ProductMediaPage)
 async def list_all_media(
-    skip: int = 0,
-    limit: int = 100,
-    service: ProductService = Depends(get_product_service)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    skip: int = Query(0, ge=0, description="Legacy offset, ignored when cursor is given"),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    service: ProductService = Depends(get_product_read_service)
 ):
-    """Get all product media records across all products"""
-    media_records = await service.get_all_media(skip=skip, limit=limit)
-    return media_records
+    """Get product media records across all products with cursor pagination"""
+    return await service.get_all_media(skip=skip, limit=limit, cursor=cursor)
+
+@router.get("/export")
+async def export_products(
+    include_media: bool = Query(False, description="Include each product's media records"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Stream the whole catalog as NDJSON, one ProductResponse per line
+
+    Rows are read through a server-side cursor in EXPORT_FETCH_SIZE batches,
+    so memory stays flat regardless of catalog size.
+    """
+    async def ndjson():
+        # Own session: the body is produced after the endpoint has returned
+        async with read_router.session() as db:
+            async for chunk in ProductService(db).export_products(include_media=include_media):
+                yield chunk
+
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="products.ndjson"'}
+    )
+
+@router.get("/search", response_model=List[ProductResponse])
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms, web search syntax"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    service: ProductService = Depends(get_product_read_service)
+):
+    """Full-text search over product name and description, best matches first"""
+    results = await service.search_products(q, skip=skip, limit=limit)
+    if is_not_modified(request, results.etag):
+        return _not_modified(results.etag, results.last_modified)
+    return _encoded_response(results)
+
+@router.get("/batch", response_model=ProductBatch)
+async def get_products_batch(
+    request: Request,
+    ids: str = Query(..., description=f"Comma-separated product IDs, at most {MAX_PAGE_SIZE}"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    service: ProductService = Depends(get_product_read_service)
+):
+    """
+    Get many products by ID in one request, e.g. for basket, wishlist or order pages
+
+    Items come back in the order requested (duplicates once); IDs with no
+    product are listed in `missing`. Accepts the same fields / include as the
+    other product reads.
+    """
+    selected = parse_fields(fields, include)
+    batch = await service.get_products_by_ids(parse_ids(ids, MAX_PAGE_SIZE), fields=selected)
+    if is_not_modified(request, batch.etag):
+        return _not_modified(batch.etag, batch.last_modified)
+    return _encoded_response(batch)
 
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: int,
-    service: ProductService = Depends(get_product_service)
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    service: ProductService = Depends(get_product_read_service)
 ):
-    """Get product by ID"""
-    product = await service.get_product(product_id)
+    """Get product by ID, supporting conditional GETs via ETag / Last-Modified and sparse fieldsets"""
+    selected = parse_fields(fields, include)
+    if has_conditional_headers(request):
+        # SELECT the version only; skip the relationship loads if the client is current
+        updated_at = await service.get_product_version(product_id, fields=selected)
+        if updated_at is not None:
+            etag = make_etag([(product_id, updated_at)], *fields_key(selected))
+            if is_not_modified(request, etag, updated_at):
+                return _not_modified(etag, updated_at)
+
+    product = await service.get_product(product_id, fields=selected)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Product with id {product_id} not found"
         )
-    return product
+    return _encoded_response(product)
 
 @router.get("/{product_id}/media", response_model=List[ProductMediaResponse])
 async def get_product_media(
     product_id: int,
-    service: ProductService = Depends(get_product_service)
+    service: ProductService = Depends(get_product_read_service)
 ):
     """Get all media records for a specific product"""
     media_records = await service.get_product_media(product_id)
     return media_records
 
+@router.post("/{product_id}/media/uploads", response_model=MediaUploadResponse)
+async def create_media_uploads(
+    product_id: int,
+    upload_request: MediaUploadRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    service: ProductService = Depends(get_product_service)
+):
+    """
+    Issue presigned S3 PUTs for uploading product images directly from the client
+
+    For each upload with a `url`, PUT the file's raw bytes (not a form) to that
+    `url` with exactly the returned `headers` (Content-Type and
+    x-amz-checksum-sha256). The signature pins the declared size and sha256, so
+    S3 rejects any other body. Uploads with `exists` true are already stored
+    and need no PUT. Then call the confirm endpoint with every returned key.
+    """
+    uploads = await service.create_media_uploads(product_id, upload_request.files)
+    if uploads is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product with id {product_id} not found"
+        )
+    return uploads
+
+@router.post("/{product_id}/media/confirm", response_model=List[ProductMediaResponse], status_code=status.HTTP_201_CREATED)
+async def confirm_media_uploads(
+    product_id: int,
+    confirm_request: MediaConfirmRequest,
+    background_tasks: BackgroundTasks,
+    current_user: UserResponse = Depends(get_current_user),
+    service: ProductService = Depends(get_product_service)
+):
+    """Register directly uploaded images as media of the product"""
+    media_records = await service.confirm_media_uploads(product_id, confirm_request.keys)
+    if media_records is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product with id {product_id} not found"
+        )
+    if media_records:
+        background_tasks.add_task(_generate_media_variants, [media.id for media in media_records])
+    return media_records
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_product(
+    background_tasks: BackgroundTasks,
  # Use Form() for each field instead of ProductCreate object
     name: str = Form(..., description="Product name"),
     description: str = Form(..., description="Product description"),
     price: float = Form(..., description="Product price"),
     is_active: bool = Form(True, description="Whether the product is active"),
+    stock: Optional[int] = Form(None, ge=0, description="Units in stock; omit to not track stock"),
     # File uploads
     images: List[UploadFile] = File(default=[], description="Product images"),
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     service: ProductService = Depends(get_product_service)
 ):
     # Create ProductCreate object from Form fields
@@ -68,17 +250,85 @@ async def create_product(
         name=name,
         description=description,
         price=price,
-        is_active=is_active
+        is_active=is_active,
+        stock=stock
     )
     """Create a new product"""
-    product = await service.create_product_with_media(product_data, created_by_id=current_user.id, images=images)
+    product = await service.create_product_with_media(
+        product_data, created_by_id=current_user.id, images=images, created_by=current_user
+    )
+    if product.media:
+        background_tasks.add_task(_generate_media_variants, [media.id for media in product.media])
     return product
 
+@router.post("/{product_id}/reservations", response_model=StockReservationResponse, status_code=status.HTTP_201_CREATED)
+async def reserve_stock(
+    product_id: int,
+    reservation: StockReservationCreate,
+    current_user: UserResponse = Depends(get_current_user),
+    service: StockService = Depends(get_stock_service)
+):
+    """
+    Hold units of a product for the current user until checkout or expiry
+
+    Reserved units count towards the user's next checkout of the product and
+    go back to stock when the reservation expires. A user holds at most
+    BASKET_MAX_QUANTITY units of a product at once. 409 when stock is short or
+    that limit would be exceeded.
+    """
+    reserved = await service.reserve(product_id, current_user.id, reservation.quantity)
+    if reserved is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product with id {product_id} not found"
+        )
+    return reserved
+
+@router.delete("/{product_id}/reservations/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def release_stock(
+    product_id: int,
+    reservation_id: int,
+    current_user: UserResponse = Depends(get_current_user),
+    service: StockService = Depends(get_stock_service)
+):
+    """Give a reservation's units back to stock before it expires"""
+    released = await service.release(product_id, reservation_id, current_user.id)
+    if not released:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Reservation with id {reservation_id} not found"
+        )
+    return None
+
+@router.post("/import", response_model=ProductImportReport)
+async def import_products(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults from Content-Type"),
+    current_user: UserResponse = Depends(get_current_user),
+    service: ProductService = Depends(get_product_service)
+):
+    """
+    Bulk-create products from a streamed CSV (with header row) or NDJSON body
+
+    Columns / keys follow ProductCreate: name, description, price, is_active.
+    The body is parsed as it arrives and written in chunks, so memory stays
+    bounded regardless of feed size: a line or CSV record longer than
+    IMPORT_MAX_RECORD_LENGTH characters is reported as a row error and
+    skipped. Returns a per-row error report.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+    max_length = settings.import_max_record_length or 65536
+    lines = iter_lines(request.stream(), max_length=max_length)
+    records = iter_csv_records(lines, max_length=max_length) if format == "csv" else iter_ndjson_records(lines)
+    return await service.import_products(records, created_by_id=current_user.id)
+
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: int,
     product_data: ProductUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     service: ProductService = Depends(get_product_service)
 ):
     """Update a product"""
@@ -93,7 +343,7 @@ async def update_product(
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
     product_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: UserResponse = Depends(get_current_user),
     service: ProductService = Depends(get_product_service)
 ):
     """Delete a product"""
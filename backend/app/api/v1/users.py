@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.services.user_service import UserService
-from app.core.dependencies import get_user_service
+from app.services.session_service import SessionService
+from app.core.dependencies import get_user_read_service, get_user_service, get_session_service
 from typing import List
-from app.schemas.user import UserResponse
-from app.core.dependencies import get_current_user
-from app.models.user import User
+from app.schemas.user import UserResponse, UserActiveUpdate
+from app.core.dependencies import get_current_user, get_current_superuser
 
 router = APIRouter()
 
@@ -12,7 +12,7 @@ router = APIRouter()
 async def list_users(
     skip: int = 0,
     limit: int = 100,
-    service: UserService = Depends(get_user_service)
+    service: UserService = Depends(get_user_read_service)
 ):
     users = await service.get_all(skip=skip, limit=limit)
     return users
@@ -20,7 +20,32 @@ async def list_users(
 
 @router.get("/me", response_model=UserResponse)
 async def get_me(
-    current_user: User = Depends(get_current_user)
+    current_user: UserResponse = Depends(get_current_user)
 ):
     """Get current authenticated user"""
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+@router.put("/{user_id}/active", response_model=UserResponse)
+async def set_user_active(
+    user_id: int,
+    update: UserActiveUpdate,
+    current_user: UserResponse = Depends(get_current_superuser),
+    service: UserService = Depends(get_user_service),
+    session_service: SessionService = Depends(get_session_service)
+):
+    """
+    Activate or deactivate a user (superusers only)
+
+    Takes effect on the user's next request. Deactivating also ends all of the
+    user's sessions, so their refresh tokens stop working too.
+    """
+    user = await service.set_user_active(user_id, update.is_active)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with id {user_id} not found"
+        )
+    if not update.is_active:
+        await session_service.end_all_sessions(user_id)
+    return user
@@ -10,13 +10,56 @@ class Settings(BaseSettings):
     algorithm: Optional[str] = Field(default=None, env="ALGORITHM")
     access_token_expire_minutes: Optional[int] = Field(default=None, env="ACCESS_TOKEN_EXPIRE_MINUTES")
     refresh_token_expire_days: Optional[int] = Field(default=30, env="REFRESH_TOKEN_EXPIRE_DAYS")
+    session_sweep_interval_seconds: Optional[int] = Field(default=3600, env="SESSION_SWEEP_INTERVAL_SECONDS")  # 0 disables the sweeper
+    session_sweep_batch_size: Optional[int] = Field(default=1000, env="SESSION_SWEEP_BATCH_SIZE")
     debug: Optional[bool] = Field(default=False, env="DEBUG")
+
+    # Database connection pool fields
+    database_replica_urls: Optional[str] = Field(default=None, env="DATABASE_REPLICA_URLS")  # Comma-separated read replica URLs
+    db_replica_retry_seconds: Optional[int] = Field(default=30, env="DB_REPLICA_RETRY_SECONDS")  # How long a failed replica is skipped
+    db_pool_size: Optional[int] = Field(default=5, env="DB_POOL_SIZE")
+    db_max_overflow: Optional[int] = Field(default=10, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: Optional[int] = Field(default=30, env="DB_POOL_TIMEOUT")  # Seconds to wait for a connection
+    db_pool_recycle: Optional[int] = Field(default=1800, env="DB_POOL_RECYCLE")  # Seconds; -1 never recycles
+    db_pool_pre_ping: Optional[bool] = Field(default=True, env="DB_POOL_PRE_PING")
+    db_statement_cache_size: Optional[int] = Field(default=100, env="DB_STATEMENT_CACHE_SIZE")  # asyncpg prepared statements per connection
+    db_pgbouncer_mode: Optional[bool] = Field(default=False, env="DB_PGBOUNCER_MODE")  # PgBouncer transaction pooling: no statement caching
+
+    max_page_size: Optional[int] = Field(default=100, env="MAX_PAGE_SIZE")
+    import_chunk_size: Optional[int] = Field(default=1000, env="IMPORT_CHUNK_SIZE")
+    import_max_reported_errors: Optional[int] = Field(default=1000, env="IMPORT_MAX_REPORTED_ERRORS")
+    import_max_record_length: Optional[int] = Field(default=65536, env="IMPORT_MAX_RECORD_LENGTH")  # Characters per line / CSV record
+    export_fetch_size: Optional[int] = Field(default=500, env="EXPORT_FETCH_SIZE")
     # cors_origins: Optional[list[str]] = Field(default=None, env="CORS_ORIGINS")
     
     # Google OAuth fields
     google_client_id: Optional[str] = Field(default=None, env="GOOGLE_CLIENT_ID")
     google_client_secret: Optional[str] = Field(default=None, env="GOOGLE_CLIENT_SECRET")
     google_redirect_uri: Optional[str] = Field(default=None, env="GOOGLE_REDIRECT_URI")
+    google_verify_id_token: Optional[bool] = Field(default=False, env="GOOGLE_VERIFY_ID_TOKEN")  # Skip the userinfo call
+    google_jwks_cache_seconds: Optional[int] = Field(default=3600, env="GOOGLE_JWKS_CACHE_SECONDS")  # Used when Google sends no max-age
+    google_http_timeout_seconds: Optional[int] = Field(default=10, env="GOOGLE_HTTP_TIMEOUT_SECONDS")
+    oauth_state_ttl_seconds: Optional[int] = Field(default=600, env="OAUTH_STATE_TTL_SECONDS")
+    oauth_state_max_entries: Optional[int] = Field(default=100000, env="OAUTH_STATE_MAX_ENTRIES")
+
+    # Cache fields
+    redis_url: Optional[str] = Field(default=None, env="REDIS_URL")  # Optional: shared cache across workers
+    product_cache_ttl_seconds: Optional[int] = Field(default=60, env="PRODUCT_CACHE_TTL_SECONDS")
+    product_cache_max_entries: Optional[int] = Field(default=10000, env="PRODUCT_CACHE_MAX_ENTRIES")
+    user_cache_ttl_seconds: Optional[int] = Field(default=30, env="USER_CACHE_TTL_SECONDS")
+    user_cache_max_entries: Optional[int] = Field(default=10000, env="USER_CACHE_MAX_ENTRIES")
+
+    # Basket fields
+    basket_store_ttl_seconds: Optional[int] = Field(default=3600, env="BASKET_STORE_TTL_SECONDS")  # Idle baskets are reloaded from Postgres after this
+    basket_flush_interval_seconds: Optional[int] = Field(default=2, env="BASKET_FLUSH_INTERVAL_SECONDS")  # 0 writes every edit through immediately
+    basket_flush_batch_size: Optional[int] = Field(default=500, env="BASKET_FLUSH_BATCH_SIZE")  # Baskets per flush transaction
+    basket_max_items: Optional[int] = Field(default=100, env="BASKET_MAX_ITEMS")
+    basket_max_quantity: Optional[int] = Field(default=99, env="BASKET_MAX_QUANTITY")
+
+    # Stock fields
+    stock_reservation_ttl_seconds: Optional[int] = Field(default=600, env="STOCK_RESERVATION_TTL_SECONDS")  # How long reserved units are held
+    stock_release_interval_seconds: Optional[int] = Field(default=30, env="STOCK_RELEASE_INTERVAL_SECONDS")  # 0 disables the releaser
+    stock_release_batch_size: Optional[int] = Field(default=1000, env="STOCK_RELEASE_BATCH_SIZE")
 
     # AWS S3 fields
     aws_access_key_id: Optional[str] = Field(default=None, env="AWS_ACCESS_KEY_ID")
@@ -24,5 +67,9 @@ class Settings(BaseSettings):
     aws_region: Optional[str] = Field(default=None, env="AWS_REGION")
     s3_bucket_name: Optional[str] = Field(default=None, env="S3_BUCKET_NAME")
     s3_base_url: Optional[str] = Field(default=None, env="S3_BASE_URL")  # Optional: for CDN
+    s3_upload_concurrency: Optional[int] = Field(default=4, env="S3_UPLOAD_CONCURRENCY")
+    s3_presigned_expire_seconds: Optional[int] = Field(default=900, env="S3_PRESIGNED_EXPIRE_SECONDS")
+    s3_max_upload_bytes: Optional[int] = Field(default=10 * 1024 * 1024, env="S3_MAX_UPLOAD_BYTES")
+    image_process_workers: Optional[int] = Field(default=2, env="IMAGE_PROCESS_WORKERS")
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,264 @@
+"""
+Basket storage for write-behind
+
+Baskets are read and edited in a fast store and written to Postgres in
+batches by the basket flusher. The store talks to a Redis-compatible backend
+(hashes plus one set); InMemoryBasketBackend is a local fake of that subset
+for a single worker, and with REDIS_URL set baskets go to Redis so every
+worker sees the same ones.
+
+Each basket is a hash of product_id -> quantity plus a marker field, so a
+loaded empty basket can be told apart from one that is not in the store yet.
+Users whose baskets changed since the last flush are kept in a dirty set.
+A dirty basket has no TTL, so it cannot expire before it is written; the
+flusher starts its idle TTL once it has been written and not edited since.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Protocol
+from app.config import settings
+
+LOADED_FIELD = "_loaded"
+
+
+def _now() -> float:
+    return time.monotonic()
+
+
+class BasketBackend(Protocol):
+    """Redis-compatible subset used by the basket store"""
+
+    async def hgetall(self, name: str) -> Dict[str, str]: ...
+
+    async def hset(self, name: str, key: Optional[str] = None, value: Optional[str] = None, mapping: Optional[dict] = None) -> int: ...
+
+    async def hincrby(self, name: str, key: str, amount: int = 1) -> int: ...
+
+    async def hdel(self, name: str, *keys: str) -> int: ...
+
+    async def delete(self, *names: str) -> int: ...
+
+    async def expire(self, name: str, time: int) -> bool: ...
+
+    async def persist(self, name: str) -> bool: ...
+
+    async def sadd(self, name: str, *values: str) -> int: ...
+
+    async def sismember(self, name: str, value: str) -> bool: ...
+
+    async def spop(self, name: str, count: Optional[int] = None) -> List[str]: ...
+
+
+class InMemoryBasketBackend:
+    """
+    In-process fake of the Redis hash / set commands the basket store uses
+
+    Values are stored as strings like Redis with decode_responses. The store
+    gives every hash the same TTL, so expiry order is last-write order: expired
+    hashes are at the front of _expiry and each sweep stops at the first live one.
+    """
+
+    def __init__(self):
+        self._hashes: Dict[str, Dict[str, str]] = {}
+        self._sets: Dict[str, Dict[str, None]] = {}
+        # hash name -> expires_at, soonest first
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+
+    def _sweep(self) -> None:
+        now = _now()
+        while self._expiry:
+            name, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                break
+            del self._expiry[name]
+            self._hashes.pop(name, None)
+
+    async def hgetall(self, name: str) -> Dict[str, str]:
+        self._sweep()
+        return dict(self._hashes.get(name, {}))
+
+    async def hset(self, name: str, key: Optional[str] = None, value: Optional[str] = None, mapping: Optional[dict] = None) -> int:
+        self._sweep()
+        fields = dict(mapping or {})
+        if key is not None:
+            fields[key] = value
+        current = self._hashes.setdefault(name, {})
+        added = sum(1 for field in fields if field not in current)
+        current.update({field: str(field_value) for field, field_value in fields.items()})
+        return added
+
+    async def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        self._sweep()
+        current = self._hashes.setdefault(name, {})
+        value = int(current.get(key, 0)) + amount
+        current[key] = str(value)
+        return value
+
+    async def hdel(self, name: str, *keys: str) -> int:
+        self._sweep()
+        current = self._hashes.get(name, {})
+        deleted = sum(1 for key in keys if current.pop(key, None) is not None)
+        if name in self._hashes and not current:
+            # Like Redis, a hash with no fields no longer exists
+            del self._hashes[name]
+            self._expiry.pop(name, None)
+        return deleted
+
+    async def delete(self, *names: str) -> int:
+        deleted = 0
+        for name in names:
+            self._expiry.pop(name, None)
+            if self._hashes.pop(name, None) is not None or self._sets.pop(name, None) is not None:
+                deleted += 1
+        return deleted
+
+    async def expire(self, name: str, time: int) -> bool:
+        if name not in self._hashes:
+            return False
+        self._expiry[name] = _now() + time
+        self._expiry.move_to_end(name)
+        return True
+
+    async def persist(self, name: str) -> bool:
+        self._sweep()
+        return self._expiry.pop(name, None) is not None
+
+    async def sadd(self, name: str, *values: str) -> int:
+        members = self._sets.setdefault(name, {})
+        added = sum(1 for value in values if str(value) not in members)
+        members.update((str(value), None) for value in values)
+        return added
+
+    async def sismember(self, name: str, value: str) -> bool:
+        return str(value) in self._sets.get(name, {})
+
+    async def spop(self, name: str, count: Optional[int] = None) -> List[str]:
+        members = self._sets.get(name, {})
+        popped = []
+        while members and len(popped) < (count or 1):
+            member = next(iter(members))
+            del members[member]
+            popped.append(member)
+        if not members:
+            self._sets.pop(name, None)
+        return popped
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+
+class BasketStore:
+    """Per-user baskets (product_id -> quantity) and the set of users awaiting a flush"""
+
+    def __init__(self, backend: BasketBackend, ttl_seconds: int, namespace: str = "basket"):
+        self.backend = backend
+        # Idle baskets drop out of the store after this long and are reloaded from Postgres
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self.dirty_key = f"{namespace}:dirty"
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.namespace}:{user_id}"
+
+    async def get(self, user_id: int) -> Optional[Dict[int, int]]:
+        """The user's basket, or None if it is not in the store (load it with fill)"""
+        fields = await self.backend.hgetall(self._key(user_id))
+        if LOADED_FIELD not in fields:
+            return None
+        return {int(field): int(value) for field, value in fields.items() if field != LOADED_FIELD}
+
+    async def fill(self, user_id: int, items: Dict[int, int]) -> None:
+        """
+        Put a basket read from Postgres into the store, unless another request already has
+
+        Items already in the hash (edits that raced the load) are kept over the loaded ones.
+        """
+        key = self._key(user_id)
+        current = await self.backend.hgetall(key)
+        if LOADED_FIELD in current:
+            return
+        mapping = {str(product_id): str(quantity) for product_id, quantity in items.items() if str(product_id) not in current}
+        mapping[LOADED_FIELD] = "1"
+        await self.backend.hset(key, mapping=mapping)
+        await self._expire_unless_dirty(user_id)
+
+    async def set_quantity(self, user_id: int, product_id: int, quantity: int) -> None:
+        """Set one item's quantity; 0 removes it"""
+        key = self._key(user_id)
+        if quantity > 0:
+            await self.backend.hset(key, str(product_id), str(quantity))
+        else:
+            await self.backend.hdel(key, str(product_id))
+        await self._touched(user_id)
+
+    async def increment(self, user_id: int, product_id: int, amount: int) -> int:
+        """Add to one item's quantity, returning the new quantity"""
+        quantity = await self.backend.hincrby(self._key(user_id), str(product_id), amount)
+        await self._touched(user_id)
+        return quantity
+
+    async def clear(self, user_id: int) -> None:
+        """Empty the basket; it stays loaded so the flush removes its rows"""
+        key = self._key(user_id)
+        # Marker first: the hash never disappears, so no concurrent read reloads old rows
+        await self.backend.hset(key, LOADED_FIELD, "1")
+        product_fields = [field for field in await self.backend.hgetall(key) if field != LOADED_FIELD]
+        if product_fields:
+            await self.backend.hdel(key, *product_fields)
+        await self._touched(user_id)
+
+    async def remove_items(self, user_id: int, items: Dict[int, int]) -> None:
+        """
+        Subtract quantities from the basket, e.g. the ones just ordered
+
+        Unlike clear, anything added since the caller read the basket stays:
+        each quantity is decremented in place and only items that reach zero are
+        removed. The marker is set first for the same reason as in clear.
+        """
+        key = self._key(user_id)
+        await self.backend.hset(key, LOADED_FIELD, "1")
+        emptied = []
+        for product_id, quantity in items.items():
+            if await self.backend.hincrby(key, str(product_id), -quantity) <= 0:
+                emptied.append(str(product_id))
+        if emptied:
+            await self.backend.hdel(key, *emptied)
+        await self._touched(user_id)
+
+    async def _touched(self, user_id: int) -> None:
+        # No TTL while dirty; flushed() starts it again once the basket is written
+        await self.backend.persist(self._key(user_id))
+        await self.backend.sadd(self.dirty_key, str(user_id))
+
+    async def pop_dirty(self, count: int) -> List[int]:
+        """Take up to `count` users whose baskets changed since they were last flushed"""
+        return [int(user_id) for user_id in await self.backend.spop(self.dirty_key, count) or []]
+
+    async def flushed(self, user_ids: List[int]) -> None:
+        """Start the idle TTL of written baskets, unless they were edited again meanwhile"""
+        for user_id in user_ids:
+            await self._expire_unless_dirty(user_id)
+
+    async def _expire_unless_dirty(self, user_id: int) -> None:
+        if not await self.backend.sismember(self.dirty_key, str(user_id)):
+            await self.backend.expire(self._key(user_id), self.ttl_seconds)
+
+    async def mark_dirty(self, user_ids: List[int]) -> None:
+        """Queue users for flushing again, e.g. after a failed flush"""
+        if user_ids:
+            await self.backend.sadd(self.dirty_key, *(str(user_id) for user_id in user_ids))
+
+
+def create_basket_backend(redis_url: Optional[str]) -> BasketBackend:
+    """Redis client if a URL is configured, otherwise the in-process fake"""
+    if redis_url:
+        import redis.asyncio as redis
+        return redis.from_url(redis_url, decode_responses=True)
+    return InMemoryBasketBackend()
+
+
+basket_store = BasketStore(
+    create_basket_backend(settings.redis_url),
+    ttl_seconds=settings.basket_store_ttl_seconds or 3600,
+)
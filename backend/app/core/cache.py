@@ -0,0 +1,196 @@
+"""
+Caching primitives
+
+Backends expose the small subset of the Redis API we rely on
+(get / set with ex / delete / incr), so a redis.asyncio client, a fake of one,
+or the in-process InMemoryCache can be plugged in interchangeably.
+"""
+
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Protocol, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """Redis-compatible subset used by the cache layer"""
+
+    async def get(self, key: str) -> Optional[Any]: ...
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> Any: ...
+
+    async def delete(self, *keys: str) -> int: ...
+
+    async def incr(self, key: str) -> int: ...
+
+
+class InMemoryCache:
+    """
+    In-process cache with per-entry TTL and LRU eviction
+
+    Counters created with incr() are kept apart from regular entries so they are
+    never evicted; losing a generation counter could resurrect stale entries.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        # key -> (expires_at or None, value), least recently used first
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        if key in self._counters:
+            return self._counters[key]
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        expires_at = time.monotonic() + ex if ex else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                deleted += 1
+            if self._counters.pop(key, None) is not None:
+                deleted += 1
+        return deleted
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ReadThroughCache:
+    """
+    Namespaced string cache on top of a CacheBackend, with hit/miss counters
+
+    Backend failures are logged and treated as misses so an unavailable cache
+    never fails a request.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int, namespace: str):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await self.backend.get(self._key(key))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache get failed for {key}: {str(e)}")
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str) -> None:
+        try:
+            await self.backend.set(self._key(key), value, ex=self.ttl_seconds)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache set failed for {key}: {str(e)}")
+
+    async def delete(self, *keys: str) -> None:
+        try:
+            await self.backend.delete(*[self._key(key) for key in keys])
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache delete failed for {keys}: {str(e)}")
+
+    async def generation(self, name: str) -> Optional[int]:
+        """
+        Current value of a generation counter used to version groups of keys
+
+        Returns None if the backend is unavailable; callers should then bypass the cache.
+        """
+        try:
+            value = await self.backend.get(self._key(f"gen:{name}"))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache generation read failed for {name}: {str(e)}")
+            return None
+        return int(value) if value is not None else 0
+
+    async def bump_generation(self, name: str) -> None:
+        """Invalidate every key built from the generation counter `name`"""
+        try:
+            await self.backend.incr(self._key(f"gen:{name}"))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache generation bump failed for {name}: {str(e)}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "namespace": self.namespace,
+            "backend": type(self.backend).__name__,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if isinstance(self.backend, InMemoryCache):
+            stats["entries"] = len(self.backend)
+            stats["max_entries"] = self.backend.max_entries
+        return stats
+
+
+def create_cache_backend(redis_url: Optional[str], max_entries: int) -> CacheBackend:
+    """Redis client if a URL is configured, otherwise an in-process cache"""
+    if redis_url:
+        import redis.asyncio as redis
+        return redis.from_url(redis_url, decode_responses=True)
+    return InMemoryCache(max_entries=max_entries)
+
+
+# Shared product cache; a TTL of 0 disables it
+product_cache: Optional[ReadThroughCache] = (
+    ReadThroughCache(
+        create_cache_backend(settings.redis_url, settings.product_cache_max_entries or 10000),
+        ttl_seconds=settings.product_cache_ttl_seconds,
+        namespace="products",
+    )
+    if settings.product_cache_ttl_seconds
+    else None
+)
+
+# Authenticated principals, keyed by user id; kept short so deactivation
+# propagates quickly to workers that did not see the invalidation
+user_cache: Optional[ReadThroughCache] = (
+    ReadThroughCache(
+        create_cache_backend(settings.redis_url, settings.user_cache_max_entries or 10000),
+        ttl_seconds=settings.user_cache_ttl_seconds,
+        namespace="users",
+    )
+    if settings.user_cache_ttl_seconds
+    else None
+)
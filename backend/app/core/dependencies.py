@@ -2,12 +2,19 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, ExpiredSignatureError
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.services.product_service import ProductService
 from app.services.user_service import UserService
+from app.services.session_service import SessionService
+from app.services.basket_service import BasketService
+from app.services.order_service import OrderService
+from app.services.stock_service import StockService
 from app.core.security import verify_access_token
 from app.repositories.user_repository import UserRepository
+from app.core.cache import product_cache, user_cache
+from app.schemas.user import UserResponse
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +25,13 @@ async def get_product_service(
     db: AsyncSession = Depends(get_db)
 ) -> ProductService:
     """Dependency to get ProductService instance"""
-    return ProductService(db)
+    return ProductService(db, cache=product_cache)
+
+async def get_product_read_service(
+    db: AsyncSession = Depends(get_read_db)
+) -> ProductService:
+    """ProductService on a read-only session (replica when available); only call read methods"""
+    return ProductService(db, cache=product_cache)
 
 async def get_user_service(
     db: AsyncSession = Depends(get_db)
@@ -26,12 +39,46 @@ async def get_user_service(
     """Dependency to get UserService instance"""
     return UserService(db)
 
+async def get_user_read_service(
+    db: AsyncSession = Depends(get_read_db)
+) -> UserService:
+    """UserService on a read-only session (replica when available); only call read methods"""
+    return UserService(db)
+
+async def get_session_service(
+    db: AsyncSession = Depends(get_db)
+) -> SessionService:
+    """Dependency to get SessionService instance"""
+    return SessionService(db)
+
+async def get_basket_service(
+    db: AsyncSession = Depends(get_db)
+) -> BasketService:
+    """BasketService on the primary; most calls never check out a connection"""
+    return BasketService(db)
+
+async def get_order_service(
+    db: AsyncSession = Depends(get_db)
+) -> OrderService:
+    """Dependency to get OrderService instance"""
+    return OrderService(db)
+
+async def get_stock_service(
+    db: AsyncSession = Depends(get_db)
+) -> StockService:
+    """Dependency to get StockService instance"""
+    return StockService(db)
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-):
+) -> UserResponse:
     """
     Dependency to get the current authenticated user from JWT token
+
+    The user is served from a short-TTL principal cache when possible, so most
+    authenticated requests never touch the database for identity. The session
+    only checks out a pool connection on a cache miss.
     
     Usage:
         @router.get("/protected")
@@ -77,8 +124,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    repository = UserRepository(db)
-    user = await repository.get_user_by_id(user_id)
+    user = await _get_principal(user_id, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -92,4 +138,33 @@ async def get_current_user(
             detail="Inactive user",
         )
     
-    return user
\ No newline at end of file
+    return user
+
+async def get_current_superuser(
+    user: UserResponse = Depends(get_current_user)
+) -> UserResponse:
+    """Dependency for admin-only routes: the current user, who must be a superuser"""
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Superuser required",
+        )
+    return user
+
+async def _get_principal(user_id: int, db: AsyncSession) -> Optional[UserResponse]:
+    """Load a user snapshot through the principal cache"""
+    cache_key = str(user_id)
+    if user_cache:
+        cached = await user_cache.get(cache_key)
+        if cached is not None:
+            return UserResponse.model_validate_json(cached)
+
+    repository = UserRepository(db)
+    user = await repository.get_user_by_id(user_id)
+    if not user:
+        return None
+    principal = UserResponse.model_validate(user)
+
+    if user_cache:
+        await user_cache.set(cache_key, principal.model_dump_json())
+    return principal
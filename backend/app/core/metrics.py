@@ -0,0 +1,212 @@
+"""
+In-process metric primitives and Prometheus text exposition
+
+Kept dependency-free so any module can record into them cheaply. Labelled
+metrics register themselves on creation; /metrics renders every registered
+metric plus any collectors (callables producing samples at scrape time).
+"""
+
+import bisect
+import threading
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (metric name, label pairs, value)
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style (upper bounds, +Inf implied)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, value_sum = self.count, self.sum
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets, counts):
+            running += count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = total
+        return {"buckets": cumulative, "count": total, "sum": round(value_sum, 6)}
+
+    def samples(self, name: str, labels: Tuple[Tuple[str, str], ...] = ()) -> Iterable[Sample]:
+        snapshot = self.snapshot()
+        for bound, count in snapshot["buckets"].items():
+            yield f"{name}_bucket", labels + (("le", bound),), count
+        yield f"{name}_count", labels, snapshot["count"]
+        yield f"{name}_sum", labels, snapshot["sum"]
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _pairs(self, values: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(zip(self.labelnames, values))
+
+
+class Counter(_Metric):
+    """Monotonic value per label combination"""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] += amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield self.name, self._pairs(labels), value
+
+
+class Gauge(Counter):
+    """Value per label combination that can go up and down"""
+    type = "gauge"
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class HistogramVec(_Metric):
+    """One Histogram per label combination"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[Tuple[str, ...], Histogram] = {}
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        histogram = self._histograms.get(labels)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(labels, Histogram(self.buckets))
+        histogram.observe(value)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            histograms = list(self._histograms.items())
+        for labels, histogram in histograms:
+            yield from histogram.samples(self.name, self._pairs(labels))
+
+
+@dataclass(frozen=True)
+class CollectedMetric:
+    """A metric produced at scrape time by a collector"""
+    name: str
+    documentation: str
+    type: str
+    samples: List[Sample]
+
+
+REGISTRY: List[_Metric] = []
+_collectors: List[Callable[[], Iterable[CollectedMetric]]] = []
+
+
+def register_collector(collector: Callable[[], Iterable[CollectedMetric]]) -> None:
+    """Add a callable whose metrics are read fresh on every scrape (e.g. pool occupancy)"""
+    _collectors.append(collector)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus() -> str:
+    """Every registered metric and collector in the Prometheus text exposition format"""
+    metrics = list(REGISTRY)
+    for collector in _collectors:
+        metrics.extend(collector())
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        samples = metric.samples() if callable(metric.samples) else metric.samples
+        for name, labels, value in samples:
+            if labels:
+                label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels)
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# HTTP metrics, labelled by route template so path parameters do not explode cardinality
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests handled", ("method", "route", "status")
+)
+http_request_duration_seconds = HistogramVec(
+    "http_request_duration_seconds", "HTTP request latency until the response body is sent", ("method", "route")
+)
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled", ("method", "route")
+)
+
+# Database work attributed to the route that caused it
+db_queries_total = Counter(
+    "db_queries_total", "SQL statements executed", ("route",)
+)
+db_query_duration_seconds_total = Counter(
+    "db_query_duration_seconds_total", "Time spent executing SQL statements", ("route",)
+)
+db_queries_per_request = HistogramVec(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+
+
+class QueryStats:
+    """SQL statements and time spent in them, for one request"""
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Set by the metrics middleware for the duration of a request
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def record_query(seconds: float) -> None:
+    """Attribute one executed statement to the current request, if any"""
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += seconds
@@ -0,0 +1,75 @@
+"""
+ASGI middleware
+
+MetricsMiddleware is plain ASGI rather than BaseHTTPMiddleware so streamed
+responses (e.g. the NDJSON export) pass through untouched and latency covers
+the whole body.
+"""
+
+import time
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.metrics import (
+    QueryStats,
+    current_query_stats,
+    http_requests_total,
+    http_request_duration_seconds,
+    http_requests_in_progress,
+    db_queries_total,
+    db_query_duration_seconds_total,
+    db_queries_per_request,
+)
+
+
+def _route_template(app: ASGIApp, scope: Scope) -> str:
+    """Path template of the route that will handle the request, e.g. /products/{product_id}"""
+    router = getattr(app, "router", None)
+    for route in getattr(router, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    # Unmatched paths share one label so scanners cannot blow up cardinality
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Per-route request counts, latency, in-flight requests and SQL statements per request"""
+
+    def __init__(self, app: ASGIApp, router_app: ASGIApp):
+        self.app = app
+        # The FastAPI app whose routes are matched; middleware wraps it, so `app` may not be it
+        self.router_app = router_app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(self.router_app, scope)
+        status_code = 500
+        finished_at = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, finished_at
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished_at = time.perf_counter()
+            await send(message)
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        http_requests_in_progress.inc((method, route))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Background tasks run after the body is sent; their queries still count for this route
+            current_query_stats.reset(token)
+            http_requests_in_progress.dec((method, route))
+            http_requests_total.inc((method, route, str(status_code)))
+            http_request_duration_seconds.observe((finished_at or time.perf_counter()) - started, (method, route))
+            db_queries_total.inc((route,), stats.count)
+            db_query_duration_seconds_total.inc((route,), stats.seconds)
+            db_queries_per_request.observe(stats.count, (route,))
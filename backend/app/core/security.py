@@ -1,19 +1,17 @@
+import hashlib
 import secrets
 from jose import jwt
 from app.config import settings
-from app.models.user import User
 from datetime import datetime, timedelta
-from typing import Optional
-from sqlalchemy.ext.asyncio import AsyncSession
 
-def create_access_token(user: User) -> str:
+def create_access_token(user_id: int) -> str:
     expire_minutes = settings.access_token_expire_minutes or 30
     expire = datetime.utcnow() + timedelta(minutes=expire_minutes)
     # Convert datetime to Unix timestamp (seconds since epoch)
     expire_timestamp = int(expire.timestamp())
     
     payload = {
-        "sub": str(user.id),
+        "sub": str(user_id),
         "exp": expire_timestamp
     }
     
@@ -48,35 +46,14 @@ def verify_access_token(token: str) -> dict:
 def create_refresh_token() -> str:
     """
     Generate a secure random refresh token string.
-    This token will be stored in the database and associated with a user.
+    Only its hash is stored in the database, on the user's session.
     """
     return secrets.token_urlsafe(32)
 
 
-async def verify_refresh_token(token: str, db: AsyncSession) -> Optional[User]:
+def hash_refresh_token(token: str) -> str:
     """
-    Verify a refresh token by looking it up in the database.
-    
-    Args:
-        token: The refresh token string to verify
-        db: Database session
-        
-    Returns:
-        User object if token is valid, None otherwise
+    SHA-256 of a refresh token, the only form in which it is stored.
+    Tokens are 256-bit random strings, so an unsalted fast hash is sufficient.
     """
-    from app.repositories.user_repository import UserRepository
-    
-    if not token:
-        return None
-    
-    repository = UserRepository(db)
-    user = await repository.get_user_by_refresh_token(token)
-    
-    if not user:
-        return None
-    
-    # Check if token is expired
-    if user.refresh_token_expires_at and user.refresh_token_expires_at < datetime.utcnow():
-        return None
-    
-    return user
+    return hashlib.sha256(token.encode()).hexdigest()
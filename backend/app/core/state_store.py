@@ -0,0 +1,87 @@
+"""
+OAuth state storage
+
+States are single-use CSRF tokens that live for a few minutes. The in-process
+store suits a single worker; with REDIS_URL set, states go to Redis so the
+callback can land on any worker.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Optional, Protocol
+from app.config import settings
+from app.core.cache import CacheBackend, create_cache_backend
+
+
+class StateStore(Protocol):
+    async def add(self, state: str) -> None: ...
+
+    async def consume(self, state: str) -> bool: ...
+
+
+class InMemoryStateStore:
+    """
+    Bounded in-process state store with O(1) expiry
+
+    Every state gets the same TTL, so insertion order is expiry order: expired
+    states are always at the front and each sweep stops at the first live one.
+    When full, the oldest state is evicted to make room.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # state -> expires_at, oldest first
+        self._states: "OrderedDict[str, float]" = OrderedDict()
+
+    def _sweep(self, now: float) -> None:
+        while self._states:
+            state, expires_at = next(iter(self._states.items()))
+            if expires_at > now:
+                break
+            del self._states[state]
+
+    async def add(self, state: str) -> None:
+        now = time.monotonic()
+        self._sweep(now)
+        while len(self._states) >= self.max_entries:
+            self._states.popitem(last=False)
+        self._states[state] = now + self.ttl_seconds
+
+    async def consume(self, state: str) -> bool:
+        """Remove a state, returning whether it existed and had not expired"""
+        self._sweep(time.monotonic())
+        return self._states.pop(state, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+class SharedStateStore:
+    """State store on a Redis-compatible backend; expiry is left to the backend's TTL"""
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: int, namespace: str = "oauth_state"):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+
+    async def add(self, state: str) -> None:
+        await self.backend.set(f"{self.namespace}:{state}", "1", ex=self.ttl_seconds)
+
+    async def consume(self, state: str) -> bool:
+        # DEL is atomic, so a state can only be consumed by one callback
+        return await self.backend.delete(f"{self.namespace}:{state}") == 1
+
+
+def create_state_store(redis_url: Optional[str], ttl_seconds: int, max_entries: int) -> StateStore:
+    """Shared store if a Redis URL is configured, otherwise an in-process one"""
+    if redis_url:
+        return SharedStateStore(create_cache_backend(redis_url, max_entries), ttl_seconds)
+    return InMemoryStateStore(ttl_seconds, max_entries)
+
+
+oauth_state_store: StateStore = create_state_store(
+    settings.redis_url,
+    ttl_seconds=settings.oauth_state_ttl_seconds or 600,
+    max_entries=settings.oauth_state_max_entries or 100000,
+)
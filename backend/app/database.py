@@ -1,15 +1,284 @@
+import logging
+import time
+import uuid
+import weakref
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
-from sqlalchemy.orm import declarative_base
+from app.core.metrics import CollectedMetric, Histogram, record_query, register_collector
+from sqlalchemy.orm import Session, declarative_base
+
+logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
-engine = create_async_engine(settings.database_url, echo=settings.debug)
+# Seconds spent waiting for a pooled connection, and opening new ones
+pool_wait_seconds = Histogram(buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+pool_connect_seconds = Histogram(buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+pool_timeouts = 0
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waited for a connection
+
+    A checkout that opens a new connection (below pool_size, or into the
+    overflow) spends that time connecting rather than waiting; it is recorded
+    as connect time and left out of the wait.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # New connection record -> seconds it took to open, until its checkout claims it
+        self._connect_seconds = weakref.WeakKeyDictionary()
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        record = super()._create_connection()
+        elapsed = time.perf_counter() - started
+        pool_connect_seconds.observe(elapsed)
+        self._connect_seconds[record] = elapsed
+        return record
+
+    def _do_get(self):
+        global pool_timeouts
+        started = time.perf_counter()
+        record = None
+        try:
+            record = super()._do_get()
+            return record
+        except PoolTimeoutError:
+            pool_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            if record is not None:
+                waited -= self._connect_seconds.pop(record, 0.0)
+            pool_wait_seconds.observe(waited)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    record_query(time.perf_counter() - conn.info["query_started_at"].pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_query_timer(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        record_query(time.perf_counter() - connection.info["query_started_at"].pop())
+
+
+def _connect_args() -> dict:
+    """asyncpg options; PgBouncer transaction mode cannot keep prepared statements across transactions"""
+    if settings.db_pgbouncer_mode:
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            # Unnamed statements may collide across server connections behind PgBouncer
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.db_statement_cache_size,
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+    }
+
+
+def _create_engine(url: str):
+    return create_async_engine(
+        url,
+        echo=settings.debug,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=_connect_args(),
+    )
+
+
+engine = _create_engine(settings.database_url)
 SessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Read replicas, in DATABASE_REPLICA_URLS order; empty when none are configured
+replica_engines = [
+    _create_engine(url.strip())
+    for url in (settings.database_replica_urls or "").split(",")
+    if url.strip()
+]
+
+
+class ReadOnlySessionError(RuntimeError):
+    """A write was attempted through a session handed out by get_read_db"""
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _reject_write_statements(orm_execute_state):
+    if orm_execute_state.session.info.get("read_only") and not orm_execute_state.is_select:
+        raise ReadOnlySessionError("Write statement executed on a read-only session")
+
+
+@event.listens_for(Session, "before_flush")
+def _reject_flushes(session, flush_context, instances):
+    if session.info.get("read_only") and (session.new or session.dirty or session.deleted):
+        raise ReadOnlySessionError("Flush attempted on a read-only session")
+
+
+class _RoutedReadSession(Session):
+    """
+    Sync side of a read-only session: picks its database when it first needs a connection
+
+    A session that is never used (e.g. the request was answered from cache)
+    never checks out a connection. If connecting fails, the session moves on
+    to the next candidate for this use; see ReadRouter for which failures also
+    take a replica out of rotation.
+    """
+
+    _candidates: Optional[List[Engine]] = None
+
+    def get_bind(self, mapper=None, **kwargs):
+        if self._candidates is None:
+            self._candidates = self.info["read_router"].candidates()
+        return self._candidates[0]
+
+    def _connection_for_bind(self, engine, execution_options=None, **kwargs):
+        router = self.info["read_router"]
+        while True:
+            try:
+                return super()._connection_for_bind(engine, execution_options, **kwargs)
+            except (DBAPIError, OSError, PoolTimeoutError) as e:
+                if not self._candidates or engine is not self._candidates[0] or len(self._candidates) == 1:
+                    raise
+                router.failed(engine, e)
+                self._candidates.pop(0)
+                engine = self._candidates[0]
+
+    def close(self) -> None:
+        super().close()
+        # A closed session may be reused; route it afresh
+        self._candidates = None
+
+
+class ReadRouter:
+    """
+    Hands out read-only sessions, round-robin across replicas
+
+    Sessions connect lazily, on their first statement. A replica that fails to
+    connect is skipped for DB_REPLICA_RETRY_SECONDS; one whose pool is only
+    saturated (pool timeout) stays in rotation and just that session moves on.
+    When every replica is down (or none is configured) reads go to the primary.
+    """
+
+    def __init__(self, primary, replicas, retry_seconds: int):
+        self.primary = primary.sync_engine
+        self.replicas = [replica.sync_engine for replica in replicas]
+        self.sessionmaker = async_sessionmaker(
+            class_=AsyncSession,
+            sync_session_class=_RoutedReadSession,
+            expire_on_commit=False,
+            info={"read_only": True, "read_router": self},
+        )
+        self.retry_seconds = retry_seconds
+        self._next = 0
+        self._down_until = [0.0] * len(self.replicas)
+
+    def session(self) -> AsyncSession:
+        """A read-only session; no connection is made until it runs a statement"""
+        return self.sessionmaker()
+
+    def candidates(self) -> List[Engine]:
+        """Engines for a new session to try in order: live replicas round-robin, then the primary"""
+        now = time.monotonic()
+        live = [
+            index
+            for index in ((self._next + offset) % len(self.replicas) for offset in range(len(self.replicas)))
+            if self._down_until[index] <= now
+        ]
+        if live:
+            self._next = live[0] + 1
+        return [self.replicas[index] for index in live] + [self.primary]
+
+    def failed(self, engine: Engine, error: Exception) -> None:
+        """A session could not connect to a replica; take it out of rotation unless it is only busy"""
+        index = self.replicas.index(engine)
+        if isinstance(error, PoolTimeoutError):
+            logger.warning(f"Read replica {index} pool exhausted, using the next database for this session")
+            return
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+        logger.warning(f"Read replica {index} unavailable, skipping it for {self.retry_seconds}s: {str(error)}")
+
+
+read_router = ReadRouter(engine, replica_engines, settings.db_replica_retry_seconds or 30)
+
 async def get_db():
     async with SessionLocal() as db:
         yield db
 
+async def get_read_db():
+    """Session for read-only work, served by a replica when one is available"""
+    db = read_router.session()
+    try:
+        yield db
+    finally:
+        await db.close()
+
 async def close_db(db: AsyncSession):
-    await db.close()
\ No newline at end of file
+    await db.close()
+
+
+def _engine_pool_stats(target) -> dict:
+    pool = target.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),  # QueuePool counts up from -size
+        "max_overflow": settings.db_max_overflow,
+    }
+
+
+def pool_stats() -> dict:
+    """Live connection pool state for the internal endpoint; waits and timeouts cover every engine"""
+    return {
+        **_engine_pool_stats(engine),
+        "timeouts": pool_timeouts,
+        "wait_seconds": pool_wait_seconds.snapshot(),
+        "connect_seconds": pool_connect_seconds.snapshot(),
+        "replicas": [_engine_pool_stats(replica) for replica in replica_engines],
+    }
+
+
+def _collect_pool_metrics():
+    engines = [("primary", engine)] + [(f"replica{index}", replica) for index, replica in enumerate(replica_engines)]
+    gauges = {
+        "db_pool_size": ("Configured connections per pool", lambda pool: pool.size()),
+        "db_pool_checked_out": ("Connections currently checked out", lambda pool: pool.checkedout()),
+        "db_pool_overflow": ("Overflow connections currently open", lambda pool: max(pool.overflow(), 0)),
+    }
+    for name, (documentation, read) in gauges.items():
+        yield CollectedMetric(name, documentation, "gauge", [
+            (name, (("engine", label),), read(target.sync_engine.pool)) for label, target in engines
+        ])
+    yield CollectedMetric("db_pool_timeouts_total", "Checkouts that timed out waiting for a connection", "counter", [
+        ("db_pool_timeouts_total", (), pool_timeouts)
+    ])
+    yield CollectedMetric("db_pool_wait_seconds", "Time spent waiting for a pooled connection", "histogram", list(
+        pool_wait_seconds.samples("db_pool_wait_seconds")
+    ))
+    yield CollectedMetric("db_pool_connect_seconds", "Time spent opening new database connections", "histogram", list(
+        pool_connect_seconds.samples("db_pool_connect_seconds")
+    ))
+
+
+register_collector(_collect_pool_metrics)
@@ -1,11 +1,68 @@
+import asyncio
+import contextlib
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.api.v1 import auth, users, products
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from app.api.v1 import auth, users, products, basket, orders, internal
 from fastapi.middleware.cors import CORSMiddleware
+from app.services.image_service import start_process_pool, shutdown_process_pool
+from app.services.oauth_service import close_http_client
+from app.services.session_service import run_session_sweeper
+from app.services.basket_service import run_basket_flusher, flush_baskets
+from app.services.stock_service import run_reservation_releaser
+from app.config import settings
+from app.core.metrics import render_prometheus
+from app.core.middleware import MetricsMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create and release process-wide resources"""
+    start_process_pool()
+    sweeper = None
+    if settings.session_sweep_interval_seconds:
+        sweeper = asyncio.create_task(run_session_sweeper(
+            settings.session_sweep_interval_seconds,
+            settings.session_sweep_batch_size or 1000,
+        ))
+    basket_flusher = None
+    if settings.basket_flush_interval_seconds:
+        basket_flusher = asyncio.create_task(run_basket_flusher(
+            settings.basket_flush_interval_seconds,
+            settings.basket_flush_batch_size or 500,
+        ))
+    releaser = None
+    if settings.stock_release_interval_seconds:
+        releaser = asyncio.create_task(run_reservation_releaser(
+            settings.stock_release_interval_seconds,
+            settings.stock_release_batch_size or 1000,
+        ))
+    yield
+    for task in (sweeper, basket_flusher, releaser):
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+    if basket_flusher is not None:
+        # Write edits made since the last flush before the process goes away
+        try:
+            await flush_baskets(settings.basket_flush_batch_size or 500)
+        except Exception as e:
+            logger.error(f"Final basket flush failed: {str(e)}")
+    shutdown_process_pool()
+    await close_http_client()
+
+
 # FastAPI app
 app = FastAPI(
     title="E-Commerce API",
     version="1.0.0",
-    description="A scalable e-commerce API with user management, products, orders, wishlist, and basket"
+    description="A scalable e-commerce API with user management, products, orders, wishlist, and basket",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 #base route
@@ -13,11 +70,19 @@ app = FastAPI(
 async def read_root():
     return {"message": "Welcome to the E-Commerce API"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request, database and pool metrics in the Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 
 # Include routers
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(users.router, prefix="/users", tags=["users"])
 app.include_router(products.router, prefix="/products", tags=["products"])
+app.include_router(basket.router, prefix="/basket", tags=["basket"])
+app.include_router(orders.router, prefix="/orders", tags=["orders"])
+app.include_router(internal.router, prefix="/internal", tags=["internal"], include_in_schema=False)
 
 # Add CORS middleware
 app.add_middleware(
@@ -26,4 +91,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-)
\ No newline at end of file
+)
+
+# Outermost, so latency includes every other middleware
+app.add_middleware(MetricsMiddleware, router_app=app)
@@ -1,9 +1,13 @@
 #import all models here
 from app.models.user import User
+from app.models.user_session import UserSession
 from app.models.product import Product
+from app.models.product_media import ProductMedia
+from app.models.product_media_variant import ProductMediaVariant
 from app.models.order import Order
 from app.models.basket import Basket
 from app.models.order_item import OrderItem
 from app.models.wishlist import Wishlist
+from app.models.stock_reservation import StockReservation
 
-__all__ = ["User", "Product", "Order", "Basket", "OrderItem", "Wishlist"]
\ No newline at end of file
+__all__ = ["User", "UserSession", "Product", "ProductMedia", "ProductMediaVariant", "Order", "Basket", "OrderItem", "Wishlist", "StockReservation"]
\ No newline at end of file
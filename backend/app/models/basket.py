@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, UniqueConstraint
 from datetime import datetime
 from app.database import Base
 from sqlalchemy.orm import Mapped, mapped_column
@@ -7,6 +7,10 @@ from sqlalchemy.orm import relationship
 
 class Basket(Base):
     __tablename__ = "baskets"
+    __table_args__ = (
+        # One row per product in a user's basket; the flush upserts on it
+        UniqueConstraint("user_id", "product_id", name="uq_baskets_user_id_product_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
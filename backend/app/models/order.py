@@ -1,21 +1,27 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, UniqueConstraint
 from datetime import datetime
 from app.database import Base
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.schema import ForeignKey
 from sqlalchemy.orm import relationship
-from typing import List
+from typing import List, Optional
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # A client retry with the same Idempotency-Key finds the order instead of creating another
+        UniqueConstraint("user_id", "idempotency_key", name="uq_orders_user_id_idempotency_key"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"))
-    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"))
+    # Single-product orders only; checkout orders keep their products in order_items
+    product_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("products.id"), nullable=True)
     amount: Mapped[float] = mapped_column(Float)
+    idempotency_key: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
 
     user: Mapped["User"] = relationship("User", back_populates="orders")
     product: Mapped["Product"] = relationship("Product", back_populates="orders")
-    order_items: Mapped[List["OrderItem"]] = relationship("OrderItem", back_populates="order")  # Add this line
\ No newline at end of file
+    order_items: Mapped[List["OrderItem"]] = relationship("OrderItem", back_populates="order")
\ No newline at end of file
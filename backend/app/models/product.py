@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Index, Computed, CheckConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from datetime import datetime
 from app.database import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -7,16 +8,34 @@ from app.models.product_media import ProductMedia
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination key for listings
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        CheckConstraint("stock >= 0", name="ck_products_stock_non_negative"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String, index=True)
     description: Mapped[str] = mapped_column(String)
     price: Mapped[float] = mapped_column(Float)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Units available to reserve; NULL means stock is not tracked for this product
+    stock: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     created_by_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id"), nullable=True)
     updated_by_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # Full-text search document maintained by Postgres; name matches rank above description
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True
+        ),
+        deferred=True
+    )
     
     # Relationships
     created_by: Mapped[Optional["User"]] = relationship("User", foreign_keys=[created_by_id])
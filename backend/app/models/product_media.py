@@ -1,16 +1,35 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, UniqueConstraint
 from datetime import datetime
 from app.database import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from typing import List, Optional
+from app.models.product_media_variant import ProductMediaVariant
 
 class ProductMedia(Base):
     __tablename__ = "product_media"
+    __table_args__ = (
+        # Keyset pagination key for listings
+        Index("ix_product_media_created_at_id", "created_at", "id"),
+        # A product references each stored object at most once
+        UniqueConstraint("product_id", "content_hash", name="uq_product_media_product_id_content_hash"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id"), nullable=False)
     s3_url: Mapped[str] = mapped_column(String, nullable=False)
+    # sha256 of the original bytes; rows sharing a hash share one S3 object, and the
+    # number of such rows is that object's reference count. Null for legacy uploads.
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     
     # Relationships
-    product: Mapped["Product"] = relationship("Product", back_populates="media")
\ No newline at end of file
+    product: Mapped["Product"] = relationship("Product", back_populates="media")
+    # Always loaded with the media row so responses can list variant URLs without lazy loads
+    variants: Mapped[List["ProductMediaVariant"]] = relationship(
+        "ProductMediaVariant",
+        back_populates="media",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin"
+    )
\ No newline at end of file
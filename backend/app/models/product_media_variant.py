@@ -0,0 +1,25 @@
+from sqlalchemy import Integer, String, ForeignKey, DateTime, UniqueConstraint
+from datetime import datetime
+from app.database import Base
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+class ProductMediaVariant(Base):
+    """A resized / re-encoded rendition of a ProductMedia original"""
+    __tablename__ = "product_media_variants"
+    __table_args__ = (
+        UniqueConstraint("media_id", "variant", name="uq_product_media_variants_media_id_variant"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    media_id: Mapped[int] = mapped_column(Integer, ForeignKey("product_media.id", ondelete="CASCADE"), nullable=False, index=True)
+    variant: Mapped[str] = mapped_column(String, nullable=False)  # e.g. "thumb", "medium", "full"
+    format: Mapped[str] = mapped_column(String, nullable=False)  # "webp" or "jpeg"
+    width: Mapped[int] = mapped_column(Integer, nullable=False)
+    height: Mapped[int] = mapped_column(Integer, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    s3_url: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    # Relationships
+    media: Mapped["ProductMedia"] = relationship("ProductMedia", back_populates="variants")
@@ -0,0 +1,19 @@
+from sqlalchemy import Integer, ForeignKey, DateTime
+from datetime import datetime
+from app.database import Base
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+class StockReservation(Base):
+    """Units taken off a product's stock and held for a user until checkout or expiry"""
+    __tablename__ = "stock_reservations"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    # Relationships
+    product: Mapped["Product"] = relationship("Product")
+    user: Mapped["User"] = relationship("User")
@@ -14,12 +14,11 @@ class User(Base):
     picture: Mapped[str] = mapped_column(String)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     is_superuser: Mapped[bool] = mapped_column(Boolean, default=False)
-    refresh_token: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
-    refresh_token_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
     
     # Relationships
     orders: Mapped[List["Order"]] = relationship("Order", back_populates="user")
     baskets: Mapped[List["Basket"]] = relationship("Basket", back_populates="user")
-    wishlists: Mapped[List["Wishlist"]] = relationship("Wishlist", back_populates="user")
\ No newline at end of file
+    wishlists: Mapped[List["Wishlist"]] = relationship("Wishlist", back_populates="user")
+    sessions: Mapped[List["UserSession"]] = relationship("UserSession", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlalchemy import Integer, String, ForeignKey, DateTime
+from datetime import datetime
+from app.database import Base
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from typing import Optional
+
+class UserSession(Base):
+    """One signed-in device; holds the SHA-256 of its current refresh token, never the token itself"""
+    __tablename__ = "user_sessions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True, index=True)
+    user_agent: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    last_used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    # Relationships
+    user: Mapped["User"] = relationship("User", back_populates="sessions")
@@ -0,0 +1,67 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, tuple_, func, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from typing import Dict, List
+from datetime import datetime
+from app.models.basket import Basket
+from app.repositories import locks
+from app.repositories.locks import advisory_xact_locks
+
+class BasketRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def lock_users(self, user_ids: List[int]) -> None:
+        """Hold the basket flush lock of each user until the transaction ends"""
+        await advisory_xact_locks(self.db, locks.BASKET_FLUSH, user_ids)
+
+    async def get_items(self, user_id: int) -> Dict[int, int]:
+        """A user's basket rows as product_id -> quantity"""
+        result = await self.db.execute(
+            select(Basket.product_id, Basket.quantity).where(Basket.user_id == user_id)
+        )
+        return {product_id: quantity for product_id, quantity in result.all()}
+
+    async def replace_many(self, baskets: Dict[int, Dict[int, int]]) -> int:
+        """
+        Make each given user's rows match their basket, without committing
+
+        Two statements whatever the number of baskets: a DELETE of rows no longer
+        in any basket, then one upsert on (user_id, product_id) that only rewrites
+        rows whose quantity changed. Pairs are bound as two int[] arrays, so the
+        statement text stays the same for every batch.
+
+        Returns:
+            Number of basket items written
+        """
+        if not baskets:
+            return 0
+        now = datetime.now()
+        rows = [
+            {"user_id": user_id, "product_id": product_id, "quantity": quantity, "created_at": now, "updated_at": now}
+            for user_id, items in baskets.items()
+            for product_id, quantity in items.items()
+        ]
+
+        kept = select(
+            func.unnest(bindparam("kept_user_ids", [row["user_id"] for row in rows], type_=ARRAY(Integer))),
+            func.unnest(bindparam("kept_product_ids", [row["product_id"] for row in rows], type_=ARRAY(Integer))),
+        )
+        await self.db.execute(
+            delete(Basket).where(
+                Basket.user_id == func.any(bindparam("user_ids", list(baskets), type_=ARRAY(Integer))),
+                tuple_(Basket.user_id, Basket.product_id).not_in(kept),
+            )
+        )
+
+        if rows:
+            upsert = pg_insert(Basket)
+            await self.db.execute(
+                upsert.on_conflict_do_update(
+                    constraint="uq_baskets_user_id_product_id",
+                    set_={"quantity": upsert.excluded.quantity, "updated_at": upsert.excluded.updated_at},
+                    where=Basket.quantity != upsert.excluded.quantity,
+                ),
+                rows
+            )
+        return len(rows)
@@ -0,0 +1,40 @@
+"""
+Transaction-scoped Postgres advisory locks
+
+Every lock is pg_advisory_xact_lock(namespace, key): the namespace keeps the
+key spaces of different features apart, and the lock is released when the
+transaction commits or rolls back. Both keys are int4.
+"""
+
+from typing import Iterable
+from sqlalchemy import func, select, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Namespaces
+CHECKOUT = 1  # key: user id
+BASKET_FLUSH = 2  # key: user id
+MEDIA_CONTENT = 3  # key: content_lock_key(content hash)
+STOCK_RESERVATION = 4  # key: user id
+
+
+def content_lock_key(content_hash: str) -> int:
+    """int4 lock key from a sha256 hex digest; a collision only serializes two hashes needlessly"""
+    return int(content_hash[:8], 16) - 2 ** 31
+
+
+async def advisory_xact_lock(db: AsyncSession, namespace: int, key: int) -> None:
+    """Wait for the lock on (namespace, key) and hold it until the transaction ends"""
+    await db.execute(select(func.pg_advisory_xact_lock(namespace, key)))
+
+
+async def advisory_xact_locks(db: AsyncSession, namespace: int, keys: Iterable[int]) -> None:
+    """
+    Take the locks on many keys with one statement, in ascending key order
+
+    Every caller locks in the same order, so two transactions locking
+    overlapping sets wait for each other instead of deadlocking.
+    """
+    # unnest yields the array in order, so the locks are taken in that order
+    locked = func.unnest(bindparam("lock_keys", sorted(set(keys)), type_=ARRAY(Integer))).table_valued("key").render_derived()
+    await db.execute(select(func.pg_advisory_xact_lock(namespace, locked.c.key)))
@@ -0,0 +1,68 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, RowMapping
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.repositories import locks
+from app.repositories.locks import advisory_xact_lock
+
+class OrderRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def lock_checkout(self, user_id: int) -> None:
+        """Serialize a user's checkouts: blocks until the user's other checkout transactions end"""
+        await advisory_xact_lock(self.db, locks.CHECKOUT, user_id)
+
+    async def create(self, user_id: int, amount: float, idempotency_key: Optional[str] = None) -> Optional[RowMapping]:
+        """
+        Insert an order with INSERT ... ON CONFLICT DO NOTHING RETURNING, without committing
+
+        A concurrent request holding the same (user_id, idempotency_key) makes this
+        wait for it to commit and then insert nothing.
+
+        Returns:
+            The new row's columns, or None if an order with this idempotency key exists
+        """
+        result = await self.db.execute(
+            pg_insert(Order)
+            .values(user_id=user_id, amount=amount, idempotency_key=idempotency_key)
+            .on_conflict_do_nothing(constraint="uq_orders_user_id_idempotency_key")
+            .returning(Order.id, Order.user_id, Order.amount, Order.idempotency_key, Order.created_at)
+        )
+        return result.mappings().one_or_none()
+
+    async def add_items(self, order_id: int, items: List[dict]) -> List[RowMapping]:
+        """
+        Insert all of an order's items with one multi-row INSERT ... RETURNING, without committing
+
+        Each item is a dict with product_id, quantity and price.
+        """
+        if not items:
+            return []
+        result = await self.db.execute(
+            insert(OrderItem)
+            .values([{**item, "order_id": order_id} for item in items])
+            .returning(OrderItem.product_id, OrderItem.quantity, OrderItem.price, sort_by_parameter_order=True)
+        )
+        return result.mappings().all()
+
+    async def get_by_id(self, order_id: int, user_id: int) -> Optional[Order]:
+        """Get one of a user's orders with its items"""
+        result = await self.db.execute(
+            select(Order)
+            .options(selectinload(Order.order_items))
+            .where(Order.id == order_id, Order.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_by_idempotency_key(self, user_id: int, idempotency_key: str) -> Optional[Order]:
+        """Get the order a user created with an idempotency key, with its items"""
+        result = await self.db.execute(
+            select(Order)
+            .options(selectinload(Order.order_items))
+            .where(Order.user_id == user_id, Order.idempotency_key == idempotency_key)
+        )
+        return result.scalar_one_or_none()
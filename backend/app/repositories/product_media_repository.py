@@ -1,42 +1,62 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import select, delete, insert, tuple_, distinct, RowMapping
+from typing import List, Optional, Tuple
+from datetime import datetime
 from app.models.product_media import ProductMedia as ProductMediaModel
+from app.models.product_media_variant import ProductMediaVariant as ProductMediaVariantModel
+from app.repositories import locks
+from app.repositories.locks import advisory_xact_locks, content_lock_key
 
 class ProductMediaRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def create_multiple(self, product_id: int, s3_urls: List[str]) -> List[ProductMediaModel]:
-        """Create multiple product media records"""
+    async def create_multiple(
+        self,
+        product_id: int,
+        s3_urls: List[str],
+        content_hashes: Optional[List[str]] = None
+    ) -> List[RowMapping]:
+        """
+        Insert product media records with one multi-row INSERT ... RETURNING, without committing
+
+        Returns the new rows' columns in input order; the caller commits as part of
+        its own unit of work.
+        """
         if not s3_urls:
             return []
-        
-        try:
-            product_media = []
-            for s3_url in s3_urls:
-                product_media.append(ProductMediaModel(product_id=product_id, s3_url=s3_url))
-            
-            self.db.add_all(product_media)
-            await self.db.commit()
-            
-            # Refresh to get IDs
-            for media in product_media:
-                await self.db.refresh(media)
-            
-            return product_media
-        except Exception as e:
-            await self.db.rollback()
-            raise
-    
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[ProductMediaModel]:
-        """Get all product media records with pagination"""
+        now = datetime.now()
+        rows = [
+            {"product_id": product_id, "s3_url": s3_url, "content_hash": content_hash, "created_at": now, "updated_at": now}
+            for s3_url, content_hash in zip(s3_urls, content_hashes or [None] * len(s3_urls))
+        ]
         result = await self.db.execute(
+            insert(ProductMediaModel).returning(*ProductMediaModel.__table__.c, sort_by_parameter_order=True),
+            rows
+        )
+        return result.mappings().all()
+
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> List[ProductMediaModel]:
+        """
+        Get all product media records with pagination, newest first
+
+        If `after` is given, keyset pagination is used and `skip` is ignored.
+        """
+        query = (
             select(ProductMediaModel)
-            .offset(skip)
+            .order_by(ProductMediaModel.created_at.desc(), ProductMediaModel.id.desc())
             .limit(limit)
-            .order_by(ProductMediaModel.created_at.desc())
         )
+        if after is not None:
+            query = query.where(tuple_(ProductMediaModel.created_at, ProductMediaModel.id) < after)
+        elif skip:
+            query = query.offset(skip)
+        result = await self.db.execute(query)
         return result.scalars().all()
     
     async def get_by_product_id(self, product_id: int) -> List[ProductMediaModel]:
@@ -47,3 +67,66 @@ class ProductMediaRepository:
             .order_by(ProductMediaModel.created_at.desc())
         )
         return result.scalars().all()
+    
+    async def get_by_ids(self, media_ids: List[int]) -> List[ProductMediaModel]:
+        """Get media records by id"""
+        if not media_ids:
+            return []
+        result = await self.db.execute(
+            select(ProductMediaModel).where(ProductMediaModel.id.in_(media_ids))
+        )
+        return result.scalars().all()
+    
+    async def replace_variants(self, media_id: int, variants: List[dict]) -> None:
+        """Replace all variants of a media record in one transaction"""
+        try:
+            await self.db.execute(
+                delete(ProductMediaVariantModel).where(ProductMediaVariantModel.media_id == media_id)
+            )
+            self.db.add_all([ProductMediaVariantModel(media_id=media_id, **variant) for variant in variants])
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+    
+    async def get_content_hashes(self, product_id: int) -> List[str]:
+        """Content hashes of the objects a product references"""
+        result = await self.db.execute(
+            select(ProductMediaModel.content_hash)
+            .where(ProductMediaModel.product_id == product_id, ProductMediaModel.content_hash.is_not(None))
+        )
+        return result.scalars().all()
+    
+    async def lock_content(self, content_hashes: List[str]) -> None:
+        """
+        Hold the content locks of the given hashes until the transaction ends
+
+        Taken by everything that starts referencing stored content (around
+        inserting its media rows) and by the delete of unreferenced content, so
+        neither can interleave with the other.
+        """
+        await advisory_xact_locks(self.db, locks.MEDIA_CONTENT, [content_lock_key(h) for h in content_hashes])
+
+    async def get_unreferenced_hashes(self, content_hashes: List[str]) -> List[str]:
+        """Of the given hashes, those no media record references any more"""
+        if not content_hashes:
+            return []
+        result = await self.db.execute(
+            select(distinct(ProductMediaModel.content_hash))
+            .where(ProductMediaModel.content_hash.in_(content_hashes))
+        )
+        referenced = set(result.scalars().all())
+        return [content_hash for content_hash in set(content_hashes) if content_hash not in referenced]
+    
+    async def get_variants_by_hash(self, content_hash: str) -> List[ProductMediaVariantModel]:
+        """Variants already rendered for any media record with this content"""
+        result = await self.db.execute(
+            select(ProductMediaVariantModel)
+            .join(ProductMediaModel, ProductMediaVariantModel.media_id == ProductMediaModel.id)
+            .where(ProductMediaModel.content_hash == content_hash)
+            .order_by(ProductMediaVariantModel.media_id)
+        )
+        variants = {}
+        for variant in result.scalars().all():
+            variants.setdefault(variant.variant, variant)
+        return list(variants.values())
@@ -1,54 +1,272 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy import select, delete, insert, update, tuple_, func, bindparam, Integer, RowMapping
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import selectinload, noload, load_only, aliased
+from typing import AsyncIterator, Collection, Dict, List, Optional, Set, Tuple
 from app.models.product import Product as ProductModel
 from app.models.product_media import ProductMedia as ProductMediaModel
 from app.schemas.product import ProductCreate, ProductUpdate
+from app.models.user import User as UserModel
 from datetime import datetime
+
+# Every column except the deferred search_vector, for INSERT / UPDATE ... RETURNING
+RETURNED_COLUMNS = [column for column in ProductModel.__table__.c if column.name != "search_vector"]
+
+# Relationships a product response can embed, with the foreign key each one needs loaded
+RELATIONS = {"created_by": "created_by_id", "updated_by": "updated_by_id", "media": None}
+
+# Rows per multi-row INSERT: Postgres binds at most 32767 parameters per statement,
+# and a row never takes more than one per column
+INSERT_BATCH_ROWS = 32767 // len(ProductModel.__table__.c)
+
+# Always loaded for sparse reads: identity, keyset cursor and ETag inputs
+ALWAYS_LOADED = ("id", "created_at", "updated_at")
+
+def embedded_users(fields: Optional[Collection[str]] = None) -> List[str]:
+    """The user relationships a response with these fields embeds"""
+    return [
+        relation for relation, foreign_key in RELATIONS.items()
+        if foreign_key and (fields is None or relation in fields)
+    ]
+
+def _version_column(fields: Optional[Collection[str]] = None):
+    """
+    Newest updated_at among a product and the users its response embeds
+
+    An embedded user's name or picture changes on login without touching
+    products.updated_at, so their updated_at counts towards the version.
+    GREATEST skips the NULLs of products with no such user.
+    """
+    stamps = [ProductModel.updated_at]
+    for relation in embedded_users(fields):
+        user = aliased(UserModel)
+        stamps.append(
+            select(user.updated_at)
+            .where(user.id == getattr(ProductModel, RELATIONS[relation]))
+            .scalar_subquery()
+        )
+    return func.greatest(*stamps) if len(stamps) > 1 else stamps[0]
+
+def _load_options(fields: Optional[Collection[str]] = None) -> list:
+    """
+    Loader options for reading products as a response
+
+    With no fields every column and relationship is loaded. Otherwise only the
+    requested columns (plus ALWAYS_LOADED and the keys of requested relationships)
+    are selected, and unrequested relationships are not queried at all.
+    """
+    if fields is None:
+        return [selectinload(getattr(ProductModel, relation)) for relation in RELATIONS]
+    columns = set(ALWAYS_LOADED) | {column.name for column in RETURNED_COLUMNS if column.name in fields}
+    options = []
+    for relation, foreign_key in RELATIONS.items():
+        if relation in fields:
+            options.append(selectinload(getattr(ProductModel, relation)))
+            if foreign_key:
+                columns.add(foreign_key)
+        else:
+            options.append(noload(getattr(ProductModel, relation)))
+    options.append(load_only(*(getattr(ProductModel, column) for column in sorted(columns))))
+    return options
+
 class ProductRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
     
-    async def create(self, product_data: ProductCreate, created_by_id: Optional[int] = None) -> ProductModel:
-        """Create a new product"""
-        product_dict = product_data.model_dump()
-        if created_by_id is not None:
-            product_dict["created_by_id"] = created_by_id
-        product = ProductModel(**product_dict)
-        self.db.add(product)
-        await self.db.commit()
-        await self.db.refresh(product)
-        # Reload with relationship to include created_by
-        return await self.get_by_id(product.id)
+    async def create(self, product_data: ProductCreate, created_by_id: Optional[int] = None) -> RowMapping:
+        """
+        Insert a product with INSERT ... RETURNING, without committing
+
+        Returns the new row's columns so the caller can build its response without
+        re-selecting; the caller commits as part of its own unit of work.
+        """
+        row = product_data.model_dump()
+        row["created_by_id"] = created_by_id
+        result = await self.db.execute(
+            insert(ProductModel).values(**row).returning(*RETURNED_COLUMNS)
+        )
+        return result.mappings().one()
+
+    async def bulk_create(self, products: List[ProductCreate], created_by_id: Optional[int] = None) -> int:
+        """
+        Insert many products in a single transaction
 
-    async def get_by_id(self, product_id: int) -> Optional[ProductModel]:
-        """Get product by ID"""
+        Rows go out as multi-row INSERT ... VALUES statements of up to
+        INSERT_BATCH_ROWS rows, one round trip each rather than one per row;
+        nothing is returned, refreshed or reloaded. Rolls back and re-raises on failure.
+        """
+        if not products:
+            return 0
+        rows = []
+        for product_data in products:
+            row = product_data.model_dump()
+            row["created_by_id"] = created_by_id
+            rows.append(row)
+        try:
+            for start in range(0, len(rows), INSERT_BATCH_ROWS):
+                await self.db.execute(insert(ProductModel).values(rows[start:start + INSERT_BATCH_ROWS]))
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        return len(rows)
+
+    async def get_by_id(self, product_id: int, fields: Optional[Collection[str]] = None) -> Optional[ProductModel]:
+        """Get product by ID, optionally loading only the given response fields"""
         result = await self.db.execute(
             select(ProductModel)
-            .options(
-                selectinload(ProductModel.created_by),
-                selectinload(ProductModel.media)
-            )
+            .options(*_load_options(fields))
             .where(ProductModel.id == product_id)
         )
         return result.scalar_one_or_none()
     
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[ProductModel]:
-        """Get all products with pagination"""
+    async def get_by_ids(self, product_ids: Collection[int], fields: Optional[Collection[str]] = None) -> List[ProductModel]:
+        """
+        Get the products with the given IDs in one query, in no particular order
+
+        Relationships are bulk-loaded (one selectin query each), so the statement
+        count does not grow with the number of IDs. Missing IDs are simply absent.
+        """
+        if not product_ids:
+            return []
         result = await self.db.execute(
             select(ProductModel)
-            .options(
-                selectinload(ProductModel.created_by),
-                selectinload(ProductModel.media)
+            .options(*_load_options(fields))
+            .where(ProductModel.id.in_(product_ids))
+        )
+        return result.scalars().all()
+    
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[datetime, int]] = None,
+        fields: Optional[Collection[str]] = None
+    ) -> List[ProductModel]:
+        """
+        Get all products with pagination, newest first
+
+        If `after` is given, keyset pagination is used: only products strictly
+        older than the (created_at, id) position are returned and `skip` is ignored.
+        `fields` restricts the columns and relationships loaded (see _load_options).
+        """
+        query = self._paginate(
+            select(ProductModel).options(*_load_options(fields)),
+            skip=skip, limit=limit, after=after
+        )
+        result = await self.db.execute(query)
+        return result.scalars().all()
+    
+    async def get_existing_ids(self, product_ids: Collection[int], active_only: bool = False) -> Set[int]:
+        """Which of the given IDs belong to existing (optionally active) products, via the primary key only"""
+        if not product_ids:
+            return set()
+        # Bound as one int[] so any number of IDs fits in a single parameter
+        query = select(ProductModel.id).where(
+            ProductModel.id == func.any(bindparam("product_ids", list(product_ids), type_=ARRAY(Integer)))
+        )
+        if active_only:
+            query = query.where(ProductModel.is_active.is_(True))
+        result = await self.db.execute(query)
+        return set(result.scalars().all())
+    
+    async def get_prices(self, product_ids: Collection[int]) -> Dict[int, float]:
+        """Current prices of the given IDs' active products, in one query; inactive or missing IDs are absent"""
+        if not product_ids:
+            return {}
+        result = await self.db.execute(
+            select(ProductModel.id, ProductModel.price).where(
+                ProductModel.id == func.any(bindparam("product_ids", list(product_ids), type_=ARRAY(Integer))),
+                ProductModel.is_active.is_(True),
             )
+        )
+        return {product_id: price for product_id, price in result.all()}
+    
+    async def get_ids_embedding_user(self, user_id: int) -> List[int]:
+        """IDs of the products whose response embeds the user, as creator or last editor"""
+        result = await self.db.execute(
+            select(ProductModel.id).where(
+                (ProductModel.created_by_id == user_id) | (ProductModel.updated_by_id == user_id)
+            )
+        )
+        return list(result.scalars().all())
+    
+    async def get_version(self, product_id: int, fields: Optional[Collection[str]] = None) -> Optional[datetime]:
+        """Get only a product's version (see _version_column), for cheap cache validation"""
+        result = await self.db.execute(
+            select(_version_column(fields)).where(ProductModel.id == product_id)
+        )
+        return result.scalar_one_or_none()
+    
+    async def get_page_versions(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[Tuple[datetime, int]] = None,
+        fields: Optional[Collection[str]] = None
+    ) -> List[Tuple[int, datetime]]:
+        """Get (id, version) for the rows get_all would return, without loading them"""
+        query = self._paginate(
+            select(ProductModel.id, _version_column(fields)),
+            skip=skip, limit=limit, after=after
+        )
+        result = await self.db.execute(query)
+        return [tuple(row) for row in result.all()]
+    
+    @staticmethod
+    def _paginate(query, skip: int, limit: int, after: Optional[Tuple[datetime, int]]):
+        """Apply listing order plus keyset (after) or offset (skip) pagination"""
+        query = query.order_by(ProductModel.created_at.desc(), ProductModel.id.desc()).limit(limit)
+        if after is not None:
+            return query.where(tuple_(ProductModel.created_at, ProductModel.id) < after)
+        if skip:
+            return query.offset(skip)
+        return query
+    
+    async def stream_all(self, fetch_size: int = 500, include_media: bool = False) -> AsyncIterator[List[ProductModel]]:
+        """
+        Stream every product in id order, fetch_size rows at a time
+
+        Uses a server-side cursor, so only one batch (plus its relationship
+        loads) is held in memory at once.
+        """
+        options = [selectinload(ProductModel.created_by), selectinload(ProductModel.updated_by)]
+        options.append(selectinload(ProductModel.media) if include_media else noload(ProductModel.media))
+        result = await self.db.stream_scalars(
+            select(ProductModel)
+            .options(*options)
+            .order_by(ProductModel.id)
+            .execution_options(yield_per=fetch_size)
+        )
+        async for partition in result.partitions():
+            yield partition
+    
+    async def search(self, query: str, skip: int = 0, limit: int = 100) -> List[ProductModel]:
+        """
+        Full-text search over name and description, best matches first
+
+        Matching and ranking run against the GIN-indexed search_vector column,
+        so non-matching rows are never loaded.
+        """
+        ts_query = func.websearch_to_tsquery("english", query)
+        rank = func.ts_rank_cd(ProductModel.search_vector, ts_query)
+        result = await self.db.execute(
+            select(ProductModel)
+            .options(*_load_options())
+            .where(ProductModel.search_vector.op("@@")(ts_query))
+            .order_by(rank.desc(), ProductModel.id.desc())
             .offset(skip)
             .limit(limit)
         )
         return result.scalars().all()
     
     async def update(self, product_id: int, product_data: ProductUpdate, updated_by_id: Optional[int] = None) -> Optional[ProductModel]:
-        """Update a product"""
+        """
+        Update a product and return it without reloading
+
+        The instance loaded here already carries its relationships, and sessions do
+        not expire on commit, so the UPDATE and COMMIT are the only extra round trips.
+        """
         product = await self.get_by_id(product_id)
         if not product:
             return None
@@ -62,11 +280,25 @@ class ProductRepository:
         for field, value in update_data.items():
             setattr(product, field, value)
         
+        if updated_by_id is not None:
+            # Usually already in the identity map (e.g. as created_by), so no query
+            product.updated_by = await self.db.get(UserModel, updated_by_id)
         product.updated_at = datetime.now()
         await self.db.commit()
-        await self.db.refresh(product)
-        # Reload with relationships to ensure we have the latest data
-        return await self.get_by_id(product_id)
+        return product
+    
+    async def touch(self, product_id: int) -> None:
+        """
+        Bump a product's updated_at without loading it
+
+        Used when related rows (e.g. media) change, so ETags move with the response.
+        Does not commit; the caller's next commit includes it.
+        """
+        await self.db.execute(
+            update(ProductModel)
+            .where(ProductModel.id == product_id)
+            .values(updated_at=datetime.now())
+        )
     
     async def delete(self, product_id: int) -> bool:
         """Delete a product"""
@@ -0,0 +1,79 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete
+from typing import Optional
+from datetime import datetime
+from app.models.user import User
+from app.models.user_session import UserSession
+
+class SessionRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, user_id: int, token_hash: str, expires_at: datetime, user_agent: Optional[str] = None) -> UserSession:
+        session = UserSession(
+            user_id=user_id,
+            token_hash=token_hash,
+            expires_at=expires_at,
+            user_agent=user_agent,
+        )
+        self.db.add(session)
+        await self.db.commit()
+        return session
+
+    async def rotate(self, token_hash: str, new_token_hash: str, expires_at: datetime) -> Optional[int]:
+        """
+        Swap a live session's token hash for a new one in a single UPDATE ... RETURNING
+
+        The row lock taken by the UPDATE serialises concurrent refreshes with the
+        same token: the loser re-checks token_hash after the winner commits, matches
+        nothing and gets None. Sessions of inactive users are not rotated.
+
+        Returns:
+            The session's user id, or None if the token is unknown, expired or its user inactive
+        """
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            update(UserSession)
+            .where(
+                UserSession.token_hash == token_hash,
+                UserSession.expires_at > now,
+                UserSession.user_id == User.id,
+                User.is_active.is_(True),
+            )
+            .values(token_hash=new_token_hash, expires_at=expires_at, last_used_at=now)
+            .returning(UserSession.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        user_id = result.scalar_one_or_none()
+        await self.db.commit()
+        return user_id
+
+    async def revoke(self, token_hash: str) -> bool:
+        result = await self.db.execute(
+            delete(UserSession).where(UserSession.token_hash == token_hash)
+        )
+        await self.db.commit()
+        return result.rowcount > 0
+
+    async def revoke_all(self, user_id: int) -> int:
+        result = await self.db.execute(
+            delete(UserSession).where(UserSession.user_id == user_id)
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    async def delete_expired(self, batch_size: int) -> int:
+        """Delete up to batch_size expired sessions in one short transaction"""
+        expired_ids = (
+            select(UserSession.id)
+            .where(UserSession.expires_at <= datetime.utcnow())
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            delete(UserSession)
+            .where(UserSession.id.in_(expired_ids))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return result.rowcount
@@ -0,0 +1,178 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, insert, func, literal, RowMapping
+from typing import Dict, List, Optional
+from datetime import datetime
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation
+from app.repositories import locks
+from app.repositories.locks import advisory_xact_lock
+
+class StockRepository:
+    """
+    Stock changes as single conditional statements
+
+    Nothing here reads stock and then writes it: every decrement is an
+    UPDATE ... WHERE stock >= :n, so the row lock is held for one statement
+    (plus the commit) and concurrent buyers of a hot product queue only on that.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def lock_reservations(self, user_id: int) -> None:
+        """Serialize a user's reservations, so each one sees the units the others hold"""
+        await advisory_xact_lock(self.db, locks.STOCK_RESERVATION, user_id)
+
+    def _held(self, product_id, user_id: int):
+        """Units of a product the user holds in live reservations, as a scalar subquery"""
+        return (
+            select(func.coalesce(func.sum(StockReservation.quantity), 0))
+            .where(
+                StockReservation.product_id == product_id,
+                StockReservation.user_id == user_id,
+                StockReservation.expires_at > datetime.utcnow(),
+            )
+            .scalar_subquery()
+        )
+
+    async def held(self, product_id: int, user_id: int) -> int:
+        """Units of a product the user holds in live reservations"""
+        result = await self.db.execute(select(self._held(product_id, user_id)))
+        return result.scalar_one()
+
+    async def reserve(
+        self,
+        product_id: int,
+        user_id: int,
+        quantity: int,
+        expires_at: datetime,
+        max_held: int
+    ) -> Optional[RowMapping]:
+        """
+        Take quantity units off an active product's stock and record the hold, in one statement
+
+        UPDATE products ... WHERE stock >= :quantity RETURNING feeds the INSERT into
+        stock_reservations through a CTE, so both happen or neither does. The same
+        WHERE caps the units the user holds of the product at max_held. Does not
+        commit; the caller holds lock_reservations, so the statement's snapshot
+        already sees the user's other reservations.
+
+        Returns:
+            The reservation row, or None if the product is missing, inactive,
+            untracked or short, or the user would hold more than max_held
+        """
+        taken = (
+            update(Product)
+            .where(
+                Product.id == product_id,
+                Product.is_active.is_(True),
+                Product.stock >= quantity,
+                self._held(Product.id, user_id) + quantity <= max_held,
+            )
+            .values(stock=Product.stock - quantity)
+            .returning(Product.id)
+            .cte("taken")
+        )
+        result = await self.db.execute(
+            insert(StockReservation)
+            .from_select(
+                ["product_id", "user_id", "quantity", "expires_at", "created_at"],
+                select(taken.c.id, literal(user_id), literal(quantity), literal(expires_at), literal(datetime.now()))
+            )
+            .returning(StockReservation.id, StockReservation.product_id, StockReservation.quantity, StockReservation.expires_at)
+        )
+        return result.mappings().one_or_none()
+
+    async def release(self, product_id: int, reservation_id: int, user_id: int) -> bool:
+        """
+        Delete one of a user's reservations and put its units back, in one statement
+
+        Does not commit. Returns whether the reservation existed.
+        """
+        released = (
+            delete(StockReservation)
+            .where(
+                StockReservation.id == reservation_id,
+                StockReservation.product_id == product_id,
+                StockReservation.user_id == user_id,
+            )
+            .returning(StockReservation.product_id, StockReservation.quantity)
+            .cte("released")
+        )
+        result = await self.db.execute(
+            update(Product)
+            .where(Product.id == released.c.product_id)
+            .values(stock=Product.stock + released.c.quantity)
+            .returning(Product.id)
+        )
+        return result.first() is not None
+
+    async def take_reserved(self, user_id: int, product_ids: List[int]) -> Dict[int, int]:
+        """
+        Consume a user's live reservations of the given products, without committing
+
+        The units are already off the stock, so this only deletes the holds.
+
+        Returns:
+            product_id -> units the user had reserved
+        """
+        result = await self.db.execute(
+            delete(StockReservation)
+            .where(
+                StockReservation.user_id == user_id,
+                StockReservation.product_id.in_(product_ids),
+                StockReservation.expires_at > datetime.utcnow(),
+            )
+            .returning(StockReservation.product_id, StockReservation.quantity)
+        )
+        reserved: Dict[int, int] = {}
+        for product_id, quantity in result.all():
+            reserved[product_id] = reserved.get(product_id, 0) + quantity
+        return reserved
+
+    async def adjust(self, product_id: int, delta: int) -> bool:
+        """
+        Take delta units (give back if negative) with one conditional UPDATE, without committing
+
+        Untracked products (NULL stock) always succeed and stay untracked.
+
+        Returns:
+            False if the product's stock is short
+        """
+        result = await self.db.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.stock.is_(None) | (Product.stock >= delta))
+            .values(stock=Product.stock - delta)
+            .returning(Product.id)
+        )
+        return result.first() is not None
+
+    async def release_expired(self, batch_size: int) -> int:
+        """
+        Release up to batch_size expired reservations in one short transaction
+
+        Units go back one product at a time in product id order, the order
+        checkouts lock in, so the two never deadlock. A reservation consumed by a
+        checkout at the same moment is deleted by only one of them, so its units
+        are never returned twice.
+        """
+        expired_ids = (
+            select(StockReservation.id)
+            .where(StockReservation.expires_at <= datetime.utcnow())
+            .order_by(StockReservation.expires_at)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            delete(StockReservation)
+            .where(StockReservation.id.in_(expired_ids))
+            .returning(StockReservation.product_id, StockReservation.quantity)
+        )
+        released = result.all()
+        totals: Dict[int, int] = {}
+        for product_id, quantity in released:
+            totals[product_id] = totals.get(product_id, 0) + quantity
+        for product_id in sorted(totals):
+            await self.adjust(product_id, -totals[product_id])
+        await self.db.commit()
+        return len(released)
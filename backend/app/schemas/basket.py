@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class BasketItemAdd(BaseModel):
+    product_id: int
+    quantity: int = Field(default=1, ge=1)
+
+class BasketItemUpdate(BaseModel):
+    quantity: int = Field(ge=0, description="0 removes the item")
+
+class BasketItem(BaseModel):
+    product_id: int
+    quantity: int
+
+class BasketResponse(BaseModel):
+    """A user's basket, items in product id order"""
+    items: List[BasketItem]
+    total_quantity: int
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+
+class OrderItemResponse(BaseModel):
+    product_id: int
+    quantity: int
+    price: float
+    class Config:
+        from_attributes = True
+
+class OrderResponse(BaseModel):
+    id: int
+    user_id: int
+    amount: float
+    idempotency_key: Optional[str] = None
+    created_at: datetime
+    items: List[OrderItemResponse]
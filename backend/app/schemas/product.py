@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 from app.schemas.user import UserResponse
@@ -9,6 +9,7 @@ class ProductBase(BaseModel):
     description: str
     price: float
     is_active: bool = True
+    stock: Optional[int] = Field(default=None, ge=0)  # None: not tracked
 
 class ProductCreate(ProductBase):
     pass
@@ -19,6 +20,7 @@ class ProductUpdate(BaseModel):
     description: Optional[str] = None
     price: Optional[float] = None
     is_active: Optional[bool] = None
+    stock: Optional[int] = Field(default=None, ge=0)
 
 class ProductResponse(ProductBase):
     id: int
@@ -30,4 +32,28 @@ class ProductResponse(ProductBase):
     updated_at: datetime
     media: Optional[List[ProductMediaResponse]] = None
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProductPage(BaseModel):
+    """A page of products plus the cursor to fetch the next one"""
+    items: List[ProductResponse]
+    next_cursor: Optional[str] = None
+
+class ProductBatch(BaseModel):
+    """Products looked up by ID, in request order, plus the IDs that do not exist"""
+    items: List[ProductResponse]
+    missing: List[int]
+
+
+class ProductImportError(BaseModel):
+    """Why one row of a bulk import was rejected"""
+    row: int
+    errors: List[str]
+
+class ProductImportReport(BaseModel):
+    """Outcome of a bulk import; rows are numbered from 1, excluding any CSV header"""
+    total_rows: int
+    imported: int
+    failed: int
+    errors: List[ProductImportError]
+    errors_truncated: bool = False
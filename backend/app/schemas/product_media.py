@@ -1,5 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import Dict, List, Optional
+
+class ProductMediaVariantResponse(BaseModel):
+    variant: str
+    format: str
+    width: int
+    height: int
+    size_bytes: int
+    s3_url: str
+    class Config:
+        from_attributes = True
 
 class ProductMediaResponse(BaseModel):
     id: int
@@ -7,5 +18,45 @@ class ProductMediaResponse(BaseModel):
     s3_url: str
     created_at: datetime
     updated_at: datetime
+    # Smaller renditions of s3_url; empty until background processing finishes
+    variants: List[ProductMediaVariantResponse] = []
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProductMediaPage(BaseModel):
+    """A page of product media plus the cursor to fetch the next one"""
+    items: List[ProductMediaResponse]
+    next_cursor: Optional[str] = None
+
+class MediaUploadFile(BaseModel):
+    """A file the client intends to upload directly to S3"""
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str = Field(..., pattern=r"^image/[\w.+-]+$")
+    sha256: str = Field(..., pattern=r"^[0-9a-f]{64}$", description="Hex SHA-256 of the file bytes")
+    size: int = Field(..., gt=0, description="File size in bytes")
+
+class MediaUploadRequest(BaseModel):
+    """Request body for issuing presigned upload URLs"""
+    files: List[MediaUploadFile] = Field(..., min_length=1, max_length=20)
+
+class PresignedUpload(BaseModel):
+    """
+    Presigned S3 PUT: send the file body to `url` with `headers`
+
+    If `exists` is true the object is already stored and no upload is needed;
+    just confirm the key.
+    """
+    key: str
+    exists: bool = False
+    url: Optional[str] = None
+    headers: Dict[str, str] = {}
+
+class MediaUploadResponse(BaseModel):
+    """Presigned uploads, in the same order as the requested files"""
+    uploads: List[PresignedUpload]
+    expires_in: int
+    max_upload_bytes: int
+
+class MediaConfirmRequest(BaseModel):
+    """Keys of completed direct uploads to register as product media"""
+    keys: List[str] = Field(..., min_length=1, max_length=20)
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class StockReservationCreate(BaseModel):
+    quantity: int = Field(default=1, ge=1)
+
+class StockReservationResponse(BaseModel):
+    id: int
+    product_id: int
+    quantity: int
+    expires_at: datetime
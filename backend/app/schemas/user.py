@@ -16,3 +16,6 @@ class UserResponse(UserBase):
     
     class Config:
         from_attributes = True
+
+class UserActiveUpdate(BaseModel):
+    is_active: bool
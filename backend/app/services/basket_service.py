@@ -0,0 +1,214 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.basket_store import BasketStore, basket_store
+from app.repositories.basket_repository import BasketRepository
+from app.repositories.product_repository import ProductRepository
+from app.schemas.basket import BasketItem, BasketResponse
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class BasketService:
+    """
+    Baskets served from the basket store, written to Postgres behind the edits
+
+    Edits only touch the store and mark the user dirty; run_basket_flusher
+    writes dirty baskets in batches, so a burst of quantity changes costs one
+    upsert instead of a commit each. The session is only used to load a basket
+    the store does not have, to check products being added, and to flush.
+    """
+
+    def __init__(self, db: AsyncSession, store: BasketStore = basket_store):
+        self.db = db
+        self.store = store
+        self.repository = BasketRepository(db)
+        self.product_repository = ProductRepository(db)
+        self.max_items = settings.basket_max_items or 100
+        self.max_quantity = settings.basket_max_quantity or 99
+        # Without a flush interval every edit is written through before responding
+        self.write_through = not settings.basket_flush_interval_seconds
+
+    async def _items(self, user_id: int) -> Dict[int, int]:
+        """The user's basket from the store, loading it from Postgres on a miss"""
+        items = await self.store.get(user_id)
+        if items is None:
+            await self.store.fill(user_id, await self.repository.get_items(user_id))
+            items = await self.store.get(user_id) or {}
+        return items
+
+    @staticmethod
+    def _response(items: Dict[int, int]) -> BasketResponse:
+        return BasketResponse(
+            items=[BasketItem(product_id=product_id, quantity=quantity) for product_id, quantity in sorted(items.items())],
+            total_quantity=sum(items.values())
+        )
+
+    def _check_quantity(self, quantity: int) -> None:
+        if quantity > self.max_quantity:
+            raise HTTPException(status_code=400, detail=f"Quantity is limited to {self.max_quantity} per product")
+
+    async def _can_add(self, items: Dict[int, int], product_id: int) -> bool:
+        """Whether a product not yet in the basket may be added; False if it does not exist or is inactive"""
+        if len(items) >= self.max_items:
+            raise HTTPException(status_code=400, detail=f"Basket is limited to {self.max_items} products")
+        return bool(await self.product_repository.get_existing_ids([product_id], active_only=True))
+
+    async def edited(self) -> None:
+        """Write edits made directly in the store through now, if there is no flusher"""
+        if self.write_through:
+            await self.flush(settings.basket_flush_batch_size or 500)
+
+    async def get_basket(self, user_id: int) -> BasketResponse:
+        """Get the user's basket"""
+        return self._response(await self._items(user_id))
+
+    async def add_item(self, user_id: int, product_id: int, quantity: int = 1) -> Optional[BasketResponse]:
+        """
+        Add a quantity of a product to the basket
+
+        Returns:
+            The updated basket, or None if the product does not exist or is inactive
+        """
+        items = await self._items(user_id)
+        self._check_quantity(items.get(product_id, 0) + quantity)
+        if product_id not in items and not await self._can_add(items, product_id):
+            return None
+        items[product_id] = await self.store.increment(user_id, product_id, quantity)
+        await self.edited()
+        return self._response(items)
+
+    async def set_quantity(self, user_id: int, product_id: int, quantity: int) -> Optional[BasketResponse]:
+        """
+        Set a product's quantity in the basket; 0 removes it
+
+        Returns:
+            The updated basket, or None if the product does not exist or is inactive
+        """
+        self._check_quantity(quantity)
+        items = await self._items(user_id)
+        if quantity == 0 and product_id not in items:
+            return self._response(items)
+        if product_id not in items and not await self._can_add(items, product_id):
+            return None
+        await self.store.set_quantity(user_id, product_id, quantity)
+        if quantity:
+            items[product_id] = quantity
+        else:
+            del items[product_id]
+        await self.edited()
+        return self._response(items)
+
+    async def remove_item(self, user_id: int, product_id: int) -> bool:
+        """Remove a product from the basket, returning whether it was there"""
+        items = await self._items(user_id)
+        if product_id not in items:
+            return False
+        await self.store.set_quantity(user_id, product_id, 0)
+        await self.edited()
+        return True
+
+    async def clear(self, user_id: int) -> None:
+        """Remove everything from the basket"""
+        await self.store.clear(user_id)
+        await self.edited()
+
+    async def _write(self, user_ids: List[int]) -> None:
+        """
+        Write the given users' baskets in one transaction, skipping products deleted since
+
+        Each user's flush lock is taken before their basket is read from the
+        store, so when two workers flush the same user the later snapshot is
+        always written last. A basket that is no longer loaded (it left the store,
+        or an edit racing its TTL re-created the hash) is merged with its rows
+        first, as a read would, instead of being dropped.
+        """
+        try:
+            await self.repository.lock_users(user_ids)
+            baskets = {}
+            for user_id in user_ids:
+                items = await self.store.get(user_id)
+                if items is None:
+                    await self.store.fill(user_id, await self.repository.get_items(user_id))
+                    items = await self.store.get(user_id) or {}
+                baskets[user_id] = items
+            existing = await self.product_repository.get_existing_ids(
+                {product_id for items in baskets.values() for product_id in items}
+            )
+            await self.repository.replace_many({
+                user_id: {product_id: quantity for product_id, quantity in items.items() if product_id in existing}
+                for user_id, items in baskets.items()
+            })
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+    async def flush(self, batch_size: int) -> int:
+        """
+        Write up to batch_size dirty baskets to Postgres
+
+        Baskets are written in one transaction. If it fails they are retried one
+        by one so a single bad basket cannot hold back the rest: a basket that
+        violates a constraint on its own is logged and dropped from the queue,
+        any other failure puts it back for the next flush. Written baskets get
+        their idle TTL back.
+
+        Returns:
+            Number of baskets written
+        """
+        user_ids = await self.store.pop_dirty(batch_size)
+        if not user_ids:
+            return 0
+
+        try:
+            await self._write(user_ids)
+            await self.store.flushed(user_ids)
+            return len(user_ids)
+        except Exception as e:
+            logger.warning(f"Flushing {len(user_ids)} baskets failed, retrying one by one: {str(e)}")
+
+        written, dropped, requeue = [], [], []
+        for user_id in user_ids:
+            try:
+                await self._write([user_id])
+                written.append(user_id)
+            except IntegrityError as e:
+                logger.error(f"Dropping unwritable basket of user {user_id}: {str(e)}")
+                dropped.append(user_id)
+            except Exception as e:
+                logger.error(f"Flushing basket of user {user_id} failed: {str(e)}")
+                requeue.append(user_id)
+        await self.store.mark_dirty(requeue)
+        await self.store.flushed(written + dropped)
+        return len(written)
+
+
+async def flush_baskets(batch_size: int) -> int:
+    """Flush dirty baskets batch by batch until none are left or a batch falls short"""
+    from app.database import SessionLocal
+
+    total = 0
+    while True:
+        async with SessionLocal() as db:
+            written = await BasketService(db).flush(batch_size)
+        total += written
+        if written < batch_size:
+            return total
+
+
+async def run_basket_flusher(interval_seconds: int, batch_size: int) -> None:
+    """
+    Periodically write dirty baskets to Postgres; runs until cancelled
+
+    Every worker runs one; the per-user flush locks keep their writes ordered.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await flush_baskets(batch_size)
+        except Exception as e:
+            logger.error(f"Basket flush failed: {str(e)}")
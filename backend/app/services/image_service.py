@@ -0,0 +1,107 @@
+"""
+Image Service - Renders product image variants
+
+Decoding and re-encoding images is CPU-bound, so rendering runs in a process pool
+and never on the event loop. Everything submitted to the pool must be picklable,
+which is why render_variants is a module-level function working on bytes.
+
+Workers are spawned, not forked: by the time the pool starts the server already
+runs an event loop, to_thread workers and boto3 threads, and a forked child can
+inherit one of their locks held and deadlock on it.
+"""
+
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class VariantSpec:
+    name: str
+    max_size: Optional[int]  # Longest edge in pixels; None keeps the original dimensions
+    format: str  # Pillow format name
+    quality: int
+
+
+# Ordered smallest first so clients can take the first variant that is large enough
+VARIANT_SPECS = (
+    VariantSpec(name="thumb", max_size=200, format="WEBP", quality=80),
+    VariantSpec(name="thumb_jpeg", max_size=200, format="JPEG", quality=80),
+    VariantSpec(name="medium", max_size=800, format="WEBP", quality=82),
+    VariantSpec(name="full", max_size=None, format="WEBP", quality=85),
+)
+
+
+@dataclass(frozen=True)
+class RenderedVariant:
+    name: str
+    format: str  # Lowercase file extension, e.g. "webp"
+    content_type: str
+    width: int
+    height: int
+    data: bytes
+
+
+def render_variants(data: bytes) -> List[RenderedVariant]:
+    """Render every VARIANT_SPECS entry for one original image (runs in a worker process)"""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+
+    rendered = []
+    for spec in VARIANT_SPECS:
+        variant = image.copy()
+        if spec.max_size:
+            variant.thumbnail((spec.max_size, spec.max_size), Image.Resampling.LANCZOS)
+        if spec.format == "JPEG" and variant.mode not in ("RGB", "L"):
+            variant = variant.convert("RGB")
+        buffer = io.BytesIO()
+        variant.save(buffer, format=spec.format, quality=spec.quality, optimize=True)
+        extension = "jpg" if spec.format == "JPEG" else spec.format.lower()
+        rendered.append(RenderedVariant(
+            name=spec.name,
+            format=extension,
+            content_type=Image.MIME[spec.format],
+            width=variant.width,
+            height=variant.height,
+            data=buffer.getvalue(),
+        ))
+    return rendered
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def start_process_pool() -> ProcessPoolExecutor:
+    """Create the worker-wide process pool; called from the application lifespan"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.image_process_workers or 2,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process pool shared by the whole worker; started here if the lifespan has not (e.g. in scripts)"""
+    return _process_pool or start_process_pool()
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
+
+
+async def render_variants_async(data: bytes) -> List[RenderedVariant]:
+    """Render variants in the process pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), render_variants, data)
@@ -1,68 +1,202 @@
 """
 OAuth Service - Handles only OAuth-specific operations
 Following single responsibility principle - this service only deals with Google OAuth flow
+
+All requests to Google share one process-wide httpx client, so logins reuse
+kept-alive connections instead of paying a TLS handshake each time. The client
+is created on first use and closed from the application lifespan.
 """
 
-from authlib.integrations.httpx_client import AsyncOAuth2Client
-from app.config import settings
-from typing import Tuple
+import asyncio
+import base64
+import json
+import re
 import secrets
+import time
+from typing import Optional, Tuple
+from urllib.parse import urlencode
+
+import httpx
+from authlib.jose import JsonWebKey, jwt
+from authlib.jose.errors import JoseError
+from app.config import settings
 
 # Google OAuth endpoints
 GOOGLE_AUTHORIZATION_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 GOOGLE_TOKEN_URL = "https://accounts.google.com/o/oauth2/token"
 GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v2/userinfo"
+GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ["https://accounts.google.com", "accounts.google.com"]
+
+# Refetch the key set at most this often when a token names an unknown key
+JWKS_MIN_REFRESH_SECONDS = 60
+
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """HTTP client shared by the whole worker, created on first use"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.google_http_timeout_seconds or 10,
+            limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _unverified_kid(id_token: str) -> Optional[str]:
+    """Key id from a JWT header, read before the signature is checked to pick the key"""
+    try:
+        segment = id_token.split(".", 1)[0]
+        header = json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+        return header.get("kid")
+    except (ValueError, AttributeError):
+        return None
+
+
+class GoogleKeySet:
+    """
+    Google's token signing keys, cached for as long as Google's Cache-Control allows
+
+    A token signed with a key we have not seen forces a refetch (rate limited),
+    so key rotation is picked up without waiting for the cache to expire.
+    """
+
+    def __init__(self):
+        self._keys = None
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, client: httpx.AsyncClient, kid: Optional[str] = None):
+        now = time.monotonic()
+        if self._keys is not None and now < self._expires_at and self._has_key(kid):
+            return self._keys
+        async with self._lock:
+            now = time.monotonic()
+            stale = self._keys is None or now >= self._expires_at
+            unknown_kid = not self._has_key(kid) and now - self._fetched_at >= JWKS_MIN_REFRESH_SECONDS
+            if stale or unknown_kid:
+                await self._refresh(client)
+        return self._keys
+
+    def _has_key(self, kid: Optional[str]) -> bool:
+        if self._keys is None:
+            return False
+        return kid is None or any(key.kid == kid for key in self._keys.keys)
+
+    async def _refresh(self, client: httpx.AsyncClient) -> None:
+        resp = await client.get(GOOGLE_JWKS_URL)
+        resp.raise_for_status()
+        self._keys = JsonWebKey.import_key_set(resp.json())
+        self._fetched_at = time.monotonic()
+        match = re.search(r"max-age=(\d+)", resp.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else settings.google_jwks_cache_seconds or 3600
+        self._expires_at = self._fetched_at + max_age
+
+
+google_key_set = GoogleKeySet()
+
 
 class OAuthService:
     """Service for Google OAuth operations"""
-    
-    def __init__(self):
-        self.client = AsyncOAuth2Client(
-            client_id=settings.google_client_id,
-            client_secret=settings.google_client_secret,
-            scope="openid email profile",
-            redirect_uri=settings.google_redirect_uri,
-        )
-    
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None, key_set: Optional[GoogleKeySet] = None):
+        self.client = http_client or get_http_client()
+        self.key_set = key_set or google_key_set
+
     def generate_state(self) -> str:
         """Generate a random state token for CSRF protection"""
         return secrets.token_urlsafe(32)
-    
+
     def create_authorization_url(self, state: str) -> Tuple[str, str]:
         """
         Create Google OAuth authorization URL
-        
+
         Returns:
             Tuple of (authorization_url, state) - state should be stored and validated on callback
         """
-        authorization_url, _ = self.client.create_authorization_url(
-            GOOGLE_AUTHORIZATION_URL,
-            redirect_uri=settings.google_redirect_uri,
-            state=state
-        )
-        return authorization_url, state
-    
+        params = {
+            "response_type": "code",
+            "client_id": settings.google_client_id,
+            "redirect_uri": settings.google_redirect_uri,
+            "scope": "openid email profile",
+            "state": state,
+        }
+        return f"{GOOGLE_AUTHORIZATION_URL}?{urlencode(params)}", state
+
     async def fetch_user_info(self, code: str) -> dict:
         """
         Exchange authorization code for access token and fetch user info
-        
+
+        With GOOGLE_VERIFY_ID_TOKEN enabled, the user info is read from the
+        id_token returned by the token exchange, verified locally against
+        Google's cached signing keys, which saves the round trip to userinfo.
+
         Args:
             code: Authorization code from Google callback
-            
+
         Returns:
             Dictionary containing user information (email, name, picture, etc.)
-            
+
         Raises:
             Exception: If token exchange or user info fetch fails
         """
         # Exchange code for token
-        token = await self.client.fetch_token(
-            GOOGLE_TOKEN_URL,
-            code=code,
-            redirect_uri=settings.google_redirect_uri,
-        )
-        
+        resp = await self.client.post(GOOGLE_TOKEN_URL, data={
+            "grant_type": "authorization_code",
+            "code": code,
+            "client_id": settings.google_client_id,
+            "client_secret": settings.google_client_secret,
+            "redirect_uri": settings.google_redirect_uri,
+        })
+        resp.raise_for_status()
+        token = resp.json()
+
+        if settings.google_verify_id_token and token.get("id_token"):
+            return await self.verify_id_token(token["id_token"])
+
         # Fetch user info using the access token
-        resp = await self.client.get(GOOGLE_USERINFO_URL)
+        resp = await self.client.get(
+            GOOGLE_USERINFO_URL,
+            headers={"Authorization": f"Bearer {token['access_token']}"}
+        )
         resp.raise_for_status()
-        return resp.json()
\ No newline at end of file
+        return resp.json()
+
+    async def verify_id_token(self, id_token: str) -> dict:
+        """
+        Verify a Google id_token's signature, issuer, audience and expiry
+
+        Returns:
+            The token claims (email, name, picture, sub, ...)
+
+        Raises:
+            ValueError: If the token is invalid or its email is not verified
+        """
+        try:
+            keys = await self.key_set.get(self.client, _unverified_kid(id_token))
+            claims = jwt.decode(
+                id_token,
+                keys,
+                claims_options={
+                    "iss": {"essential": True, "values": GOOGLE_ISSUERS},
+                    "aud": {"essential": True, "value": settings.google_client_id},
+                    "exp": {"essential": True},
+                },
+            )
+            claims.validate(leeway=60)
+        except JoseError as e:
+            raise ValueError(f"Invalid id_token: {e}")
+        if not claims.get("email_verified"):
+            raise ValueError("Google account email is not verified")
+        return dict(claims)
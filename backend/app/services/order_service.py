@@ -0,0 +1,121 @@
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.basket_store import BasketStore, basket_store
+from app.models.order import Order
+from app.repositories.order_repository import OrderRepository
+from app.repositories.product_repository import ProductRepository
+from app.schemas.order import OrderItemResponse, OrderResponse
+from app.services.basket_service import BasketService
+from app.services.stock_service import StockService
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+def _order_response(order: Order) -> OrderResponse:
+    return OrderResponse(
+        id=order.id,
+        user_id=order.user_id,
+        amount=order.amount,
+        idempotency_key=order.idempotency_key,
+        created_at=order.created_at,
+        items=[OrderItemResponse.model_validate(item) for item in order.order_items]
+    )
+
+class OrderService:
+    def __init__(self, db: AsyncSession, store: BasketStore = basket_store):
+        self.db = db
+        self.store = store
+        self.repository = OrderRepository(db)
+        self.product_repository = ProductRepository(db)
+        self.basket_service = BasketService(db, store)
+        self.stock_service = StockService(db)
+
+    async def checkout(self, user_id: int, idempotency_key: Optional[str] = None) -> Tuple[OrderResponse, bool]:
+        """
+        Turn the user's basket into an order in a single transaction
+
+        A user's checkouts are serialized by a transaction-scoped advisory lock,
+        taken before the basket is read and held until the order commits. The
+        ordered quantities leave the basket inside that window, so a second
+        checkout waiting on the lock finds them gone instead of ordering them
+        again; items added while the checkout runs stay in the basket. If the
+        transaction fails, the quantities are put back.
+
+        Prices come from one query over all basket products, the order row from one
+        INSERT ... RETURNING and its items from one multi-row INSERT. Stock is taken
+        in the same transaction (see StockService.take_for_order), counting the
+        user's live reservations; a shortfall is a 409 and nothing is written. With
+        an idempotency key, a repeated or concurrent checkout returns the order the
+        first one created.
+
+        Returns:
+            Tuple of (order, replayed) - replayed is True if the key had already been used
+        """
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Idempotency-Key must be 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+            )
+
+        removed = {}
+        try:
+            await self.repository.lock_checkout(user_id)
+            if idempotency_key:
+                # Checked before the basket: a retry after success finds the basket already empty
+                existing = await self.repository.get_by_idempotency_key(user_id, idempotency_key)
+                if existing:
+                    replayed = _order_response(existing)
+                    # Releases the lock; built first because rollback expires the loaded order
+                    await self.db.rollback()
+                    return replayed, True
+
+            basket = await self.basket_service.get_basket(user_id)
+            if not basket.items:
+                raise HTTPException(status_code=400, detail="Basket is empty")
+            prices = await self.product_repository.get_prices([item.product_id for item in basket.items])
+            unavailable = [item.product_id for item in basket.items if item.product_id not in prices]
+            if unavailable:
+                raise HTTPException(status_code=400, detail=f"Products no longer available: {unavailable}")
+            items = [
+                {"product_id": item.product_id, "quantity": item.quantity, "price": prices[item.product_id]}
+                for item in basket.items
+            ]
+            ordered = {item["product_id"]: item["quantity"] for item in items}
+
+            order = await self.repository.create(
+                user_id,
+                amount=round(sum(item["price"] * item["quantity"] for item in items), 2),
+                idempotency_key=idempotency_key
+            )
+            order_items = []
+            if order:
+                short = await self.stock_service.take_for_order(user_id, ordered)
+                if short:
+                    raise HTTPException(status_code=409, detail=f"Insufficient stock for products: {short}")
+                order_items = await self.repository.add_items(order["id"], items)
+                await self.store.remove_items(user_id, ordered)
+                removed = ordered
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            for product_id, quantity in removed.items():
+                await self.store.increment(user_id, product_id, quantity)
+            raise
+
+        if order is None:
+            # Only reachable if the key was used outside the lock; the other order has committed
+            existing = await self.repository.get_by_idempotency_key(user_id, idempotency_key)
+            return _order_response(existing), True
+
+        await self.basket_service.edited()
+        return OrderResponse(
+            **order,
+            items=[OrderItemResponse.model_validate(dict(item)) for item in order_items]
+        ), False
+
+    async def get_order(self, order_id: int, user_id: int) -> Optional[OrderResponse]:
+        """Get one of the user's orders"""
+        order = await self.repository.get_by_id(order_id, user_id)
+        if not order:
+            return None
+        return _order_response(order)
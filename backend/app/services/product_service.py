@@ -1,70 +1,601 @@
-from typing import List, Optional
+import io
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from datetime import datetime
+import orjson
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.repositories.product_repository import ProductRepository
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
-from app.schemas.product_media import ProductMediaResponse
+from app.repositories.product_repository import ProductRepository, RELATIONS, embedded_users
+from pydantic import ValidationError
+from app.schemas.product import (
+    ProductCreate,
+    ProductUpdate,
+    ProductResponse,
+    ProductPage,
+    ProductImportError,
+    ProductImportReport,
+)
+from app.schemas.user import UserResponse
+from app.schemas.product_media import (
+    ProductMediaResponse,
+    ProductMediaPage,
+    MediaUploadFile,
+    MediaUploadResponse,
+    PresignedUpload,
+)
 from fastapi import UploadFile
 from app.services.s3_service import S3Service
 from app.repositories.product_media_repository import ProductMediaRepository
+from app.utils.helpers import encode_cursor, decode_cursor, make_etag
+from app.utils.serialization import EncodedResponse, dump_trusted, encode_json
+from app.core.cache import ReadThroughCache
+from app.config import settings
+from app.services.image_service import render_variants_async
+
+logger = logging.getLogger(__name__)
+
+def _decode_cursor_or_400(cursor: Optional[str]):
+    """Decode a pagination cursor, turning malformed input into a 400"""
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def parse_fields(fields: Optional[str], include: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Resolve fields= / include= query values into the ProductResponse fields to return
+
+    fields lists response fields (columns or relationships); include lists
+    relationships to add. Without fields every column is returned; without
+    either, everything is (None). id is always included. Unknown names are a 400.
+    """
+    if fields is None and include is None:
+        return None
+    requested = {name.strip() for name in (fields or "").split(",") if name.strip()}
+    included = {name.strip() for name in (include or "").split(",") if name.strip()}
+    unknown = sorted(requested - set(ProductResponse.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}")
+    unknown = sorted(included - set(RELATIONS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown include: {unknown}; expected some of {list(RELATIONS)}")
+    if fields is None:
+        requested = {name for name in ProductResponse.model_fields if name not in RELATIONS}
+    selected = requested | included | {"id"}
+    return tuple(name for name in ProductResponse.model_fields if name in selected)
+
+def parse_ids(ids: str, max_ids: int) -> List[int]:
+    """Comma-separated product IDs, deduplicated in order; malformed or too many is a 400"""
+    try:
+        product_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not product_ids:
+        raise HTTPException(status_code=400, detail="ids must not be empty")
+    if len(product_ids) > max_ids:
+        raise HTTPException(status_code=400, detail=f"At most {max_ids} ids per request")
+    return product_ids
+
+def fields_key(fields: Optional[Tuple[str, ...]]) -> Tuple[str, ...]:
+    """Extra ETag / cache-key state for a sparse fieldset; empty for the full representation"""
+    return () if fields is None else ("fields=" + ",".join(fields),)
+
+def _version(product: Any, fields: Optional[Tuple[str, ...]] = None) -> datetime:
+    """
+    Version of a product's response: the newest updated_at among it and its embedded users
+
+    Matches the repository's version queries, so validators built from a loaded
+    product equal the ones resolved without loading it. Also accepts a dumped
+    ProductResponse (ISO strings), e.g. a decoded cache entry.
+    """
+    get = product.get if isinstance(product, dict) else lambda name: getattr(product, name)
+    stamps = [get("updated_at")]
+    for relation in embedded_users(fields):
+        user = get(relation)
+        if user is not None:
+            stamps.append(user["updated_at"] if isinstance(user, dict) else user.updated_at)
+    return max(datetime.fromisoformat(stamp) if isinstance(stamp, str) else stamp for stamp in stamps)
+
+def product_cache_key(product_id: int) -> str:
+    """Cache key of a product's full encoded response"""
+    return f"product:{product_id}"
+
+def _next_cursor(rows: list, limit: int) -> Optional[str]:
+    """Cursor for the page after `rows`, or None if this was the last page"""
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last.created_at, last.id)
+
 class ProductService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, cache: Optional[ReadThroughCache] = None):
+        self.db = db
         self.repository = ProductRepository(db)
         self.media_repository = ProductMediaRepository(db)
         self.s3_service = S3Service()
+        # Read-through cache for single products and listing pages; None disables caching
+        self.cache = cache
 
+    async def _invalidate(self, product_id: Optional[int] = None) -> None:
+        """Drop a cached product and every cached listing page"""
+        if not self.cache:
+            return
+        if product_id is not None:
+            await self.cache.delete(product_cache_key(product_id))
+        await self.cache.bump_generation("list")
 
-    async def create_product_with_media(self, product_data: ProductCreate, created_by_id: Optional[int] = None, images: List[UploadFile] = None) -> ProductResponse:
-        """Create a new product with media"""
+    async def _delete_unreferenced_objects(self, content_hashes: List[str]) -> None:
+        """
+        Best-effort delete of stored objects (and their variants) no media record references
 
-        # 1. Create product
-        product = await self.repository.create(product_data, created_by_id=created_by_id)
+        Runs in its own transaction holding the hashes' content locks, from the
+        reference check until the objects are gone, so no create or confirm can
+        commit a record pointing at them in between. A confirm checks S3 under
+        the locks; a create checks again after committing.
+        """
+        if not content_hashes:
+            return
+        try:
+            await self.media_repository.lock_content(content_hashes)
+            unreferenced = await self.media_repository.get_unreferenced_hashes(content_hashes)
+            await self.s3_service.delete_prefixes([f"media/{content_hash}/" for content_hash in unreferenced])
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Failed to delete unreferenced objects {content_hashes}: {str(e)}")
 
-        # 2. Upload to S3 and get URLs
-        s3_urls = await self.s3_service.upload_images_to_s3(images, product.id)
+    async def create_product_with_media(
+        self,
+        product_data: ProductCreate,
+        created_by_id: Optional[int] = None,
+        images: List[UploadFile] = None,
+        created_by: Optional[UserResponse] = None
+    ) -> ProductResponse:
+        """
+        Create a new product with media in a single transaction
 
-        # 3. Create media records
-        product_media = await self.media_repository.create_multiple(product_id=product.id, s3_urls=s3_urls)
+        Images are stored in S3 first, with no transaction open and no pooled
+        connection held during the transfer. The product and all its media rows
+        are then inserted with INSERT ... RETURNING under the images' content
+        locks and committed together, and the response is built from the
+        returned rows. Once committed the references keep an unreferenced-object
+        delete away; one that ran before the locks were taken is caught by
+        checking the objects again and re-uploading any that went missing.
+        `created_by` (the caller's principal) fills in the response's creator
+        without a lookup.
+        """
+        stored = []
+        try:
+            # 1. Upload to S3 (content-addressed, skipping bytes already stored) and get URLs
+            stored = await self.s3_service.upload_images_to_s3(images)
 
-        # 4. Reload product to include newly created media
-        if not product_media:
-            raise HTTPException(status_code=500, detail="Failed to create product media")
-        
-        product = await self.repository.get_by_id(product.id)
+            # 2. Insert product and media records in one short transaction, committing once
+            try:
+                if stored:
+                    await self.media_repository.lock_content([content_hash for _, content_hash in stored])
+                product = await self.repository.create(product_data, created_by_id=created_by_id)
+                product_media = await self.media_repository.create_multiple(
+                    product_id=product["id"],
+                    s3_urls=[s3_url for s3_url, _ in stored],
+                    content_hashes=[content_hash for _, content_hash in stored]
+                )
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                await self._delete_unreferenced_objects([content_hash for _, content_hash in stored])
+                raise
 
-        # 5. Return product with media
-        return ProductResponse.model_validate(product)
+            # 3. Restore anything deleted as unreferenced between the upload and the locks
+            if stored and await self.s3_service.find_missing_objects(
+                [self.s3_service.key_for(s3_url) for s3_url, _ in stored]
+            ):
+                logger.warning(f"Re-uploading media of product {product['id']} deleted before it was referenced")
+                await self.s3_service.upload_images_to_s3(images)
+        finally:
+            for image in images or []:
+                image.file.close()
+
+        await self._invalidate(product["id"])
+
+        # 4. Return product with media
+        return ProductResponse.model_validate({
+            **product,
+            "created_by": created_by,
+            "media": [dict(media) for media in product_media],
+        })
     
+    async def import_products(
+        self,
+        records: AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]],
+        created_by_id: Optional[int] = None
+    ) -> ProductImportReport:
+        """
+        Bulk-create products from parsed (row_number, record, parse_error) tuples
+
+        Rows are validated with ProductCreate and written IMPORT_CHUNK_SIZE at a time,
+        one transaction per chunk, so a bad chunk does not undo earlier ones.
+        """
+        chunk_size = settings.import_chunk_size or 1000
+        max_errors = settings.import_max_reported_errors or 1000
+        report = ProductImportReport(total_rows=0, imported=0, failed=0, errors=[])
+
+        def reject(row_number: int, messages: List[str]) -> None:
+            report.failed += 1
+            if len(report.errors) < max_errors:
+                report.errors.append(ProductImportError(row=row_number, errors=messages))
+            else:
+                report.errors_truncated = True
+
+        async def flush(chunk: List[Tuple[int, ProductCreate]]) -> None:
+            try:
+                report.imported += await self.repository.bulk_create(
+                    [product for _, product in chunk],
+                    created_by_id=created_by_id
+                )
+            except Exception as e:
+                logger.error(f"Bulk import chunk failed: {str(e)}")
+                for row_number, _ in chunk:
+                    reject(row_number, [f"Chunk rolled back: {str(e)}"])
+
+        chunk: List[Tuple[int, ProductCreate]] = []
+        try:
+            async for row_number, record, parse_error in records:
+                report.total_rows += 1
+                if parse_error:
+                    reject(row_number, [parse_error])
+                    continue
+                try:
+                    chunk.append((row_number, ProductCreate.model_validate(record)))
+                except ValidationError as e:
+                    reject(row_number, [
+                        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+                        for error in e.errors()
+                    ])
+                    continue
+                if len(chunk) >= chunk_size:
+                    await flush(chunk)
+                    chunk = []
+            await flush(chunk)
+        finally:
+            if report.imported:
+                await self._invalidate()
+        # Rolled-back chunks are reported after later parse errors; restore row order
+        report.errors.sort(key=lambda error: error.row)
+        return report
     
-    async def get_product(self, product_id: int) -> Optional[ProductResponse]:
-        """Get product by ID"""
-        product = await self.repository.get_by_id(product_id)
+    def _cached_response(self, cached: Optional[str]) -> Optional[EncodedResponse]:
+        if cached is None:
+            return None
+        try:
+            return EncodedResponse.from_cache(cached)
+        except ValueError:
+            # Written in an older format; treat as a miss and overwrite
+            return None
+
+    async def get_product(self, product_id: int, fields: Optional[Tuple[str, ...]] = None) -> Optional[EncodedResponse]:
+        """
+        Get product by ID as an encoded ProductResponse body with its validators
+
+        Built with the trusted serializer and cached as bytes, so hits are returned
+        without decoding, validating or re-encoding. Only the full representation is
+        cached; a sparse fieldset (see parse_fields) is cut from the cached entry
+        when there is one and otherwise read with a projected query.
+        """
+        cache_key = product_cache_key(product_id)
+        if self.cache:
+            encoded = self._cached_response(await self.cache.get(cache_key))
+            if encoded is not None:
+                if fields is None:
+                    return encoded
+                data = orjson.loads(encoded.body)
+                version = _version(data, fields)
+                return EncodedResponse(
+                    body=encode_json({name: data[name] for name in fields if name in data}),
+                    etag=make_etag([(product_id, version)], *fields_key(fields)),
+                    last_modified=version
+                )
+
+        product = await self.repository.get_by_id(product_id, fields=fields)
         if not product:
             return None
-        return ProductResponse.model_validate(product)
+        version = _version(product, fields)
+        encoded = EncodedResponse(
+            body=encode_json(dump_trusted(ProductResponse, product, fields=fields)),
+            etag=make_etag([(product.id, version)], *fields_key(fields)),
+            last_modified=version
+        )
+
+        if self.cache and fields is None:
+            await self.cache.set(cache_key, encoded.to_cache())
+        return encoded
+    
+    async def get_products(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> EncodedResponse:
+        """
+        Get a page of products, newest first, as an encoded ProductPage body with its validators
+
+        `fields` (see parse_fields) narrows each item and the query behind it;
+        pages are cached per fieldset.
+        """
+        after = _decode_cursor_or_400(cursor)
+
+        # Listing pages are keyed by a generation counter that every write bumps
+        cache_key = None
+        if self.cache:
+            generation = await self.cache.generation("list")
+            if generation is not None:
+                cache_key = ":".join((f"list:v{generation}", cursor or "", str(skip), str(limit), *fields_key(fields)))
+                encoded = self._cached_response(await self.cache.get(cache_key))
+                if encoded is not None:
+                    return encoded
+
+        # Fetch one extra row to know whether another page exists
+        products = await self.repository.get_all(skip=skip, limit=limit + 1, after=after, fields=fields)
+        next_cursor = _next_cursor(products, limit)
+        products = products[:limit]
+        versions = [(product.id, _version(product, fields)) for product in products]
+        encoded = EncodedResponse(
+            body=encode_json({
+                "items": [dump_trusted(ProductResponse, product, fields=fields) for product in products],
+                "next_cursor": next_cursor,
+            }),
+            etag=make_etag(versions, next_cursor is not None, *fields_key(fields)),
+            last_modified=max((updated_at for _, updated_at in versions), default=None)
+        )
+
+        if cache_key:
+            await self.cache.set(cache_key, encoded.to_cache())
+        return encoded
+    
+    async def get_products_by_ids(self, product_ids: List[int], fields: Optional[Tuple[str, ...]] = None) -> EncodedResponse:
+        """
+        Look up many products at once as an encoded ProductBatch body with its validators
+
+        One query plus one per embedded relationship, whatever the number of IDs.
+        Items follow the order of product_ids; IDs with no product are listed in
+        `missing`. Not cached: the database round trips are already constant.
+        """
+        products = {product.id: product for product in await self.repository.get_by_ids(product_ids, fields=fields)}
+        found = [products[product_id] for product_id in product_ids if product_id in products]
+        missing = [product_id for product_id in product_ids if product_id not in products]
+        versions = [(product.id, _version(product, fields)) for product in found]
+        return EncodedResponse(
+            body=encode_json({
+                "items": [dump_trusted(ProductResponse, product, fields=fields) for product in found],
+                "missing": missing,
+            }),
+            etag=make_etag(versions, *missing, *fields_key(fields)),
+            last_modified=max((updated_at for _, updated_at in versions), default=None)
+        )
+    
+    async def get_product_version(self, product_id: int, fields: Optional[Tuple[str, ...]] = None) -> Optional[datetime]:
+        """Get the version get_product would report for a product without loading it, or None if it does not exist"""
+        return await self.repository.get_version(product_id, fields=fields)
+    
+    async def get_products_versions(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[List[Tuple[int, datetime]], bool]:
+        """
+        Get (id, version) for the page get_products would return
+
+        Returns:
+            Tuple of (versions, has_more) - has_more mirrors whether next_cursor is set
+        """
+        after = _decode_cursor_or_400(cursor)
+        versions = await self.repository.get_page_versions(skip=skip, limit=limit + 1, after=after, fields=fields)
+        return versions[:limit], len(versions) > limit
     
-    async def get_products(self, skip: int = 0, limit: int = 100) -> List[ProductResponse]:
-        """Get all products"""
-        products = await self.repository.get_all(skip=skip, limit=limit)
-        return [ProductResponse.model_validate(product) for product in products]
+    async def export_products(self, include_media: bool = False) -> AsyncIterator[bytes]:
+        """Yield the whole catalog as NDJSON, one encoded chunk per fetched batch"""
+        async for products in self.repository.stream_all(
+            fetch_size=settings.export_fetch_size or 500,
+            include_media=include_media
+        ):
+            lines = []
+            for product in products:
+                data = dump_trusted(ProductResponse, product)
+                if not include_media:
+                    del data["media"]
+                lines.append(encode_json(data))
+            yield b"\n".join(lines) + b"\n"
+    
+    async def search_products(self, query: str, skip: int = 0, limit: int = 100) -> EncodedResponse:
+        """
+        Search products by name and description, ranked by relevance
+
+        Returned as an encoded list of ProductResponse bodies with its validators,
+        built with the trusted serializer like the other product reads.
+        """
+        products = await self.repository.search(query, skip=skip, limit=limit)
+        versions = [(product.id, _version(product)) for product in products]
+        return EncodedResponse(
+            body=encode_json([dump_trusted(ProductResponse, product) for product in products]),
+            etag=make_etag(versions),
+            last_modified=max((updated_at for _, updated_at in versions), default=None)
+        )
     
     async def update_product(self, product_id: int, product_data: ProductUpdate, updated_by_id: Optional[int] = None) -> Optional[ProductResponse]:
         """Update a product"""
         product = await self.repository.update(product_id, product_data, updated_by_id=updated_by_id)
         if not product:
             return None
+        await self._invalidate(product_id)
         return ProductResponse.model_validate(product)
     
     async def delete_product(self, product_id: int) -> bool:
-        """Delete a product"""
-        return await self.repository.delete(product_id)
+        """Delete a product, and any stored media no other product references"""
+        content_hashes = await self.media_repository.get_content_hashes(product_id)
+        deleted = await self.repository.delete(product_id)
+        if deleted:
+            await self._invalidate(product_id)
+            await self._delete_unreferenced_objects(content_hashes)
+        return deleted
     
-    async def get_all_media(self, skip: int = 0, limit: int = 100) -> List[ProductMediaResponse]:
-        """Get all product media records"""
-        media_records = await self.media_repository.get_all(skip=skip, limit=limit)
-        return [ProductMediaResponse.model_validate(media) for media in media_records]
+    async def get_all_media(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> ProductMediaPage:
+        """Get a page of product media records, newest first"""
+        after = _decode_cursor_or_400(cursor)
+        media_records = await self.media_repository.get_all(skip=skip, limit=limit + 1, after=after)
+        return ProductMediaPage(
+            items=[ProductMediaResponse.model_validate(media) for media in media_records[:limit]],
+            next_cursor=_next_cursor(media_records, limit)
+        )
     
     async def get_product_media(self, product_id: int) -> List[ProductMediaResponse]:
         """Get all media records for a specific product"""
         media_records = await self.media_repository.get_by_product_id(product_id)
-        return [ProductMediaResponse.model_validate(media) for media in media_records]
\ No newline at end of file
+        return [ProductMediaResponse.model_validate(media) for media in media_records]
+    
+    async def create_media_uploads(self, product_id: int, files: List[MediaUploadFile]) -> Optional[MediaUploadResponse]:
+        """
+        Issue presigned S3 PUTs so clients upload product images without passing through the API
+
+        Keys are content-addressed from the client-declared sha256, which S3 verifies
+        on upload. Files whose bytes are already stored come back with exists=True
+        and need no upload at all.
+        """
+        if await self.repository.get_version(product_id) is None:
+            return None
+        too_large = [file.filename for file in files if file.size > settings.s3_max_upload_bytes]
+        if too_large:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Files exceed {settings.s3_max_upload_bytes} bytes: {too_large}"
+            )
+
+        s3_keys = [self.s3_service.content_key(file.sha256) for file in files]
+        missing = set(await self.s3_service.find_missing_objects(list(dict.fromkeys(s3_keys))))
+        uploads = []
+        for file, s3_key in zip(files, s3_keys):
+            if s3_key not in missing:
+                uploads.append(PresignedUpload(key=s3_key, exists=True))
+                continue
+            url, headers = self.s3_service.create_presigned_upload(s3_key, file.content_type, file.sha256, file.size)
+            uploads.append(PresignedUpload(key=s3_key, url=url, headers=headers))
+        return MediaUploadResponse(
+            uploads=uploads,
+            expires_in=settings.s3_presigned_expire_seconds,
+            max_upload_bytes=settings.s3_max_upload_bytes
+        )
+    
+    async def confirm_media_uploads(self, product_id: int, keys: List[str]) -> Optional[List[ProductMediaResponse]]:
+        """
+        Register completed direct uploads as product media
+
+        Keys must be content-addressed keys from create_media_uploads and exist in S3.
+        Confirming content the product already references does not create a second record.
+        """
+        if await self.repository.get_version(product_id) is None:
+            return None
+
+        keys = list(dict.fromkeys(keys))
+        invalid = [key for key in keys if self.s3_service.content_hash_from_key(key) is None]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Not content-addressed media keys: {invalid}")
+
+        existing_hashes = set(await self.media_repository.get_content_hashes(product_id))
+        keys = [key for key in keys if self.s3_service.content_hash_from_key(key) not in existing_hashes]
+        if not keys:
+            return []
+
+        try:
+            # Held until the commit, so the objects cannot be deleted as unreferenced after the check
+            await self.media_repository.lock_content([self.s3_service.content_hash_from_key(key) for key in keys])
+            missing = await self.s3_service.find_missing_objects(keys)
+            if missing:
+                raise HTTPException(status_code=400, detail=f"Uploads not found in S3: {missing}")
+            await self.repository.touch(product_id)
+            product_media = await self.media_repository.create_multiple(
+                product_id=product_id,
+                s3_urls=[self.s3_service.url_for(key) for key in keys],
+                content_hashes=[self.s3_service.content_hash_from_key(key) for key in keys]
+            )
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        await self._invalidate(product_id)
+        return [ProductMediaResponse.model_validate(dict(media)) for media in product_media]
+    
+    async def generate_media_variants(self, media_ids: List[int]) -> None:
+        """
+        Render and store thumbnail / WebP variants for media records
+
+        Meant to run after the response is sent. Content already rendered for another
+        media record reuses those variants; otherwise the original is downloaded from
+        S3, rendered in the image process pool and its variants uploaded. A failure on
+        one image is logged and does not stop the others.
+        """
+        product_ids = set()
+        for media in await self.media_repository.get_by_ids(media_ids):
+            try:
+                variants = await self._reuse_variants(media.content_hash)
+                if variants is None:
+                    variants = await self._render_and_store_variants(media)
+                # Touch first so the variants and the new updated_at commit together
+                await self.repository.touch(media.product_id)
+                await self.media_repository.replace_variants(media.id, variants)
+                product_ids.add(media.product_id)
+            except Exception as e:
+                logger.error(f"Failed to generate variants for media {media.id}: {str(e)}", exc_info=True)
+
+        for product_id in product_ids:
+            await self._invalidate(product_id)
+    
+    async def _reuse_variants(self, content_hash: Optional[str]) -> Optional[List[dict]]:
+        """Variant rows already stored for identical content, or None if there are none"""
+        if not content_hash:
+            return None
+        existing = await self.media_repository.get_variants_by_hash(content_hash)
+        if not existing:
+            return None
+        return [
+            {
+                "variant": variant.variant,
+                "format": variant.format,
+                "width": variant.width,
+                "height": variant.height,
+                "size_bytes": variant.size_bytes,
+                "s3_url": variant.s3_url,
+            }
+            for variant in existing
+        ]
+    
+    async def _render_and_store_variants(self, media) -> List[dict]:
+        """Render variants of a media original and upload them next to it"""
+        data = await self.s3_service.download_object(self.s3_service.key_for(media.s3_url))
+        rendered = await render_variants_async(data)
+        if media.content_hash:
+            s3_keys = [
+                self.s3_service.variant_key(media.content_hash, variant.name, variant.format)
+                for variant in rendered
+            ]
+        else:
+            # Legacy media without a content hash
+            s3_keys = [
+                f"products/{media.product_id}/variants/{media.id}/{variant.name}.{variant.format}"
+                for variant in rendered
+            ]
+        await self.s3_service.upload_objects([
+            (s3_key, io.BytesIO(variant.data), variant.content_type)
+            for s3_key, variant in zip(s3_keys, rendered)
+        ])
+        return [
+            {
+                "variant": variant.name,
+                "format": variant.format,
+                "width": variant.width,
+                "height": variant.height,
+                "size_bytes": len(variant.data),
+                "s3_url": self.s3_service.url_for(s3_key),
+            }
+            for s3_key, variant in zip(s3_keys, rendered)
+        ]
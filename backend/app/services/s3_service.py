@@ -1,8 +1,41 @@
 from app.config import settings
+import asyncio
+import base64
+import hashlib
+import logging
+import re
 import boto3
-from typing import List
+from botocore.exceptions import ClientError
+from typing import BinaryIO, List, Optional, Tuple
 from fastapi import UploadFile
 from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# media/{sha256}/original; objects stored before keys were hash-only carry an extension
+CONTENT_KEY_PATTERN = re.compile(r"^media/([0-9a-f]{64})/original(\.[A-Za-z0-9]+)?$")
+
+def _sha256_file(fileobj: BinaryIO) -> str:
+    """Hash a file object in chunks and rewind it for the upload that follows"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(1024 * 1024), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+class _KeepOpen:
+    """File object proxy whose close() does nothing: boto3 closes what it uploads, callers own their files"""
+
+    def __init__(self, fileobj: BinaryIO):
+        self._fileobj = fileobj
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+
+    def close(self) -> None:
+        pass
+
 class S3Service:
     def __init__(self):
         self.s3_client = boto3.client('s3',
@@ -10,25 +43,189 @@ class S3Service:
             aws_secret_access_key=settings.aws_secret_access_key,
             region_name=settings.aws_region
         )
-    
-    async def upload_images_to_s3(self, images: List[UploadFile], product_id: int) -> List[str]:
-        """Upload images to S3"""
-        s3_urls = []
-        for image in images:
-            s3_key = f"products/{product_id}/{image.filename}"
-            try:
-                self.s3_client.upload_fileobj(
-                    image.file,
+
+    async def upload_images_to_s3(self, images: Optional[List[UploadFile]]) -> List[Tuple[str, str]]:
+        """
+        Store images under content-addressed keys, uploading only bytes S3 does not have yet
+
+        Images are hashed off the event loop; identical images in one request are
+        stored once, and images already in the bucket (e.g. shared by another
+        product) are not transferred again. The files are left open, so calling
+        again with the same images re-uploads whatever has gone missing since.
+
+        Returns:
+            (s3_url, content_hash) per distinct image, in first-seen order
+        """
+        if not images:
+            return []
+
+        hashes = await asyncio.gather(*(asyncio.to_thread(_sha256_file, image.file) for image in images))
+        distinct = {}
+        for content_hash, image in zip(hashes, images):
+            distinct.setdefault(content_hash, image)
+        s3_keys = {content_hash: self.content_key(content_hash) for content_hash in distinct}
+
+        missing = set(await self.find_missing_objects(list(s3_keys.values())))
+        await self.upload_objects([
+            (s3_keys[content_hash], image.file, image.content_type)
+            for content_hash, image in distinct.items()
+            if s3_keys[content_hash] in missing
+        ])
+        return [(self.url_for(s3_key), content_hash) for content_hash, s3_key in s3_keys.items()]
+
+    @staticmethod
+    def content_key(content_hash: str) -> str:
+        """
+        Key of an original image; its variants live under the same media/{hash}/ prefix
+
+        Only the hash goes into the key: the declared content type is client
+        input (image/jpg vs image/jpeg, or none at all), so it would split
+        identical bytes across keys. It is kept as the object's Content-Type.
+        """
+        return f"media/{content_hash}/original"
+
+    @staticmethod
+    def variant_key(content_hash: str, variant: str, extension: str) -> str:
+        return f"media/{content_hash}/{variant}.{extension}"
+
+    @staticmethod
+    def content_hash_from_key(s3_key: str) -> Optional[str]:
+        """The sha256 embedded in a content-addressed original key, or None if it is not one"""
+        match = CONTENT_KEY_PATTERN.match(s3_key)
+        return match.group(1) if match else None
+
+    async def upload_objects(self, objects: List[Tuple[str, BinaryIO, Optional[str]]]) -> None:
+        """
+        Upload (key, file object, content type) triples concurrently, off the event loop
+
+        boto3 is blocking, so each upload runs in a worker thread; at most
+        S3_UPLOAD_CONCURRENCY uploads are in flight at once. The file objects
+        are left open. If any upload fails,
+        the ones that succeeded are deleted again and a single error lists every failure.
+        """
+        semaphore = asyncio.Semaphore(settings.s3_upload_concurrency or 4)
+
+        async def upload(s3_key: str, fileobj: BinaryIO, content_type: Optional[str]) -> str:
+            extra_args = {'ContentType': content_type} if content_type else {}
+            async with semaphore:
+                await asyncio.to_thread(
+                    self.s3_client.upload_fileobj,
+                    _KeepOpen(fileobj),
                     settings.s3_bucket_name,
                     s3_key,
-                    ExtraArgs={
-                        'ContentType': image.content_type
-                    }
+                    ExtraArgs=extra_args
                 )
-                s3_url = f"{settings.s3_base_url}/{s3_key}"
-                s3_urls.append(s3_url)
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=f"Failed to upload image to S3: {e}")
-            finally:
-                image.file.close()
-        return s3_urls  
\ No newline at end of file
+            return s3_key
+
+        results = await asyncio.gather(*(upload(*obj) for obj in objects), return_exceptions=True)
+
+        failures = [
+            (obj[0], result)
+            for obj, result in zip(objects, results)
+            if isinstance(result, BaseException)
+        ]
+        if failures:
+            uploaded_keys = [result for result in results if isinstance(result, str)]
+            await self.delete_objects(uploaded_keys)
+            details = "; ".join(f"{s3_key}: {error}" for s3_key, error in failures)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to upload {len(failures)} of {len(objects)} objects to S3: {details}"
+            )
+
+    async def download_object(self, s3_key: str) -> bytes:
+        """Read a whole object into memory, off the event loop"""
+        def download() -> bytes:
+            response = self.s3_client.get_object(Bucket=settings.s3_bucket_name, Key=s3_key)
+            return response['Body'].read()
+        return await asyncio.to_thread(download)
+
+    def create_presigned_upload(self, s3_key: str, content_type: str, content_hash: str, size: int) -> Tuple[str, dict]:
+        """
+        Presign a browser PUT straight to S3 for one object
+
+        The signature pins the key, content type, exact size and SHA-256 checksum,
+        so S3 rejects any body that does not match its content-addressed key.
+        Signing is local, so this makes no network call.
+
+        Returns:
+            Tuple of (url, headers the client must send with the PUT)
+        """
+        checksum = base64.b64encode(bytes.fromhex(content_hash)).decode()
+        url = self.s3_client.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': settings.s3_bucket_name,
+                'Key': s3_key,
+                'ContentType': content_type,
+                'ContentLength': size,
+                'ChecksumSHA256': checksum,
+            },
+            ExpiresIn=settings.s3_presigned_expire_seconds
+        )
+        return url, {'Content-Type': content_type, 'x-amz-checksum-sha256': checksum}
+
+    async def find_missing_objects(self, s3_keys: List[str]) -> List[str]:
+        """Return the keys that do not exist in the bucket, checked concurrently"""
+        semaphore = asyncio.Semaphore(settings.s3_upload_concurrency or 4)
+
+        async def exists(s3_key: str) -> bool:
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(
+                        self.s3_client.head_object,
+                        Bucket=settings.s3_bucket_name,
+                        Key=s3_key
+                    )
+                    return True
+                except ClientError as e:
+                    if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                        return False
+                    raise
+
+        found = await asyncio.gather(*(exists(s3_key) for s3_key in s3_keys))
+        return [s3_key for s3_key, ok in zip(s3_keys, found) if not ok]
+
+    def url_for(self, s3_key: str) -> str:
+        """Public URL for an object key"""
+        return f"{settings.s3_base_url}/{s3_key}"
+
+    def key_for(self, s3_url: str) -> str:
+        """Object key for a URL produced by url_for"""
+        prefix = f"{settings.s3_base_url}/"
+        if not s3_url.startswith(prefix):
+            raise ValueError(f"URL is not served from {settings.s3_base_url}: {s3_url}")
+        return s3_url[len(prefix):]
+
+    async def delete_prefixes(self, prefixes: List[str]) -> None:
+        """Best-effort delete of every object under the given key prefixes"""
+        def list_keys(prefix: str) -> List[str]:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            return [
+                obj['Key']
+                for page in paginator.paginate(Bucket=settings.s3_bucket_name, Prefix=prefix)
+                for obj in page.get('Contents', [])
+            ]
+
+        try:
+            listed = await asyncio.gather(*(asyncio.to_thread(list_keys, prefix) for prefix in prefixes))
+        except Exception as e:
+            logger.error(f"Failed to list S3 objects under {prefixes}: {str(e)}")
+            return
+        await self.delete_objects([s3_key for keys in listed for s3_key in keys])
+
+    async def delete_objects(self, s3_keys: List[str]) -> None:
+        """Best-effort delete of S3 objects, used to clean up after partial failures"""
+        if not s3_keys:
+            return
+        try:
+            # delete_objects accepts up to 1000 keys per call
+            for start in range(0, len(s3_keys), 1000):
+                batch = s3_keys[start:start + 1000]
+                await asyncio.to_thread(
+                    self.s3_client.delete_objects,
+                    Bucket=settings.s3_bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+        except Exception as e:
+            logger.error(f"Failed to clean up S3 objects {s3_keys}: {str(e)}")
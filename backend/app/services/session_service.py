@@ -0,0 +1,81 @@
+"""
+Session Service - Refresh-token sessions, one per signed-in device
+
+Refresh tokens are returned to the client once and stored only as SHA-256
+hashes. Every refresh rotates the token; the old one stops working at once.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.security import create_refresh_token, hash_refresh_token
+from app.repositories.session_repository import SessionRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _expires_at() -> datetime:
+    return datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days or 30)
+
+
+class SessionService:
+    """Service layer for refresh-token sessions"""
+
+    def __init__(self, db: AsyncSession):
+        self.repository = SessionRepository(db)
+
+    async def start_session(self, user_id: int, user_agent: Optional[str] = None) -> str:
+        """Open a session for a new sign-in and return its refresh token"""
+        refresh_token = create_refresh_token()
+        await self.repository.create(user_id, hash_refresh_token(refresh_token), _expires_at(), user_agent)
+        return refresh_token
+
+    async def rotate(self, refresh_token: str) -> Optional[Tuple[int, str]]:
+        """
+        Exchange a refresh token for a new one
+
+        Returns:
+            Tuple of (user_id, new refresh token), or None if the token is not valid
+        """
+        if not refresh_token:
+            return None
+        new_refresh_token = create_refresh_token()
+        user_id = await self.repository.rotate(
+            hash_refresh_token(refresh_token), hash_refresh_token(new_refresh_token), _expires_at()
+        )
+        if user_id is None:
+            return None
+        return user_id, new_refresh_token
+
+    async def end_session(self, refresh_token: str) -> bool:
+        return await self.repository.revoke(hash_refresh_token(refresh_token))
+
+    async def end_all_sessions(self, user_id: int) -> int:
+        return await self.repository.revoke_all(user_id)
+
+    async def delete_expired(self, batch_size: int) -> int:
+        """Delete expired sessions batch by batch, so no transaction holds locks for long"""
+        deleted = 0
+        while True:
+            batch = await self.repository.delete_expired(batch_size)
+            deleted += batch
+            if batch < batch_size:
+                return deleted
+
+
+async def run_session_sweeper(interval_seconds: int, batch_size: int) -> None:
+    """Periodically delete expired sessions; runs until cancelled"""
+    from app.database import SessionLocal
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with SessionLocal() as db:
+                deleted = await SessionService(db).delete_expired(batch_size)
+            if deleted:
+                logger.info(f"Deleted {deleted} expired sessions")
+        except Exception as e:
+            logger.error(f"Session sweep failed: {str(e)}")
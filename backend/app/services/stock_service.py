@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repositories.product_repository import ProductRepository
+from app.repositories.stock_repository import StockRepository
+from app.schemas.stock import StockReservationResponse
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class StockService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.repository = StockRepository(db)
+        self.product_repository = ProductRepository(db)
+        # A user holds at most as many units of a product as a basket may contain
+        self.max_quantity = settings.basket_max_quantity or 99
+
+    async def reserve(self, product_id: int, user_id: int, quantity: int) -> Optional[StockReservationResponse]:
+        """
+        Hold quantity units of a product for the user for STOCK_RESERVATION_TTL_SECONDS
+
+        One conditional statement, under the user's reservation lock, and a commit
+        on success; the product is only looked up again when the reservation
+        fails, to say why. The user's live reservations of one product are capped
+        at BASKET_MAX_QUANTITY units in total.
+
+        Returns:
+            The reservation, or None if the product does not exist or is inactive
+        """
+        if quantity > self.max_quantity:
+            raise HTTPException(status_code=400, detail=f"Quantity is limited to {self.max_quantity} per product")
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.stock_reservation_ttl_seconds or 600)
+        try:
+            await self.repository.lock_reservations(user_id)
+            reservation = await self.repository.reserve(product_id, user_id, quantity, expires_at, self.max_quantity)
+            # Either way the transaction ends here, releasing the lock
+            if reservation is not None:
+                await self.db.commit()
+            else:
+                await self.db.rollback()
+        except Exception:
+            await self.db.rollback()
+            raise
+        if reservation is not None:
+            return StockReservationResponse.model_validate(dict(reservation))
+
+        product = await self.product_repository.get_by_id(product_id, fields=("stock", "is_active"))
+        if not product or not product.is_active:
+            return None
+        if product.stock is None:
+            raise HTTPException(status_code=400, detail="Stock is not tracked for this product")
+        held = await self.repository.held(product_id, user_id)
+        if held + quantity > self.max_quantity:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Reservations are limited to {self.max_quantity} units per product; {held} already held"
+            )
+        raise HTTPException(status_code=409, detail=f"Insufficient stock: {product.stock} available")
+
+    async def release(self, product_id: int, reservation_id: int, user_id: int) -> bool:
+        """Give a reservation's units back before it expires, returning whether it existed"""
+        try:
+            released = await self.repository.release(product_id, reservation_id, user_id)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        return released
+
+    async def take_for_order(self, user_id: int, quantities: Dict[int, int]) -> List[int]:
+        """
+        Take the stock an order needs inside the caller's transaction, without committing
+
+        The user's live reservations of these products count towards the order
+        (surplus reserved units go back to stock); the rest is taken with one
+        conditional UPDATE per product, in product id order so concurrent
+        checkouts lock rows in the same order and cannot deadlock.
+
+        Returns:
+            Products whose stock is short; if any, the caller must roll back
+        """
+        reserved = await self.repository.take_reserved(user_id, sorted(quantities))
+        short = []
+        for product_id in sorted(quantities):
+            delta = quantities[product_id] - reserved.get(product_id, 0)
+            if delta and not await self.repository.adjust(product_id, delta):
+                short.append(product_id)
+        return short
+
+    async def release_expired(self, batch_size: int) -> int:
+        """Release expired reservations batch by batch, so no transaction holds locks for long"""
+        released = 0
+        while True:
+            batch = await self.repository.release_expired(batch_size)
+            released += batch
+            if batch < batch_size:
+                return released
+
+
+async def run_reservation_releaser(interval_seconds: int, batch_size: int) -> None:
+    """Periodically return the stock of expired reservations; runs until cancelled"""
+    from app.database import SessionLocal
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with SessionLocal() as db:
+                released = await StockService(db).release_expired(batch_size)
+            if released:
+                logger.info(f"Released {released} expired stock reservations")
+        except Exception as e:
+            logger.error(f"Stock reservation release failed: {str(e)}")
@@ -1,7 +1,10 @@
 from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.repositories.user_repository import UserRepository
+from app.repositories.product_repository import ProductRepository
 from app.models.user import User
+from app.core.cache import product_cache, user_cache
+from app.services.product_service import product_cache_key
 
 class UserService:
     """Service layer for user operations following the same pattern as ProductService"""
@@ -32,9 +35,53 @@ class UserService:
     
     async def update_user_from_oauth(self, user: User, name: str, picture: str) -> User:
         """Update user information from OAuth data"""
+        changed = (user.name, user.picture) != (name, picture)
         user.name = name
         user.picture = picture
-        return await self.repository.update_user(user)
+        user = await self.repository.update_user(user)
+        await self.invalidate_principal(user.id)
+        if changed:
+            await self.invalidate_products(user.id)
+        return user
+    
+    async def set_user_active(self, user_id: int, is_active: bool) -> Optional[User]:
+        """Activate or deactivate a user; takes effect on the user's next request"""
+        user = await self.repository.get_user_by_id(user_id)
+        if not user:
+            return None
+        changed = user.is_active != is_active
+        user.is_active = is_active
+        user = await self.repository.update_user(user)
+        await self.invalidate_principal(user_id)
+        if changed:
+            await self.invalidate_products(user_id)
+        return user
+    
+    async def delete_user(self, user_id: int) -> bool:
+        """Delete a user; a token already issued to them stops working on its next request"""
+        deleted = await self.repository.delete_user(user_id)
+        if deleted:
+            await self.invalidate_principal(user_id)
+        return deleted
+    
+    async def invalidate_products(self, user_id: int) -> None:
+        """
+        Drop cached product responses that embed the user, and every cached listing page
+
+        Their ETags include the user's updated_at, so a cached body from before
+        the change would never validate again until it expired.
+        """
+        if not product_cache:
+            return
+        product_ids = await ProductRepository(self.db).get_ids_embedding_user(user_id)
+        for start in range(0, len(product_ids), 1000):
+            await product_cache.delete(*(product_cache_key(product_id) for product_id in product_ids[start:start + 1000]))
+        await product_cache.bump_generation("list")
+    
+    async def invalidate_principal(self, user_id: int) -> None:
+        """Drop the cached principal so get_current_user re-reads the user"""
+        if user_cache:
+            await user_cache.delete(str(user_id))
     
     async def get_or_create_user_from_oauth(self, email: str, name: str, picture: str) -> User:
         """Get existing user or create new one from OAuth data"""
@@ -0,0 +1,201 @@
+import base64
+import codecs
+import csv
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from fastapi import Request
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """
+    Encode a keyset position as an opaque, URL-safe cursor string.
+
+    The cursor points at the last item of a page; the next page starts
+    strictly after this (created_at, id) pair.
+    """
+    payload = json.dumps([created_at.isoformat(), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        (created_at, id) tuple, or None if no cursor was given
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def make_etag(versions: Iterable[Tuple[int, datetime]], *extra: object) -> str:
+    """
+    Build a strong ETag from (id, version) pairs plus any extra state
+
+    A version must change whenever any field of the response does; for products
+    that is the newest updated_at of the product and its embedded users. The
+    pairs then identify the representation without serializing it.
+    """
+    digest = hashlib.sha256()
+    for item_id, updated_at in versions:
+        digest.update(f"{item_id}:{updated_at.isoformat()};".encode())
+    for value in extra:
+        digest.update(f"{value};".encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def http_date(value: datetime) -> str:
+    """Format a datetime as an HTTP-date; naive datetimes are taken as server local time"""
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def has_conditional_headers(request: Request) -> bool:
+    """Whether the request carries validators worth checking before doing full work"""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since against the current validators
+
+    If-None-Match takes precedence and uses weak comparison (RFC 9110 13.1.2).
+    If-Modified-Since is only honoured when last_modified is given.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return int(last_modified.astimezone(timezone.utc).timestamp()) <= int(since.timestamp())
+    return False
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_length: Optional[int] = None) -> AsyncIterator[Optional[str]]:
+    """
+    Split a streamed UTF-8 body into lines without buffering the whole body
+
+    Only the newly decoded text of each chunk is split. A line longer than
+    max_length characters is dropped as it arrives: None is yielded in its
+    place once it ends, and reading resumes with the next line.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts: List[str] = []
+    length = 0
+    overlong = False
+    async for chunk in chunks:
+        *lines, rest = decoder.decode(chunk).split("\n")
+        for line in lines:
+            if overlong or (max_length is not None and length + len(line) > max_length):
+                yield None
+            else:
+                yield ("".join(parts) + line).rstrip("\r")
+            parts, length, overlong = [], 0, False
+        if not overlong and rest:
+            parts.append(rest)
+            length += len(rest)
+            if max_length is not None and length > max_length:
+                parts, length, overlong = [], 0, True
+    rest = "".join(parts) + decoder.decode(b"", final=True)
+    if overlong or (max_length is not None and len(rest) > max_length):
+        yield None
+    elif rest:
+        yield rest.rstrip("\r")
+
+
+async def iter_csv_records(
+    lines: AsyncIterator[Optional[str]],
+    max_length: Optional[int] = None
+) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Parse CSV with a header row into (row_number, record, error) tuples
+
+    Quoted fields may span lines; a record is parsed once its quotes balance,
+    tracked with a running count so each line is scanned once. A record still
+    open past max_length characters (e.g. after a stray quote) is reported as
+    an error and parsing resumes at the next line, as it does for lines
+    iter_lines dropped (None). Row numbers count data records starting at 1.
+    """
+    header = None
+    buffered: List[str] = []
+    length = 0
+    quotes = 0
+    row_number = 0
+    async for line in lines:
+        if line is None:
+            if header is None:
+                yield 0, None, f"Header is longer than {max_length} characters"
+                return
+            buffered, length, quotes = [], 0, 0
+            row_number += 1
+            yield row_number, None, f"Line is longer than {max_length} characters"
+            continue
+        buffered.append(line)
+        length += len(line) + 1
+        quotes += line.count('"')
+        if quotes % 2:
+            if max_length is not None and length > max_length:
+                buffered, length, quotes = [], 0, 0
+                row_number += 1
+                yield row_number, None, f"Quoted field runs past {max_length} characters"
+            continue
+        text = "\n".join(buffered)
+        buffered, length, quotes = [], 0, 0
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty cells fall back to schema defaults
+        yield row_number, {name: value for name, value in zip(header, values) if value != ""}, None
+    if buffered:
+        yield row_number + 1, None, "Unterminated quoted field"
+
+
+async def iter_ndjson_records(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Parse newline-delimited JSON objects into (row_number, record, error) tuples; None is a dropped overlong line"""
+    row_number = 0
+    async for line in lines:
+        if line is None:
+            row_number += 1
+            yield row_number, None, "Line is too long"
+            continue
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {str(e)}"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, None, "Expected a JSON object"
+            continue
+        yield row_number, record, None
@@ -0,0 +1,108 @@
+"""
+Trusted-output serialization
+
+Responses built from our own database rows do not need validating: the data
+already satisfied the schema when it was written. dump_trusted copies a
+schema's fields straight off ORM instances (or row mappings) into plain
+dicts, recursing into nested schemas, and orjson encodes the result. For a
+full product page this skips per-field validation (including EmailStr on
+every nested user) and FastAPI's second validate/serialize pass through
+response_model.
+
+Output matches model_dump(mode="json") for the types our schemas use.
+"""
+
+import typing
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Collection, Dict, List, Optional, Tuple, Type
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+_MISSING = object()
+
+# schema -> [(field name, kind, nested schema, FieldInfo)], kind is "value", "model" or "list"
+_plans: Dict[Type[BaseModel], List[Tuple[str, str, Optional[Type[BaseModel]], Any]]] = {}
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _plan(schema: Type[BaseModel]):
+    plan = _plans.get(schema)
+    if plan is None:
+        plan = []
+        for name, field in schema.model_fields.items():
+            annotation = field.annotation
+            if typing.get_origin(annotation) is typing.Union:
+                # Optional[X] -> X
+                args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+                annotation = args[0] if len(args) == 1 else annotation
+            args = typing.get_args(annotation)
+            if _is_model(annotation):
+                plan.append((name, "model", annotation, field))
+            elif typing.get_origin(annotation) is list and args and _is_model(args[0]):
+                plan.append((name, "list", args[0], field))
+            else:
+                plan.append((name, "value", None, field))
+        _plans[schema] = plan
+    return plan
+
+
+def dump_trusted(schema: Type[BaseModel], obj: Any, fields: Optional[Collection[str]] = None) -> Dict[str, Any]:
+    """
+    schema's fields of obj as a plain dict, without validation; only use on our own data
+
+    `fields` limits the top-level keys (a sparse fieldset); unlisted attributes
+    are never read, so they need not be loaded.
+    """
+    is_mapping = isinstance(obj, Mapping)
+    data = {}
+    for name, kind, nested, field in _plan(schema):
+        if fields is not None and name not in fields:
+            continue
+        value = obj.get(name, _MISSING) if is_mapping else getattr(obj, name, _MISSING)
+        if value is _MISSING:
+            value = field.get_default(call_default_factory=True)
+        elif value is None:
+            pass
+        elif kind == "model":
+            value = dump_trusted(nested, value)
+        elif kind == "list":
+            value = [dump_trusted(nested, item) for item in value]
+        data[name] = value
+    return data
+
+
+def encode_json(data: Any) -> bytes:
+    return orjson.dumps(data)
+
+
+class JSONBytesResponse(Response):
+    """JSON response whose body is already encoded; returning it bypasses response_model processing"""
+    media_type = "application/json"
+
+
+@dataclass(frozen=True)
+class EncodedResponse:
+    """A ready-to-send JSON body plus its validators, cacheable as one string"""
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime] = None
+
+    def to_cache(self) -> str:
+        header = orjson.dumps([self.etag, self.last_modified.isoformat() if self.last_modified else None])
+        return (header + b"\n" + self.body).decode()
+
+    @classmethod
+    def from_cache(cls, value: str) -> "EncodedResponse":
+        header, body = value.encode().split(b"\n", 1)
+        etag, last_modified = orjson.loads(header)
+        return cls(
+            body=body,
+            etag=etag,
+            last_modified=datetime.fromisoformat(last_modified) if last_modified else None
+        )
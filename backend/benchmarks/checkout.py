@@ -0,0 +1,149 @@
+"""
+Fire hundreds of simultaneous checkouts and verify none are duplicated or lost
+
+    python -m benchmarks.checkout --users 100 --duplicates 3
+
+Each benchmark user fills a basket, then every user sends `--duplicates`
+checkouts at once with the same Idempotency-Key, all users together. Passes
+when every request succeeds, each user's requests all return the same order,
+the database holds exactly one order per key whose amount matches its items,
+and every basket ends up empty. Exits non-zero otherwise. Needs a database
+seeded with benchmarks.seed and SECRET_KEY set, like benchmarks.run.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+import httpx
+from sqlalchemy import text
+from app.main import app
+from app.core.security import create_access_token
+from app.database import SessionLocal
+from benchmarks.run import _fixtures, percentile
+
+
+async def fill_basket(client: httpx.AsyncClient, headers: dict, low: int, high: int, items: int) -> Dict[int, int]:
+    """Add `items` random active products to a basket, returning what was added"""
+    await client.delete("/basket/", headers=headers)
+    added: Dict[int, int] = {}
+    while len(added) < items:
+        product_id, quantity = random.randint(low, high), random.randint(1, 3)
+        if product_id in added:
+            continue
+        response = await client.post("/basket/items", json={"product_id": product_id, "quantity": quantity}, headers=headers)
+        if response.status_code == 200:
+            added[product_id] = quantity
+    return added
+
+
+async def timed_checkout(client: httpx.AsyncClient, headers: dict) -> tuple:
+    started = time.perf_counter()
+    response = await client.post("/orders/checkout", headers=headers)
+    return response, time.perf_counter() - started
+
+
+async def run(args) -> dict:
+    random.seed(args.seed)
+    fixtures = await _fixtures(args.users)
+    low, high = fixtures["product_ids"]
+    run_id = uuid.uuid4().hex[:12]
+    failures: List[str] = []
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            headers = {
+                user_id: {"Authorization": f"Bearer {create_access_token(user_id)}"}
+                for user_id in fixtures["user_ids"]
+            }
+            baskets = dict(zip(headers, await asyncio.gather(*(
+                fill_basket(client, user_headers, low, high, args.items) for user_headers in headers.values()
+            ))))
+
+            requests = [
+                (user_id, {**user_headers, "Idempotency-Key": f"bench-{run_id}-{user_id}"})
+                for user_id, user_headers in headers.items()
+                for _ in range(args.duplicates)
+            ]
+            random.shuffle(requests)
+            started = time.perf_counter()
+            results = await asyncio.gather(*(timed_checkout(client, request_headers) for _, request_headers in requests))
+            elapsed = time.perf_counter() - started
+
+            order_ids = defaultdict(set)
+            for (user_id, _), (response, _) in zip(requests, results):
+                if response.status_code != 201:
+                    failures.append(f"user {user_id}: checkout returned {response.status_code} {response.text}")
+                    continue
+                order = response.json()
+                order_ids[user_id].add(order["id"])
+                items = {item["product_id"]: item["quantity"] for item in order["items"]}
+                if items != baskets[user_id]:
+                    failures.append(f"user {user_id}: order {order['id']} items {items} != basket {baskets[user_id]}")
+            for user_id, ids in order_ids.items():
+                if len(ids) != 1:
+                    failures.append(f"user {user_id}: one key produced orders {sorted(ids)}")
+
+            for user_id, user_headers in headers.items():
+                basket = (await client.get("/basket/", headers=user_headers)).json()
+                if basket["items"]:
+                    failures.append(f"user {user_id}: basket not emptied: {basket['items']}")
+
+    async with SessionLocal() as db:
+        rows = (await db.execute(text("""
+            SELECT o.user_id, count(DISTINCT o.id) AS orders,
+                   bool_and(abs(o.amount - coalesce(i.total, 0)) < 0.01) AS amounts_match
+            FROM orders o
+            LEFT JOIN (
+                SELECT order_id, sum(price * quantity) AS total FROM order_items GROUP BY order_id
+            ) i ON i.order_id = o.id
+            WHERE o.idempotency_key LIKE :pattern
+            GROUP BY o.user_id
+        """), {"pattern": f"bench-{run_id}-%"})).all()
+    stored = {row.user_id: row for row in rows}
+    for user_id in headers:
+        row = stored.get(user_id)
+        if row is None or row.orders != 1:
+            failures.append(f"user {user_id}: {row.orders if row else 0} orders stored for one key")
+        elif not row.amounts_match:
+            failures.append(f"user {user_id}: order amount does not match its items")
+
+    latencies = sorted(latency for _, latency in results)
+    return {
+        "checkouts": len(requests),
+        "users": len(headers),
+        "duplicates_per_key": args.duplicates,
+        "elapsed_s": round(elapsed, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "replayed": sum(1 for response, _ in results if response.headers.get("Idempotent-Replayed") == "true"),
+        "ok": not failures,
+        "failures": failures[:50],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="Benchmark users checking out at once")
+    parser.add_argument("--duplicates", type=int, default=3, help="Simultaneous checkouts per user sharing one Idempotency-Key")
+    parser.add_argument("--items", type=int, default=3, help="Products per basket")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if not result["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
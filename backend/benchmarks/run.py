@@ -0,0 +1,235 @@
+"""
+Drive the real ASGI app in-process against a seeded database and record a baseline
+
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --requests 5000 --concurrency 50 --compare baseline.json
+
+Requests go through httpx's ASGITransport, so the full middleware / dependency /
+database path is measured without network or server noise. Each scenario
+reports latency percentiles, requests per second and SQL statements per request
+(from the app's own db_queries_total counter). Seed data first with
+benchmarks.seed; SECRET_KEY must be set so access tokens can be minted.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+import httpx
+from sqlalchemy import text
+from app.main import app
+from app.config import settings
+from app.core.metrics import db_queries_total
+from app.core.security import create_access_token
+from app.database import SessionLocal
+from app.services.session_service import SessionService
+from benchmarks.seed import BENCH_EMAIL_DOMAIN
+
+
+@dataclass
+class Scenario:
+    name: str
+    route: str  # Route template, as labelled by the metrics middleware
+    # Makes one request; called with the worker's own state dict
+    request: Callable[[httpx.AsyncClient, dict], Awaitable[httpx.Response]]
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def _fixtures(users: int) -> dict:
+    """Ids and credentials the scenarios draw from"""
+    async with SessionLocal() as db:
+        product_range = (await db.execute(text("SELECT min(id), max(id) FROM products"))).one()
+        user_ids = (await db.execute(
+            text("SELECT id FROM users WHERE email LIKE :pattern AND is_active ORDER BY id LIMIT :limit"),
+            {"pattern": f"%@{BENCH_EMAIL_DOMAIN}", "limit": users}
+        )).scalars().all()
+    if product_range[0] is None or not user_ids:
+        raise SystemExit("No benchmark data found; run python -m benchmarks.seed first")
+    return {"product_ids": (product_range[0], product_range[1]), "user_ids": list(user_ids)}
+
+
+def build_scenarios(fixtures: dict) -> List[Scenario]:
+    low, high = fixtures["product_ids"]
+    tokens = [create_access_token(user_id) for user_id in fixtures["user_ids"]]
+
+    async def listing(client: httpx.AsyncClient, state: dict) -> httpx.Response:
+        # Walk a few pages with the cursor, then start again from the top
+        params = {"limit": 20}
+        if state.get("cursor") and state.get("pages", 0) < 5:
+            params["cursor"] = state["cursor"]
+            state["pages"] = state.get("pages", 0) + 1
+        else:
+            state["pages"] = 0
+        response = await client.get("/products/", params=params)
+        if response.status_code == 200:
+            state["cursor"] = response.json().get("next_cursor")
+        return response
+
+    async def detail(client: httpx.AsyncClient, state: dict) -> httpx.Response:
+        return await client.get(f"/products/{random.randint(low, high)}")
+
+    async def me(client: httpx.AsyncClient, state: dict) -> httpx.Response:
+        return await client.get("/users/me", headers={"Authorization": f"Bearer {random.choice(tokens)}"})
+
+    async def refresh(client: httpx.AsyncClient, state: dict) -> httpx.Response:
+        # Tokens rotate, so each worker chains its own session's tokens
+        if "refresh_token" not in state:
+            async with SessionLocal() as db:
+                state["refresh_token"] = await SessionService(db).start_session(
+                    random.choice(fixtures["user_ids"]), user_agent="benchmarks"
+                )
+        response = await client.post("/auth/auth/refresh", json={"refresh_token": state["refresh_token"]})
+        if response.status_code == 200:
+            state["refresh_token"] = response.json()["refresh_token"]
+        else:
+            state.pop("refresh_token")
+        return response
+
+    return [
+        Scenario("list_products", "/products/", listing),
+        Scenario("get_product", "/products/{product_id}", detail),
+        Scenario("users_me", "/users/me", me),
+        Scenario("refresh_token", "/auth/auth/refresh", refresh),
+    ]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, warmup: int, concurrency: int) -> dict:
+    """Run warmup requests (unmeasured, to fill caches and pools) then `requests` measured ones"""
+    # One state per worker, kept across both phases (e.g. a refresh token chain)
+    states = [{} for _ in range(concurrency)]
+
+    async def phase(count: int, measured: bool) -> None:
+        remaining = count
+
+        async def worker(state: dict) -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    response = await scenario.request(client, state)
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                if measured:
+                    scenario.latencies.append(time.perf_counter() - started)
+                    scenario.errors += failed
+
+        await asyncio.gather(*(worker(state) for state in states))
+
+    await phase(warmup, measured=False)
+    # Every warmup request has finished, so none of its time or queries land in the window
+    queries_before = db_queries_total.value((scenario.route,))
+    window_started = time.perf_counter()
+    await phase(requests, measured=True)
+    elapsed = time.perf_counter() - window_started
+
+    latencies = sorted(scenario.latencies)
+    if not latencies:
+        return {"requests": 0, "errors": 0}
+    queries = db_queries_total.value((scenario.route,)) - queries_before
+    return {
+        "requests": len(latencies),
+        "errors": scenario.errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "queries_per_request": round(queries / len(latencies), 2),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict) -> str:
+    """Per-scenario change of every metric against an earlier run, as a text table"""
+    lines = [f"{'scenario':<16}{'metric':<22}{'baseline':>12}{'current':>12}{'change':>10}"]
+    for name, result in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms", "queries_per_request"):
+            before, after = previous.get(metric), result.get(metric)
+            if before is None or after is None:
+                continue
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+            lines.append(f"{name:<16}{metric:<22}{before:>12}{after:>12}{change:>10}")
+    return "\n".join(lines)
+
+
+async def run(args) -> dict:
+    random.seed(args.seed)
+    scenarios = [
+        scenario for scenario in build_scenarios(await _fixtures(args.users))
+        if not args.only or scenario.name in args.only
+    ]
+    results: Dict[str, dict] = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario in scenarios:
+                results[scenario.name] = await run_scenario(
+                    client, scenario, args.requests, args.warmup, args.concurrency
+                )
+                print(f"{scenario.name}: {results[scenario.name]}")
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "product_cache_ttl_seconds": settings.product_cache_ttl_seconds,
+            "user_cache_ttl_seconds": settings.user_cache_ttl_seconds,
+            "db_pool_size": settings.db_pool_size,
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=200, help="Unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=100, help="Benchmark users to spread auth scenarios over")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="*", help="Scenario names to run (default: all)")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare(result, json.load(f)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Seed the database at DATABASE_URL with a synthetic catalog for benchmarking
+
+    python -m benchmarks.seed --scale small            # 10k products
+    python -m benchmarks.seed --scale large --reset    # 1M products, empty tables first
+    python -m benchmarks.seed --products 50000 --orders 20000 --seed 7
+
+Data is generated from --seed, so the same arguments always produce the same
+rows. Run `alembic upgrade head` first. Rows are written with multi-row
+INSERTs, one transaction per batch.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import insert, text
+from app.config import settings
+from app.database import engine
+from app.models import User, Product, ProductMedia, Order, OrderItem
+
+logger = logging.getLogger("benchmarks.seed")
+
+# products, users, media per product, orders, items per order
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {"products": 10_000, "users": 1_000, "media_per_product": 2, "orders": 10_000, "items_per_order": 3},
+    "medium": {"products": 100_000, "users": 10_000, "media_per_product": 2, "orders": 100_000, "items_per_order": 3},
+    "large": {"products": 1_000_000, "users": 50_000, "media_per_product": 2, "orders": 500_000, "items_per_order": 3},
+}
+
+BENCH_EMAIL_DOMAIN = "bench.example.com"
+
+ADJECTIVES = ["Magic", "Wooden", "Plush", "Glowing", "Tiny", "Giant", "Rainbow", "Musical", "Flying", "Classic"]
+NOUNS = ["Dragon", "Train", "Robot", "Puzzle", "Castle", "Bear", "Rocket", "Unicorn", "Blocks", "Kite"]
+WORDS = ["soft", "durable", "colourful", "educational", "handmade", "safe", "bright", "quiet", "fun", "classic",
+         "wooden", "battery", "outdoor", "creative", "collectible", "gift", "family", "travel", "bedtime", "puzzle"]
+
+
+def _description(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 40))).capitalize() + "."
+
+
+async def _insert_rows(conn, table, rows: List[dict]) -> None:
+    """
+    Multi-row INSERT ... VALUES statements for rows
+
+    Split so no statement binds more than Postgres' 32767 parameters (at most
+    one per column per row); passing the rows as executemany parameters would
+    send one INSERT per row instead.
+    """
+    per_statement = 32767 // len(table.__table__.c)
+    for start in range(0, len(rows), per_statement):
+        await conn.execute(insert(table).values(rows[start:start + per_statement]))
+
+
+async def _insert_batches(table, rows_iter, batch_size: int, label: str) -> None:
+    """Insert generated rows batch by batch, committing each batch"""
+    total, batch, started = 0, [], time.perf_counter()
+    for row in rows_iter:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            async with engine.begin() as conn:
+                await _insert_rows(conn, table, batch)
+            total += len(batch)
+            batch = []
+            logger.info(f"{label}: {total} rows ({total / (time.perf_counter() - started):.0f}/s)")
+    if batch:
+        async with engine.begin() as conn:
+            await _insert_rows(conn, table, batch)
+        total += len(batch)
+    logger.info(f"{label}: {total} rows done in {time.perf_counter() - started:.1f}s")
+
+
+async def _max_id(table) -> int:
+    async with engine.connect() as conn:
+        return (await conn.execute(text(f"SELECT coalesce(max(id), 0) FROM {table.__tablename__}"))).scalar_one()
+
+
+async def _sync_sequence(table) -> None:
+    """Explicit ids bypass the serial sequence, so move it past them"""
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.__tablename__}', 'id'), "
+            f"(SELECT coalesce(max(id), 1) FROM {table.__tablename__}))"
+        ))
+
+
+async def seed(counts: Dict[str, int], seed_value: int, batch_size: int, reset: bool) -> None:
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    s3_base = settings.s3_base_url or "https://bench.invalid"
+
+    if reset:
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "TRUNCATE order_items, orders, product_media_variants, product_media, products, "
+                "user_sessions, users RESTART IDENTITY CASCADE"
+            ))
+        logger.info("Tables truncated")
+
+    # Ids are assigned here so later tables can reference them without reading back
+    first_user = await _max_id(User) + 1
+    user_ids = range(first_user, first_user + counts["users"])
+    await _insert_batches(User, (
+        {
+            "id": user_id,
+            "email": f"user{user_id}@{BENCH_EMAIL_DOMAIN}",
+            "name": f"Bench User {user_id}",
+            "picture": "",
+            "is_active": True,
+            "is_superuser": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for user_id in user_ids
+    ), batch_size, "users")
+    await _sync_sequence(User)
+
+    first_product = await _max_id(Product) + 1
+    product_ids = range(first_product, first_product + counts["products"])
+
+    def products():
+        for product_id in product_ids:
+            # Spread over a year so keyset pages cross realistic timestamp ranges
+            created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            yield {
+                "id": product_id,
+                "name": f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {product_id}",
+                "description": _description(rng),
+                "price": round(rng.uniform(1, 500), 2),
+                "is_active": rng.random() > 0.05,
+                "created_by_id": rng.choice(user_ids),
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    await _insert_batches(Product, products(), batch_size, "products")
+    await _sync_sequence(Product)
+
+    def media():
+        for product_id in product_ids:
+            for index in range(counts["media_per_product"]):
+                content_hash = hashlib.sha256(f"bench-{product_id}-{index}".encode()).hexdigest()
+                yield {
+                    "product_id": product_id,
+                    "s3_url": f"{s3_base}/media/{content_hash}/original",
+                    "content_hash": content_hash,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+
+    await _insert_batches(ProductMedia, media(), batch_size, "product_media")
+
+    first_order = await _max_id(Order) + 1
+    order_ids = range(first_order, first_order + counts["orders"])
+    order_products: List[int] = [rng.choice(product_ids) for _ in order_ids]
+
+    await _insert_batches(Order, (
+        {
+            "id": order_id,
+            "user_id": rng.choice(user_ids),
+            "product_id": product_id,
+            "amount": round(rng.uniform(5, 1500), 2),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for order_id, product_id in zip(order_ids, order_products)
+    ), batch_size, "orders")
+    await _sync_sequence(Order)
+
+    def order_items():
+        for order_id in order_ids:
+            for _ in range(rng.randint(1, counts["items_per_order"])):
+                yield {
+                    "order_id": order_id,
+                    "product_id": rng.choice(product_ids),
+                    "quantity": rng.randint(1, 5),
+                    "price": round(rng.uniform(1, 500), 2),
+                    "created_at": now,
+                    "updated_at": now,
+                }
+
+    await _insert_batches(OrderItem, order_items(), batch_size, "order_items")
+
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for name in SCALES["small"]:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, help=f"Override the scale's {name}")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; same seed, same data")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT transaction")
+    parser.add_argument("--reset", action="store_true", help="TRUNCATE catalog, order and user tables first")
+    args = parser.parse_args()
+
+    counts = dict(SCALES[args.scale])
+    for name in counts:
+        override = getattr(args, name)
+        if override is not None:
+            counts[name] = override
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    logger.info(f"Seeding {counts} with seed {args.seed}")
+    asyncio.run(seed(counts, args.seed, args.batch_size, args.reset))
+
+
+if __name__ == "__main__":
+    main()
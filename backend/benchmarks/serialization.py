@@ -0,0 +1,96 @@
+"""
+CPU cost of serializing one product page: validated path vs trusted path
+
+    python -m benchmarks.serialization --items 100 --rounds 200
+
+No database needed: pages are built from in-memory ORM instances shaped like
+get_all's results (creator, updater and media loaded). The validated path is
+what list_products did before: ProductResponse.model_validate per row, then
+FastAPI's response_model validation and serialization, then JSONResponse.
+The trusted path is dump_trusted + orjson. Both outputs are checked to decode
+to the same JSON before timing.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.models import User, Product, ProductMedia
+from app.schemas.product import ProductPage, ProductResponse
+from app.utils.serialization import dump_trusted, encode_json
+
+
+def build_products(items: int, media_per_product: int) -> List[Product]:
+    now = datetime(2026, 1, 1, 12, 0, 0, 123456)
+    creator = User(id=1, email="creator@bench.example.com", name="Creator", picture="", is_active=True,
+                   is_superuser=False, created_at=now, updated_at=now)
+    updater = User(id=2, email="updater@bench.example.com", name="Updater", picture="", is_active=True,
+                   is_superuser=True, created_at=now, updated_at=now)
+    products = []
+    for product_id in range(1, items + 1):
+        created_at = now - timedelta(minutes=product_id)
+        product = Product(
+            id=product_id, name=f"Magic Toy {product_id}", description="A durable wooden toy " * 5,
+            price=19.99 + product_id, is_active=True, created_by_id=1, updated_by_id=2,
+            created_at=created_at, updated_at=created_at,
+        )
+        product.created_by = creator
+        product.updated_by = updater
+        product.media = [
+            ProductMedia(id=product_id * 10 + index, product_id=product_id,
+                         s3_url=f"https://cdn.example.com/media/{product_id}/{index}.jpg",
+                         content_hash=None, created_at=created_at, updated_at=created_at, variants=[])
+            for index in range(media_per_product)
+        ]
+        products.append(product)
+    return products
+
+
+async def validated_page(products: List[Product], field) -> bytes:
+    page = ProductPage(items=[ProductResponse.model_validate(product) for product in products], next_cursor="abc")
+    content = await serialize_response(field=field, response_content=page)
+    return JSONResponse(content).body
+
+
+def trusted_page(products: List[Product]) -> bytes:
+    return encode_json({"items": [dump_trusted(ProductResponse, product) for product in products], "next_cursor": "abc"})
+
+
+async def main(items: int, media_per_product: int, rounds: int) -> None:
+    products = build_products(items, media_per_product)
+    field = create_response_field(name="Response_list_products", type_=ProductPage)
+
+    assert json.loads(await validated_page(products, field)) == json.loads(trusted_page(products)), "outputs differ"
+
+    started = time.process_time()
+    for _ in range(rounds):
+        await validated_page(products, field)
+    validated = (time.process_time() - started) / rounds
+
+    started = time.process_time()
+    for _ in range(rounds):
+        trusted_page(products)
+    trusted = (time.process_time() - started) / rounds
+
+    print(json.dumps({
+        "items_per_page": items,
+        "media_per_product": media_per_product,
+        "validated_ms_per_page": round(validated * 1000, 3),
+        "trusted_ms_per_page": round(trusted * 1000, 3),
+        "cpu_saved_ms_per_page": round((validated - trusted) * 1000, 3),
+        "speedup": round(validated / trusted, 1) if trusted else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--media-per-product", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.items, args.media_per_product, args.rounds))
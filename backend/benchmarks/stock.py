@@ -0,0 +1,173 @@
+"""
+Reservation throughput on a single hot product under high concurrency
+
+    python -m benchmarks.stock --stock 5000 --reservations 6000 --concurrency 200
+    DB_POOL_SIZE=50 python -m benchmarks.stock --mode conditional
+
+Sets one product's stock, then `--concurrency` workers reserve one unit each
+until `--reservations` attempts are made. `conditional` is StockService.reserve
+(one UPDATE ... WHERE stock >= n feeding the reservation INSERT); `locking` is
+the read-then-write baseline (SELECT ... FOR UPDATE, UPDATE, INSERT) for
+comparison. Each run checks nothing was oversold: exactly min(stock,
+reservations) succeed and stock plus reserved units equals the starting stock.
+Needs a database seeded with benchmarks.seed.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+from fastapi import HTTPException
+from sqlalchemy import text
+from app.config import settings
+from app.database import SessionLocal
+from app.services.stock_service import StockService
+from benchmarks.run import _fixtures, percentile
+
+
+async def reserve_conditional(product_id: int, user_id: int) -> bool:
+    async with SessionLocal() as db:
+        try:
+            return await StockService(db).reserve(product_id, user_id, 1) is not None
+        except HTTPException as e:
+            if e.status_code == 409:
+                return False
+            raise
+
+
+async def reserve_locking(product_id: int, user_id: int) -> bool:
+    """What reserve would be as read-then-write: the row stays locked across three round trips"""
+    async with SessionLocal() as db:
+        stock = (await db.execute(
+            text("SELECT stock FROM products WHERE id = :id FOR UPDATE"), {"id": product_id}
+        )).scalar_one()
+        if stock < 1:
+            await db.rollback()
+            return False
+        await db.execute(text("UPDATE products SET stock = stock - 1 WHERE id = :id"), {"id": product_id})
+        await db.execute(
+            text("INSERT INTO stock_reservations (product_id, user_id, quantity, expires_at, created_at) "
+                 "VALUES (:product_id, :user_id, 1, :expires_at, now())"),
+            {"product_id": product_id, "user_id": user_id,
+             "expires_at": datetime.utcnow() + timedelta(seconds=settings.stock_reservation_ttl_seconds or 600)}
+        )
+        await db.commit()
+        return True
+
+
+MODES = {"conditional": reserve_conditional, "locking": reserve_locking}
+
+
+async def reset(product_id: int, stock: int) -> None:
+    async with SessionLocal() as db:
+        await db.execute(text("DELETE FROM stock_reservations WHERE product_id = :id"), {"id": product_id})
+        await db.execute(text("UPDATE products SET stock = :stock, is_active = true WHERE id = :id"),
+                         {"id": product_id, "stock": stock})
+        await db.commit()
+
+
+async def totals(product_id: int) -> tuple:
+    async with SessionLocal() as db:
+        row = (await db.execute(text(
+            "SELECT p.stock, coalesce((SELECT sum(quantity) FROM stock_reservations WHERE product_id = p.id), 0) "
+            "FROM products p WHERE p.id = :id"
+        ), {"id": product_id})).one()
+    return row[0], int(row[1])
+
+
+async def run_mode(mode: str, product_id: int, user_ids: List[int], args) -> dict:
+    await reset(product_id, args.stock)
+    reserve = MODES[mode]
+    remaining = args.reservations
+    latencies: List[float] = []
+    succeeded = rejected = errors = 0
+
+    async def worker() -> None:
+        nonlocal remaining, succeeded, rejected, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                if await reserve(product_id, random.choice(user_ids)):
+                    succeeded += 1
+                else:
+                    rejected += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stock, reserved = await totals(product_id)
+    expected = min(args.stock, args.reservations)
+    latencies.sort()
+    return {
+        "attempts": len(latencies),
+        "succeeded": succeeded,
+        "rejected": rejected,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "attempts_per_s": round(len(latencies) / elapsed, 1),
+        "reservations_per_s": round(succeeded / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "final_stock": stock,
+        "reserved_units": reserved,
+        "ok": errors == 0 and succeeded == expected and stock >= 0 and stock + reserved == args.stock,
+    }
+
+
+async def run(args) -> dict:
+    random.seed(args.seed)
+    fixtures = await _fixtures(args.users)
+    product_id = args.product_id or fixtures["product_ids"][0]
+    modes = ["conditional", "locking"] if args.mode == "both" else [args.mode]
+    results = {}
+    for mode in modes:
+        results[mode] = await run_mode(mode, product_id, fixtures["user_ids"], args)
+        print(f"{mode}: {results[mode]}")
+    await reset(product_id, args.stock)
+    return {
+        "meta": {
+            "product_id": product_id,
+            "stock": args.stock,
+            "reservations": args.reservations,
+            "concurrency": args.concurrency,
+            "db_pool_size": settings.db_pool_size,
+            "db_max_overflow": settings.db_max_overflow,
+        },
+        "modes": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["conditional", "locking", "both"], default="both")
+    parser.add_argument("--product-id", type=int, help="Hot product (default: lowest product id)")
+    parser.add_argument("--stock", type=int, default=5000, help="Starting stock of the hot product")
+    parser.add_argument("--reservations", type=int, default=6000, help="Reservation attempts, one unit each")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--users", type=int, default=100, help="Benchmark users to spread reservations over")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    if not all(mode["ok"] for mode in result["modes"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import time
+import httpx
+import pytest
+from authlib.jose import JsonWebKey, jwt
+from app.config import settings
+from app.services import oauth_service
+from app.services.oauth_service import (
+    GOOGLE_JWKS_URL,
+    GOOGLE_TOKEN_URL,
+    GOOGLE_USERINFO_URL,
+    GoogleKeySet,
+    OAuthService,
+)
+
+pytestmark = pytest.mark.anyio
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+
+
+def signing_key(kid: str):
+    return JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": kid})
+
+
+def claims(**overrides) -> dict:
+    now = int(time.time())
+    return {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "1234567890",
+        "email": "shopper@example.com",
+        "email_verified": True,
+        "name": "Shopper",
+        "picture": "https://example.com/shopper.png",
+        "iat": now,
+        "exp": now + 3600,
+        **overrides,
+    }
+
+
+def id_token(key, **overrides) -> str:
+    return jwt.encode({"alg": "RS256", "kid": key.kid}, claims(**overrides), key).decode()
+
+
+class FakeGoogle:
+    """Serves the token, userinfo and JWKS endpoints through httpx.MockTransport"""
+
+    def __init__(self, *keys):
+        self.published = list(keys)
+        self.tokens = {}
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        self.requests.append(url)
+        if url == GOOGLE_TOKEN_URL:
+            code = dict(httpx.QueryParams(request.content.decode()))["code"]
+            return httpx.Response(200, json={"access_token": f"access-{code}", "id_token": self.tokens.get(code)})
+        if url == GOOGLE_USERINFO_URL:
+            assert request.headers["Authorization"].startswith("Bearer access-")
+            return httpx.Response(200, json={"email": "shopper@example.com", "name": "Shopper", "picture": ""})
+        if url == GOOGLE_JWKS_URL:
+            return httpx.Response(
+                200,
+                json={"keys": [key.as_dict(is_private=False) for key in self.published]},
+                headers={"Cache-Control": "public, max-age=3600"},
+            )
+        return httpx.Response(404)
+
+    def count(self, url: str) -> int:
+        return self.requests.count(url)
+
+
+@pytest.fixture
+def google_settings(monkeypatch):
+    monkeypatch.setattr(settings, "google_client_id", CLIENT_ID)
+    monkeypatch.setattr(settings, "google_client_secret", "secret")
+    monkeypatch.setattr(settings, "google_redirect_uri", "http://localhost/auth/callback")
+    monkeypatch.setattr(settings, "google_verify_id_token", True)
+
+
+@pytest.fixture
+async def google(google_settings):
+    key = signing_key("key-1")
+    fake = FakeGoogle(key)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(fake.handler)) as client:
+        yield fake, key, OAuthService(http_client=client, key_set=GoogleKeySet())
+
+
+async def test_code_exchange_returns_verified_id_token_claims(google):
+    fake, key, service = google
+    fake.tokens["code-1"] = id_token(key)
+
+    user_info = await service.fetch_user_info("code-1")
+
+    assert user_info["email"] == "shopper@example.com"
+    assert user_info["sub"] == "1234567890"
+    assert fake.count(GOOGLE_USERINFO_URL) == 0
+    assert fake.count(GOOGLE_JWKS_URL) == 1
+
+
+async def test_code_exchange_uses_userinfo_without_id_token_verification(google, monkeypatch):
+    fake, key, service = google
+    monkeypatch.setattr(settings, "google_verify_id_token", False)
+    fake.tokens["code-1"] = id_token(key)
+
+    user_info = await service.fetch_user_info("code-1")
+
+    assert user_info["email"] == "shopper@example.com"
+    assert fake.count(GOOGLE_USERINFO_URL) == 1
+    assert fake.count(GOOGLE_JWKS_URL) == 0
+
+
+async def test_signing_keys_are_cached_between_logins(google):
+    fake, key, service = google
+
+    for _ in range(3):
+        await service.verify_id_token(id_token(key))
+
+    assert fake.count(GOOGLE_JWKS_URL) == 1
+
+
+@pytest.mark.parametrize("overrides", [
+    {"aud": "someone-else.apps.googleusercontent.com"},
+    {"iss": "https://evil.example.com"},
+    {"iat": int(time.time()) - 7200, "exp": int(time.time()) - 3600},
+], ids=["wrong-aud", "wrong-iss", "expired"])
+async def test_invalid_id_tokens_are_rejected(google, overrides):
+    _, key, service = google
+
+    with pytest.raises(ValueError, match="Invalid id_token"):
+        await service.verify_id_token(id_token(key, **overrides))
+
+
+async def test_token_signed_by_an_unpublished_key_is_rejected(google):
+    _, _, service = google
+
+    with pytest.raises(ValueError, match="Invalid id_token"):
+        await service.verify_id_token(id_token(signing_key("key-1")))
+
+
+async def test_unverified_email_is_rejected(google):
+    _, key, service = google
+
+    with pytest.raises(ValueError, match="email is not verified"):
+        await service.verify_id_token(id_token(key, email_verified=False))
+
+
+async def test_unknown_kid_refetches_the_key_set(google, monkeypatch):
+    fake, key, service = google
+    await service.verify_id_token(id_token(key))
+    # Google rotates in a new key; the cached set is still fresh but does not have it
+    rotated = signing_key("key-2")
+    fake.published.append(rotated)
+    monkeypatch.setattr(oauth_service, "JWKS_MIN_REFRESH_SECONDS", 0)
+
+    user_info = await service.verify_id_token(id_token(rotated))
+
+    assert user_info["email"] == "shopper@example.com"
+    assert fake.count(GOOGLE_JWKS_URL) == 2
+
+
+async def test_unknown_kid_refetch_is_rate_limited(google):
+    fake, key, service = google
+    await service.verify_id_token(id_token(key))
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            await service.verify_id_token(id_token(signing_key("key-unknown")))
+
+    assert fake.count(GOOGLE_JWKS_URL) == 1
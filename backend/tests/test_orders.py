@@ -0,0 +1,152 @@
+import asyncio
+import random
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.basket_store import BasketStore, InMemoryBasketBackend
+from app.models import Basket, Order, OrderItem, Product, User
+from app.services.order_service import OrderService
+
+pytestmark = pytest.mark.anyio
+
+USERS = 60
+CHECKOUTS_PER_USER = 4
+PRODUCTS = 6
+
+
+@pytest.fixture
+async def catalog(db_engine):
+    """Throwaway users and products, removed again with everything ordered from them"""
+    sessions = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    tag = uuid.uuid4().hex[:12]
+    async with sessions() as db:
+        users = [User(email=f"checkout-{tag}-{n}@example.com", name=f"Checkout {n}", picture="") for n in range(USERS)]
+        products = [
+            Product(name=f"Checkout {tag} {n}", description="", price=round(1.25 * (n + 1), 2))
+            for n in range(PRODUCTS)
+        ]
+        db.add_all(users + products)
+        await db.commit()
+    user_ids = [user.id for user in users]
+    product_ids = [product.id for product in products]
+
+    yield sessions, user_ids, {product.id: product.price for product in products}
+
+    async with sessions() as db:
+        order_ids = select(Order.id).where(Order.user_id.in_(user_ids))
+        await db.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+        await db.execute(delete(Order).where(Order.user_id.in_(user_ids)))
+        await db.execute(delete(Basket).where(Basket.user_id.in_(user_ids)))
+        await db.execute(delete(Product).where(Product.id.in_(product_ids)))
+        await db.execute(delete(User).where(User.id.in_(user_ids)))
+        await db.commit()
+
+
+async def fill_baskets(store: BasketStore, user_ids: List[int], prices: Dict[int, float]) -> Dict[int, Dict[int, int]]:
+    rng = random.Random(42)
+    baskets = {}
+    for user_id in user_ids:
+        chosen = rng.sample(sorted(prices), rng.randint(1, len(prices)))
+        baskets[user_id] = {product_id: rng.randint(1, 3) for product_id in chosen}
+        await store.fill(user_id, baskets[user_id])
+    return baskets
+
+
+async def checkout(sessions, store: BasketStore, user_id: int, idempotency_key):
+    async with sessions() as db:
+        try:
+            return await OrderService(db, store).checkout(user_id, idempotency_key)
+        except HTTPException as e:
+            return e
+
+
+async def run_concurrently(sessions, store: BasketStore, calls: list) -> Dict[int, list]:
+    """Fire every (user_id, key) checkout at once, returning each user's results"""
+    calls = list(calls)
+    random.Random(7).shuffle(calls)
+    results = await asyncio.gather(*(checkout(sessions, store, user_id, key) for user_id, key in calls))
+    by_user = defaultdict(list)
+    for (user_id, _), result in zip(calls, results):
+        by_user[user_id].append(result)
+    return by_user
+
+
+async def assert_one_order_each(sessions, store: BasketStore, baskets: Dict[int, Dict[int, int]], prices: Dict[int, float]) -> None:
+    """Exactly one order per user, holding their basket once at current prices, and an emptied basket"""
+    async with sessions() as db:
+        orders = (await db.execute(select(Order).where(Order.user_id.in_(list(baskets))))).scalars().all()
+        rows = (await db.execute(
+            select(OrderItem.order_id, OrderItem.product_id, OrderItem.quantity, OrderItem.price)
+            .where(OrderItem.order_id.in_([order.id for order in orders]))
+        )).all()
+
+    orders_by_user = defaultdict(list)
+    for order in orders:
+        orders_by_user[order.user_id].append(order)
+    items_by_order = defaultdict(list)
+    for row in rows:
+        items_by_order[row.order_id].append(row)
+
+    for user_id, basket in baskets.items():
+        assert len(orders_by_user[user_id]) == 1, f"user {user_id} has {len(orders_by_user[user_id])} orders"
+        order = orders_by_user[user_id][0]
+        items = items_by_order[order.id]
+        product_ids = [item.product_id for item in items]
+        assert len(product_ids) == len(set(product_ids)), f"order {order.id} repeats products {product_ids}"
+        assert {item.product_id: item.quantity for item in items} == basket
+        assert all(item.price == prices[item.product_id] for item in items)
+        expected = round(sum(prices[product_id] * quantity for product_id, quantity in basket.items()), 2)
+        assert order.amount == pytest.approx(expected)
+        assert await store.get(user_id) == {}
+
+
+async def test_concurrent_checkouts_sharing_a_key_create_one_order(catalog):
+    sessions, user_ids, prices = catalog
+    store = BasketStore(InMemoryBasketBackend(), ttl_seconds=3600)
+    baskets = await fill_baskets(store, user_ids, prices)
+
+    results = await run_concurrently(sessions, store, [
+        (user_id, f"key-{user_id}") for user_id in user_ids for _ in range(CHECKOUTS_PER_USER)
+    ])
+
+    for user_id, user_results in results.items():
+        failed = [result.detail for result in user_results if isinstance(result, HTTPException)]
+        assert not failed, f"user {user_id}: {failed}"
+        assert len({order.id for order, _ in user_results}) == 1
+        assert sorted(replayed for _, replayed in user_results) == [False] + [True] * (CHECKOUTS_PER_USER - 1)
+    await assert_one_order_each(sessions, store, baskets, prices)
+
+
+@pytest.mark.parametrize("keyed", [True, False], ids=["distinct-keys", "no-key"])
+async def test_concurrent_checkouts_of_one_basket_order_it_once(catalog, keyed):
+    sessions, user_ids, prices = catalog
+    store = BasketStore(InMemoryBasketBackend(), ttl_seconds=3600)
+    baskets = await fill_baskets(store, user_ids, prices)
+
+    results = await run_concurrently(sessions, store, [
+        (user_id, f"key-{user_id}-{n}" if keyed else None) for user_id in user_ids for n in range(CHECKOUTS_PER_USER)
+    ])
+
+    for user_id, user_results in results.items():
+        orders = [result for result in user_results if not isinstance(result, HTTPException)]
+        rejected = [result for result in user_results if isinstance(result, HTTPException)]
+        assert len(orders) == 1, f"user {user_id}: {len(orders)} checkouts succeeded"
+        assert [(error.status_code, error.detail) for error in rejected] == [(400, "Basket is empty")] * (CHECKOUTS_PER_USER - 1)
+    await assert_one_order_each(sessions, store, baskets, prices)
+
+
+async def test_ordered_quantities_leave_the_basket_but_later_additions_stay():
+    store = BasketStore(InMemoryBasketBackend(), ttl_seconds=60)
+    await store.fill(1, {10: 2, 11: 1})
+    ordered = await store.get(1)
+    # Edits made while the checkout was running
+    await store.increment(1, 10, 3)
+    await store.set_quantity(1, 12, 1)
+
+    await store.remove_items(1, ordered)
+
+    assert await store.get(1) == {10: 3, 12: 1}
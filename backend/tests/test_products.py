@@ -0,0 +1,68 @@
+import time
+import pytest
+from app.utils.helpers import iter_csv_records, iter_lines, iter_ndjson_records
+
+pytestmark = pytest.mark.anyio
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+def csv_body(rows: int) -> bytes:
+    return ("name,description,price\n" + "".join(f"p{n},d{n},{n}\n" for n in range(rows))).encode()
+
+
+async def test_lines_split_across_chunks():
+    lines = await collect(iter_lines(stream(b"one\r\ntw", b"o\n", b"thr", b"ee")))
+    assert lines == ["one", "two", "three"]
+
+
+async def test_overlong_line_is_dropped_and_reading_resumes():
+    lines = await collect(iter_lines(stream(b"ok\n", b"x" * 40, b"x" * 40, b"\nnext\n"), max_length=50))
+    assert lines == ["ok", None, "next"]
+
+
+async def test_overlong_last_line_without_newline_is_dropped():
+    lines = await collect(iter_lines(stream(*[b"x" * 10] * 10), max_length=50))
+    assert lines == [None]
+
+
+async def test_quoted_field_may_span_lines():
+    body = b'name,description,price\na,"line one\nline ""two""",1\n'
+    records = await collect(iter_csv_records(iter_lines(stream(body))))
+    assert records == [(1, {"name": "a", "description": 'line one\nline "two"', "price": "1"}, None)]
+
+
+async def test_stray_quote_is_reported_once_and_parsing_resumes():
+    body = b'name,description,price\nbad,"unterminated,1\n' + csv_body(200).split(b"\n", 1)[1]
+    records = await collect(iter_csv_records(iter_lines(stream(body), max_length=100), max_length=100))
+
+    errors = [(row, error) for row, _, error in records if error]
+    assert errors == [(1, "Quoted field runs past 100 characters")]
+    parsed = [record for _, record, _ in records if record]
+    # Only the lines swallowed before the cap was hit are lost
+    assert 150 < len(parsed) < 200
+    assert parsed[-1] == {"name": "p199", "description": "d199", "price": "199"}
+
+
+async def test_stray_quote_costs_linear_time():
+    async def parse(rows: int) -> float:
+        body = b'name,description,price\nbad,"x,1\n' + csv_body(rows).split(b"\n", 1)[1]
+        started = time.perf_counter()
+        await collect(iter_csv_records(iter_lines(stream(body)), max_length=None))
+        return time.perf_counter() - started
+
+    small, large = await parse(5000), await parse(40000)
+    assert large < small * 8 * 3
+
+
+async def test_overlong_ndjson_line_is_a_row_error():
+    body = b'{"name": "a"}\n' + b'{"name": "' + b"x" * 100 + b'"}\n{"name": "b"}\n'
+    records = await collect(iter_ndjson_records(iter_lines(stream(body), max_length=50)))
+    assert records == [(1, {"name": "a"}, None), (2, None, "Line is too long"), (3, {"name": "b"}, None)]
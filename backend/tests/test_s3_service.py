@@ -0,0 +1,161 @@
+import hashlib
+import io
+import threading
+import time
+import pytest
+from boto3.exceptions import S3UploadFailedError
+from fastapi import HTTPException, UploadFile
+from moto import mock_aws
+from starlette.datastructures import Headers
+from app.config import settings
+from app.services.s3_service import S3Service
+
+pytestmark = pytest.mark.anyio
+
+BUCKET = "test-media"
+CONCURRENCY = 3
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setattr(settings, "aws_access_key_id", "testing")
+    monkeypatch.setattr(settings, "aws_secret_access_key", "testing")
+    monkeypatch.setattr(settings, "aws_region", "us-east-1")
+    monkeypatch.setattr(settings, "s3_bucket_name", BUCKET)
+    monkeypatch.setattr(settings, "s3_base_url", f"https://{BUCKET}.s3.amazonaws.com")
+    monkeypatch.setattr(settings, "s3_upload_concurrency", CONCURRENCY)
+    with mock_aws():
+        service = S3Service()
+        service.s3_client.create_bucket(Bucket=BUCKET)
+        yield service
+
+
+class TrackedUploads:
+    """Wraps upload_fileobj to count calls, track how many run at once and fail chosen keys"""
+
+    def __init__(self, upload, delay: float = 0.05, failing=()):
+        self.upload = upload
+        self.delay = delay
+        self.failing = set(failing)
+        self.lock = threading.Lock()
+        self.keys = []
+        self.running = 0
+        self.peak = 0
+
+    def __call__(self, fileobj, bucket, key, **kwargs):
+        with self.lock:
+            self.keys.append(key)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.delay)
+            if key in self.failing:
+                raise S3UploadFailedError(f"Failed to upload {key}: InternalError")
+            return self.upload(fileobj, bucket, key, **kwargs)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+def track_uploads(service: S3Service, monkeypatch, **kwargs) -> TrackedUploads:
+    tracked = TrackedUploads(service.s3_client.upload_fileobj, **kwargs)
+    monkeypatch.setattr(service.s3_client, "upload_fileobj", tracked)
+    return tracked
+
+
+def image(data: bytes, content_type: str = "image/png") -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename="image.png", headers=Headers({"content-type": content_type}))
+
+
+def key_of(data: bytes) -> str:
+    return S3Service.content_key(hashlib.sha256(data).hexdigest())
+
+
+def stored_keys(service: S3Service) -> list:
+    response = service.s3_client.list_objects_v2(Bucket=BUCKET)
+    return sorted(obj["Key"] for obj in response.get("Contents", []))
+
+
+async def test_uploads_run_concurrently_up_to_the_limit(s3, monkeypatch):
+    payloads = [f"image {n}".encode() for n in range(8)]
+    images = [image(data) for data in payloads]
+    tracked = track_uploads(s3, monkeypatch)
+
+    result = await s3.upload_images_to_s3(images)
+
+    assert tracked.peak == CONCURRENCY
+    assert len(tracked.keys) == len(payloads)
+    assert result == [
+        (s3.url_for(key_of(data)), hashlib.sha256(data).hexdigest()) for data in payloads
+    ]
+    assert stored_keys(s3) == sorted(key_of(data) for data in payloads)
+    body = s3.s3_client.get_object(Bucket=BUCKET, Key=key_of(payloads[0]))
+    assert body["Body"].read() == payloads[0]
+    assert body["ContentType"] == "image/png"
+
+
+async def test_identical_and_already_stored_images_are_not_uploaded_again(s3, monkeypatch):
+    stored, fresh = b"already in the bucket", b"new bytes"
+    s3.s3_client.put_object(Bucket=BUCKET, Key=key_of(stored), Body=stored)
+    tracked = track_uploads(s3, monkeypatch)
+
+    result = await s3.upload_images_to_s3([image(fresh), image(stored), image(fresh)])
+
+    assert tracked.keys == [key_of(fresh)]
+    assert [content_hash for _, content_hash in result] == [
+        hashlib.sha256(fresh).hexdigest(), hashlib.sha256(stored).hexdigest()
+    ]
+
+
+async def test_calling_again_restores_only_objects_deleted_since(s3, monkeypatch):
+    payloads = [b"kept", b"deleted"]
+    images = [image(data) for data in payloads]
+    first = await s3.upload_images_to_s3(images)
+    s3.s3_client.delete_object(Bucket=BUCKET, Key=key_of(b"deleted"))
+    tracked = track_uploads(s3, monkeypatch)
+
+    # The files stay open, so the caller can retry with the same uploads
+    second = await s3.upload_images_to_s3(images)
+
+    assert second == first
+    assert tracked.keys == [key_of(b"deleted")]
+    body = s3.s3_client.get_object(Bucket=BUCKET, Key=key_of(b"deleted"))
+    assert body["Body"].read() == b"deleted"
+
+
+async def test_declared_content_type_does_not_split_identical_bytes(s3, monkeypatch):
+    data = b"same bytes"
+    tracked = track_uploads(s3, monkeypatch)
+
+    first = await s3.upload_images_to_s3([image(data, "image/jpeg")])
+    second = await s3.upload_images_to_s3([image(data, "image/jpg"), image(data, "")])
+
+    assert first == second
+    assert tracked.keys == [key_of(data)]
+
+
+async def test_partial_failure_reports_every_failed_upload(s3, monkeypatch):
+    payloads = [f"image {n}".encode() for n in range(5)]
+    failing = {key_of(payloads[1]), key_of(payloads[3])}
+    images = [image(data) for data in payloads]
+    track_uploads(s3, monkeypatch, failing=failing)
+
+    with pytest.raises(HTTPException) as raised:
+        await s3.upload_images_to_s3(images)
+
+    assert raised.value.status_code == 500
+    assert "Failed to upload 2 of 5 objects" in raised.value.detail
+    for key in failing:
+        assert key in raised.value.detail
+
+
+async def test_partial_failure_deletes_objects_already_uploaded(s3, monkeypatch):
+    payloads = [f"image {n}".encode() for n in range(6)]
+    tracked = track_uploads(s3, monkeypatch, failing={key_of(payloads[-1])})
+
+    with pytest.raises(HTTPException):
+        await s3.upload_images_to_s3([image(data) for data in payloads])
+
+    # The other five reached S3 before the failure was seen, then were removed again
+    assert len(tracked.keys) == len(payloads)
+    assert stored_keys(s3) == []
@@ -1,7 +1,7 @@
 // API for products - uses configured axios instance with auth
 
 import api from './axios';
-import type { Product } from '../types/product';
+import type { Product, ProductBatch, ProductPage } from '../types/product';
 
 export interface ProductCreateData {
     name: string;
@@ -20,8 +20,22 @@ export interface ProductUpdateData {
 
 // GET - List all products
 export const getProducts = async (skip: number = 0, limit: number = 100): Promise<Product[]> => {
-    const response = await api.get<Product[]>('/products', {
-        params: { skip, limit }
+    const page = await getProductPage(undefined, limit, skip);
+    return page.items;
+};
+
+// GET - One page of products; pass next_cursor back to get the following page
+export const getProductPage = async (cursor?: string, limit: number = 100, skip: number = 0): Promise<ProductPage> => {
+    const response = await api.get<ProductPage>('/products', {
+        params: { cursor, limit, skip }
+    });
+    return response.data;
+};
+
+// GET - Full-text search over name and description, best matches first
+export const searchProducts = async (q: string, skip: number = 0, limit: number = 100): Promise<Product[]> => {
+    const response = await api.get<Product[]>('/products/search', {
+        params: { q, skip, limit }
     });
     return response.data;
 };
@@ -32,6 +46,14 @@ export const getProduct = async (id: number): Promise<Product> => {
     return response.data;
 };
 
+// GET - Many products by ID in one request, in the given order; unknown IDs come back in missing
+export const getProductsByIds = async (ids: number[]): Promise<ProductBatch> => {
+    const response = await api.get<ProductBatch>('/products/batch', {
+        params: { ids: ids.join(',') }
+    });
+    return response.data;
+};
+
 // POST - Create new product with images
 export const createProduct = async (data: ProductCreateData): Promise<Product> => {
     const formData = new FormData();
@@ -2,12 +2,23 @@
 
 import type { User } from "./user";
 
+export interface ProductMediaVariant {
+    variant: string;
+    format: string;
+    width: number;
+    height: number;
+    size_bytes: number;
+    s3_url: string;
+}
+
 export interface ProductMedia {
     id: number;
     product_id: number;
     s3_url: string;
     created_at: string;
     updated_at: string;
+    // Smallest first; empty until background processing finishes
+    variants: ProductMediaVariant[];
 }
 
 export interface Product {
@@ -15,6 +26,8 @@ export interface Product {
     name: string;
     description: string;
     price: number;
+    // null when the product's stock is not tracked
+    stock?: number | null;
     is_active: boolean;
     created_by_id?: number | null;
     created_by?: User | null;
@@ -25,6 +38,16 @@ export interface Product {
     media?: ProductMedia[] | null;
 }
 
+export interface ProductPage {
+    items: Product[];
+    next_cursor: string | null;
+}
+
+export interface ProductBatch {
+    items: Product[];
+    missing: number[];
+}
+
 // Form data types for creating/updating products
 export interface ProductFormData {
     name: string;